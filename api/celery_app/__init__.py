@@ -0,0 +1,4 @@
+from celery import Celery
+
+celery_app = Celery("cosmos", include=["api.celery_app.tasks"])
+celery_app.config_from_object("api.celery_app.celeryconfig")
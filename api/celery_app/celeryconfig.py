@@ -0,0 +1,30 @@
+from kombu import Queue
+
+from tg_bot.config.settings import ai_settings, redis_settings
+
+broker_url = f"redis://{redis_settings.REDIS_HOST}:{redis_settings.REDIS_PORT}/{redis_settings.REDIS_CELERY_DB}"
+result_backend = broker_url
+result_expires = 3600
+
+task_serializer = "json"
+result_serializer = "json"
+accept_content = ["json"]
+
+# Interactive requests go to ai_high, everything else to ai_default; start the
+# worker with `-Q ai_high,ai_default` so the high priority queue is drained first.
+task_queues = (Queue("ai_high"), Queue("ai_default"))
+task_default_queue = "ai_default"
+broker_transport_options = {
+    "queue_order_strategy": "priority",
+    "visibility_timeout": int(ai_settings.AI_RESULT_TIMEOUT) * 2,
+}
+
+# Tasks of one worker process run in threads so that concurrent prompts can
+# share a forward pass of the micro-batched inference service. Celery only
+# enforces task time limits on the prefork pool, so generate_answer bounds
+# its wait for the model with AI_INFERENCE_TIMEOUT instead.
+worker_pool = "threads"
+worker_concurrency = ai_settings.AI_WORKER_CONCURRENCY
+
+task_acks_late = True
+worker_prefetch_multiplier = 1
@@ -0,0 +1,57 @@
+from concurrent.futures import TimeoutError
+from typing import Optional
+
+import redis
+
+from api.celery_app import celery_app
+from api.neural_network.inference import get_inference_service
+from tg_bot.config.settings import ai_settings, redis_settings
+
+# Redis stream the partial answer of a task is published to.
+STREAM_KEY = "ai:stream:{task_id}"
+
+_redis_client: Optional[redis.Redis] = None
+
+
+def get_redis_client() -> redis.Redis:
+    """
+    Return the worker's Redis client, creating it on first use.
+    """
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis(
+            host=redis_settings.REDIS_HOST,
+            port=redis_settings.REDIS_PORT,
+            db=ai_settings.AI_STREAM_DB,
+            decode_responses=True,
+            socket_timeout=redis_settings.REDIS_TIMEOUT,
+        )
+    return _redis_client
+
+
+@celery_app.task(bind=True, name="api.celery_app.tasks.generate_answer")
+def generate_answer(self, prompt: str) -> str:
+    """
+    Generate the answer to the prompt, streaming every chunk to the task's Redis stream as it is produced.
+
+    The prompt is answered by the micro-batched inference service within
+    AI_INFERENCE_TIMEOUT seconds; the stream ends with a ``done`` entry, or
+    an ``error`` entry if generation failed or timed out.
+    """
+    client = get_redis_client()
+    stream_key = STREAM_KEY.format(task_id=self.request.id)
+    chunks = []
+    try:
+        for chunk in get_inference_service().stream(prompt, timeout=ai_settings.AI_INFERENCE_TIMEOUT):
+            chunks.append(chunk)
+            client.xadd(stream_key, {"chunk": chunk})
+        client.xadd(stream_key, {"done": "1"})
+    except TimeoutError:
+        client.xadd(stream_key, {"error": "timeout"})
+        raise
+    except Exception as e:
+        client.xadd(stream_key, {"error": str(e)})
+        raise
+    finally:
+        client.expire(stream_key, ai_settings.AI_STREAM_TTL)
+    return "".join(chunks)
@@ -0,0 +1,27 @@
+from pathlib import Path
+
+from infrastructure.lazy_module import LazyInstances
+from tg_bot.config.settings import CommonSettings, setup_logger
+
+API_DIR = Path(__file__).resolve().parent.parent
+
+
+class ApiSettings(CommonSettings):
+    """
+    Settings of the FastAPI service.
+    """
+    API_KEY: str
+    API_DB_KEY: str = "tg_db"
+    API_REDIS_DB: int = 3
+    API_PAGE_SIZE_DEFAULT: int = 100
+    API_PAGE_SIZE_MAX: int = 1000
+    API_CACHE_TTL: int = 30
+
+
+# Built on first access like the instances of tg_bot.config.settings, so importing
+# the API does not read the environment, validate settings or open log files.
+_lazy_instances = LazyInstances(globals(), {
+    "api_settings": ApiSettings,
+    "api_logger": lambda: setup_logger("fast_api", API_DIR / "logs" / "api_logs.log"),
+})
+lazy = __getattr__ = _lazy_instances.get
@@ -0,0 +1,56 @@
+import hmac
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException, Query, Request, Security
+from fastapi.security import APIKeyHeader
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.config import settings
+from tg_bot.db.crud import UTMStatsService
+from tg_bot.utm_analytics import UTMAnalytics
+
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
+
+
+def require_api_key(api_key: Optional[str] = Security(api_key_header)) -> None:
+    """
+    Reject requests that do not carry the configured key in the ``X-API-Key`` header.
+    """
+    if api_key is None or not hmac.compare_digest(api_key.encode(), settings.api_settings.API_KEY.encode()):
+        raise HTTPException(status_code=401, detail="Invalid or missing API key")
+
+
+async def get_session(request: Request) -> AsyncIterator[AsyncSession]:
+    """
+    Yield a session of the shared engine created in the app lifespan.
+    """
+    async with request.app.state.session_maker() as session:
+        yield session
+
+
+def get_utm_analytics(request: Request) -> UTMAnalytics:
+    """
+    Return the bot's UTM analytics over the shared engine; only its rollup reads are used by the API.
+    """
+    return UTMAnalytics(
+        UTMStatsService(request.app.state.session_maker), request.app.state.redis_connector, settings.api_logger
+    )
+
+
+async def get_redis(request: Request):
+    """
+    Return a client of the shared RedisConnector, or None if Redis is unavailable.
+    """
+    return await request.app.state.redis_connector.get_client(db=settings.api_settings.API_REDIS_DB)
+
+
+def page_limit(limit: Optional[int] = Query(None, ge=1)) -> int:
+    """
+    Resolve the page size, checked against the settings when the request is served rather than at import.
+    """
+    api_settings = settings.api_settings
+    if limit is None:
+        return api_settings.API_PAGE_SIZE_DEFAULT
+    if limit > api_settings.API_PAGE_SIZE_MAX:
+        raise HTTPException(status_code=422, detail=f"limit must be at most {api_settings.API_PAGE_SIZE_MAX}")
+    return limit
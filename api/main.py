@@ -0,0 +1,35 @@
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from api.config import settings
+from api.dependencies import require_api_key
+from api.routers import notifications, users, utm
+from infrastructure.redis_connection import RedisConnector
+from tg_bot.config.settings import DatabaseSettings
+from tg_bot.db.session import create_engine_from_config
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create the Redis connector and the database engine shared by all requests.
+    """
+    app.state.redis_connector = RedisConnector(settings.api_logger)
+    app.state.redis_connector.start_health_checks()
+    app.state.engine = create_engine_from_config(DatabaseSettings.get_db_config(settings.api_settings.API_DB_KEY))
+    app.state.session_maker = async_sessionmaker(app.state.engine, expire_on_commit=False)
+    settings.api_logger.info("API started")
+    try:
+        yield
+    finally:
+        await app.state.redis_connector.close_conn()
+        await app.state.engine.dispose()
+        settings.api_logger.info("API stopped")
+
+
+app = FastAPI(title="Cosmos API", lifespan=lifespan, dependencies=[Depends(require_api_key)])
+app.include_router(users.router)
+app.include_router(utm.router)
+app.include_router(notifications.router)
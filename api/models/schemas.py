@@ -0,0 +1,72 @@
+from datetime import datetime
+from typing import Dict, Generic, List, Optional, TypeVar
+
+from pydantic import BaseModel, ConfigDict
+
+ItemT = TypeVar("ItemT")
+
+
+class Page(BaseModel, Generic[ItemT]):
+    """
+    One page of a keyset-paginated listing.
+
+    ``next_cursor`` is the value to pass as ``after_id`` to get the next page,
+    or None on the last page.
+    """
+    items: List[ItemT]
+    next_cursor: Optional[int] = None
+
+
+class UserOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    tg_id: int
+    tg_name: Optional[str]
+    lang: str
+    active: bool
+    utm: Optional[str]
+    created_at: datetime
+
+
+class UTMInfoOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    utm: str
+    source: str
+    info: Optional[str]
+
+
+class NotificationOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    tg_id: Optional[int]
+    notification_date: datetime
+    notification_type: Optional[str]
+    job_id: Optional[str]
+
+
+class UserStats(BaseModel):
+    total: int
+    active: int
+    by_lang: Dict[str, int]
+
+
+class UTMCampaignStats(BaseModel):
+    utm: str
+    starts: int
+    registrations: int
+    conversion: Optional[float]
+
+
+class UTMStats(BaseModel):
+    """
+    Attribution per UTM tag over the last ``days`` days (all time if None).
+
+    ``starts`` counts /start commands carrying the tag and ``registrations``
+    the new users among them; ``conversion`` is their ratio, None without starts.
+    """
+    days: Optional[int] = None
+    campaigns: List[UTMCampaignStats]
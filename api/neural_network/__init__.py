@@ -0,0 +1,25 @@
+import importlib
+from typing import Iterable, List, Protocol
+
+
+class Model(Protocol):
+    """
+    Language model answering a batch of prompts in lockstep.
+
+    Every step of ``stream_batch`` is one forward pass over the whole batch
+    and yields the next chunk of each answer, in the order of the prompts;
+    the chunk of an answer that is already complete is an empty string.
+    """
+
+    def stream_batch(self, prompts: List[str]) -> Iterable[List[str]]:
+        ...
+
+
+def load_model(path: str) -> Model:
+    """
+    Build the model named by its ``package.module:factory`` import path.
+    """
+    module_name, _, factory = path.partition(":")
+    if not module_name or not factory:
+        raise ValueError(f"Model path must look like 'package.module:factory', got {path!r}")
+    return getattr(importlib.import_module(module_name), factory)()
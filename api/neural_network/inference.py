@@ -0,0 +1,289 @@
+import asyncio
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError
+from typing import Callable, Dict, Iterator, List, Optional
+
+from api.neural_network import load_model
+from tg_bot.config.settings import ai_settings
+
+
+class MicroBatcher:
+    """
+    Groups concurrent single-item requests into batches for one vectorised call.
+
+    A background thread waits for the first request, then keeps collecting
+    requests for up to ``max_wait_ms`` milliseconds or until ``max_batch_size``
+    are queued, runs ``batch_fn`` once and scatters the results to the
+    futures of the callers.
+    """
+
+    def __init__(self, batch_fn: Callable[[List], List], max_batch_size: int = 16, max_wait_ms: float = 10):
+        """
+        :param batch_fn: Function mapping a list of inputs to the list of their outputs.
+        :param max_batch_size: Maximum number of items per batch.
+        :param max_wait_ms: Maximum time the first item of a batch waits for company.
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, item) -> Future:
+        """
+        Queue an item and return the future of its result.
+        """
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        future: Future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def close(self) -> None:
+        """
+        Stop the batching thread after the queued items are processed.
+        """
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self) -> Optional[list]:
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                self._queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            items = [item for item, _ in batch]
+            try:
+                results = self.batch_fn(items)
+                if len(results) != len(batch):
+                    # Results cannot be matched to their items, so none of them is handed out.
+                    raise RuntimeError(f"Batch function returned {len(results)} results for {len(batch)} items")
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+
+class LRUCache:
+    """Thread-safe least recently used cache."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normalise a prompt with collapsed whitespace; case is kept, as it can change the answer.
+    """
+    return " ".join(prompt.split())
+
+
+class Generation:
+    """
+    The answer to one prompt, readable chunk by chunk while its batch is generating.
+    """
+
+    def __init__(self, prompt: str):
+        self.prompt = prompt
+        self.chunks: List[str] = []
+        self.future: Optional[Future] = None
+        self._changed = threading.Condition()
+
+    def publish(self, chunk: str) -> None:
+        with self._changed:
+            self.chunks.append(chunk)
+            self._changed.notify_all()
+
+    def finish(self, future: Future) -> None:
+        with self._changed:
+            self._changed.notify_all()
+
+    def iter_chunks(self, timeout: Optional[float] = None) -> Iterator[str]:
+        """
+        Yield the chunks produced so far, then the others as they are produced.
+
+        :raises TimeoutError: If the answer is not complete within ``timeout`` seconds.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        index = 0
+        while True:
+            with self._changed:
+                while index == len(self.chunks) and not self.future.done():
+                    remaining = deadline - time.monotonic() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"No answer to the prompt within {timeout}s")
+                    self._changed.wait(remaining)
+                chunks = self.chunks[index:]
+                finished = self.future.done()
+            index += len(chunks)
+            yield from chunks
+            if finished:
+                # Raises the error of a failed generation.
+                self.future.result()
+                return
+
+
+class InferenceService:
+    """
+    Answers prompts through a micro-batched model with an LRU response cache.
+
+    The model generates every batch in lockstep and each chunk is handed to
+    the readers of its prompt as soon as the step producing it is done.
+    Prompts are normalised before they reach the model, so identical prompts
+    after normalisation are served from the cache, and identical prompts
+    already being generated share a single batch slot and its chunks.
+    """
+
+    def __init__(self, model, max_batch_size: int = 16, max_wait_ms: float = 10, cache_size: int = 1024):
+        """
+        :param model: Model exposing ``stream_batch(prompts) -> steps of chunks``.
+        :param max_batch_size: Maximum number of prompts per batch.
+        :param max_wait_ms: Maximum time a prompt waits for a batch to fill.
+        :param cache_size: Number of answers kept in the response cache.
+        """
+        self.model = model
+        self.batcher = MicroBatcher(self._generate, max_batch_size, max_wait_ms)
+        self.cache = LRUCache(cache_size)
+        self._in_flight: Dict[str, Generation] = {}
+        self._lock = threading.RLock()
+
+    def _generate(self, generations: List[Generation]) -> List[str]:
+        answers: List[List[str]] = [[] for _ in generations]
+        for step in self.model.stream_batch([generation.prompt for generation in generations]):
+            if len(step) != len(generations):
+                raise RuntimeError(f"Model returned {len(step)} chunks for a batch of {len(generations)} prompts")
+            for generation, answer, chunk in zip(generations, answers, step):
+                if chunk:
+                    answer.append(chunk)
+                    generation.publish(chunk)
+        return ["".join(answer) for answer in answers]
+
+    def _generation(self, prompt: str) -> Generation:
+        """
+        Return the generation of the normalised prompt, joining the one in flight if there is one.
+        """
+        with self._lock:
+            generation = self._in_flight.get(prompt)
+            if generation is None:
+                generation = Generation(prompt)
+                generation.future = self.batcher.submit(generation)
+                self._in_flight[prompt] = generation
+                generation.future.add_done_callback(generation.finish)
+                generation.future.add_done_callback(lambda done: self._complete(prompt, done))
+        return generation
+
+    def _complete(self, prompt: str, future: Future) -> None:
+        with self._lock:
+            self._in_flight.pop(prompt, None)
+        if future.exception() is None:
+            self.cache.set(prompt, future.result())
+
+    def submit(self, prompt: str) -> Future:
+        """
+        Return a future resolving to the complete answer to the prompt.
+        """
+        prompt = normalize_prompt(prompt)
+        cached = self.cache.get(prompt)
+        if cached is not None:
+            future: Future = Future()
+            future.set_result(cached)
+            return future
+        return self._generation(prompt).future
+
+    def stream(self, prompt: str, timeout: Optional[float] = None) -> Iterator[str]:
+        """
+        Yield the chunks of the answer as the model produces them; a cached answer comes as one chunk.
+
+        :raises TimeoutError: If the answer is not complete within ``timeout`` seconds.
+        """
+        prompt = normalize_prompt(prompt)
+        cached = self.cache.get(prompt)
+        if cached is not None:
+            yield cached
+            return
+        yield from self._generation(prompt).iter_chunks(timeout)
+
+    def generate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        """
+        Answer the prompt, blocking the calling thread.
+        """
+        return self.submit(prompt).result(timeout)
+
+    async def agenerate(self, prompt: str) -> str:
+        """
+        Answer the prompt without blocking the event loop.
+        """
+        return await asyncio.wrap_future(self.submit(prompt))
+
+    def close(self) -> None:
+        self.batcher.close()
+
+
+_service: Optional[InferenceService] = None
+_service_lock = threading.Lock()
+
+
+def get_inference_service() -> InferenceService:
+    """
+    Return the process-wide inference service, loading the model on first use.
+
+    :raises RuntimeError: If no model is configured.
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            if not ai_settings.INFERENCE_MODEL:
+                raise RuntimeError("INFERENCE_MODEL is not set, there is no model to answer with")
+            _service = InferenceService(
+                load_model(ai_settings.INFERENCE_MODEL),
+                max_batch_size=ai_settings.INFERENCE_MAX_BATCH_SIZE,
+                max_wait_ms=ai_settings.INFERENCE_MAX_WAIT_MS,
+                cache_size=ai_settings.INFERENCE_CACHE_SIZE,
+            )
+        return _service
@@ -0,0 +1,22 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.dependencies import get_session, page_limit
+from api.models.schemas import NotificationOut, Page
+from api.services.pagination import fetch_page
+from tg_bot.db.models import Notification
+
+router = APIRouter(prefix="/notifications", tags=["notifications"])
+
+
+@router.get("", response_model=Page[NotificationOut])
+async def list_notifications(
+    after_id: Optional[int] = None,
+    tg_id: Optional[int] = None,
+    limit: int = Depends(page_limit),
+    session: AsyncSession = Depends(get_session),
+):
+    filters = [Notification.tg_id == tg_id] if tg_id is not None else []
+    return await fetch_page(session, Notification, NotificationOut, after_id, limit, *filters)
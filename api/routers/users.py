@@ -0,0 +1,37 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.config import settings
+from api.dependencies import get_redis, get_session, page_limit
+from api.models.schemas import Page, UserOut
+from api.services.cache import cached_json_response
+from api.services.pagination import fetch_page
+from api.services.stats import compute_user_stats
+from tg_bot.db.models import Users
+
+router = APIRouter(prefix="/users", tags=["users"])
+
+
+@router.get("", response_model=Page[UserOut])
+async def list_users(
+    after_id: Optional[int] = None,
+    active: Optional[bool] = None,
+    limit: int = Depends(page_limit),
+    session: AsyncSession = Depends(get_session),
+):
+    filters = [Users.active == active] if active is not None else []
+    return await fetch_page(session, Users, UserOut, after_id, limit, *filters)
+
+
+@router.get("/stats")
+async def user_stats(
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    redis_client=Depends(get_redis),
+):
+    return await cached_json_response(
+        request, redis_client, "api:cache:users:stats", settings.api_settings.API_CACHE_TTL,
+        lambda: compute_user_stats(session), settings.api_logger,
+    )
@@ -0,0 +1,36 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.config import settings
+from api.dependencies import get_redis, get_session, get_utm_analytics, page_limit
+from api.models.schemas import Page, UTMInfoOut
+from api.services.cache import cached_json_response
+from api.services.pagination import fetch_page
+from api.services.stats import compute_utm_stats
+from tg_bot.db.models import UTMInfo
+
+router = APIRouter(prefix="/utm", tags=["utm"])
+
+
+@router.get("", response_model=Page[UTMInfoOut])
+async def list_utm(
+    after_id: Optional[int] = None,
+    limit: int = Depends(page_limit),
+    session: AsyncSession = Depends(get_session),
+):
+    return await fetch_page(session, UTMInfo, UTMInfoOut, after_id, limit)
+
+
+@router.get("/stats")
+async def utm_stats(
+    request: Request,
+    days: Optional[int] = Query(None, ge=1),
+    utm_analytics=Depends(get_utm_analytics),
+    redis_client=Depends(get_redis),
+):
+    return await cached_json_response(
+        request, redis_client, f"api:cache:utm:stats:{days or 'all'}", settings.api_settings.API_CACHE_TTL,
+        lambda: compute_utm_stats(utm_analytics, days), settings.api_logger,
+    )
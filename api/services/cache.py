@@ -0,0 +1,48 @@
+import hashlib
+from typing import Awaitable, Callable
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+from redis.exceptions import RedisError
+
+
+async def cached_json_response(
+    request: Request,
+    redis_client,
+    cache_key: str,
+    ttl: int,
+    compute: Callable[[], Awaitable[BaseModel]],
+    logger,
+) -> Response:
+    """
+    Serve an aggregate from the Redis response cache with ETag revalidation.
+
+    The serialized body is cached in Redis for ``ttl`` seconds; its hash is
+    the ETag, so clients sending a matching If-None-Match get an empty 304.
+
+    :param request: The incoming request.
+    :param redis_client: Redis client holding the cached bodies, or None.
+    :param cache_key: Redis key of the cached body.
+    :param ttl: Lifetime of the cached body, in seconds.
+    :param compute: Coroutine function computing the response model on a miss.
+    :param logger: A logger instance for logging messages.
+    """
+    body = None
+    if redis_client is not None:
+        try:
+            body = await redis_client.get(cache_key)
+        except RedisError as e:
+            logger.error(f"Response cache unavailable: {e}")
+    if body is None:
+        body = (await compute()).model_dump_json()
+        if redis_client is not None:
+            try:
+                await redis_client.set(cache_key, body, ex=ttl)
+            except RedisError as e:
+                logger.error(f"Response cache unavailable: {e}")
+
+    etag = '"' + hashlib.sha1(body.encode()).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": f"max-age={ttl}"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
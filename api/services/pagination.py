@@ -0,0 +1,40 @@
+from typing import Any, Optional, Type
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.models.schemas import Page
+
+
+async def fetch_page(
+    session: AsyncSession,
+    model: Type[Any],
+    schema: Type[Any],
+    after_id: Optional[int],
+    limit: int,
+    *filters,
+) -> Page:
+    """
+    Fetch one page ordered by primary key using keyset pagination.
+
+    Rows are selected with ``id > after_id`` instead of OFFSET, so the cost of
+    a page does not grow with its position in the table.
+
+    :param session: Database session.
+    :param model: ORM model with an integer ``id`` primary key.
+    :param schema: Pydantic schema the rows are converted to.
+    :param after_id: Last ``id`` of the previous page, or None for the first page.
+    :param limit: Maximum number of rows in the page.
+    :param filters: Additional WHERE clauses.
+    :return: The page with the cursor of the next one.
+    """
+    query = select(model).where(*filters).order_by(model.id).limit(limit + 1)
+    if after_id is not None:
+        query = query.where(model.id > after_id)
+    rows = (await session.execute(query)).scalars().all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return Page(
+        items=[schema.model_validate(row) for row in rows],
+        next_cursor=rows[-1].id if has_more else None,
+    )
@@ -0,0 +1,32 @@
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.models.schemas import UserStats, UTMCampaignStats, UTMStats
+from tg_bot.db.models import Users
+
+
+async def compute_user_stats(session: AsyncSession) -> UserStats:
+    """
+    Count users in total, active ones and users per language.
+    """
+    result = await session.execute(
+        select(Users.lang, func.count(), func.count().filter(Users.active)).group_by(Users.lang)
+    )
+    by_lang, total, active = {}, 0, 0
+    for lang, count, active_count in result:
+        by_lang[lang] = count
+        total += count
+        active += active_count
+    return UserStats(total=total, active=active, by_lang=by_lang)
+
+
+async def compute_utm_stats(utm_analytics, days: Optional[int] = None) -> UTMStats:
+    """
+    Read the attribution per tag from the bot's UTM rollups, optionally over the last ``days`` days only.
+
+    The aggregation is that of :meth:`tg_bot.utm_analytics.UTMAnalytics.stats`, so the
+    API and the bot's /utm_stats report the same figures.
+    """
+    return UTMStats(days=days, campaigns=[UTMCampaignStats(**row) for row in await utm_analytics.stats(days)])
@@ -0,0 +1,87 @@
+from redis.exceptions import RedisError
+
+
+class EmailIndex:
+    """Redis set of registered emails answering uniqueness checks before the database.
+
+    A member of the set is taken without a database query. Once :meth:`warm`
+    has loaded every registered email and set the ready marker, a miss is
+    final too; before that, or while Redis is unavailable, misses fall back
+    to the unique index of users.email. The unique constraint stays the
+    final guard: an email registered between the check and the write is
+    rejected by the database.
+    """
+    SET_KEY = "users:emails"
+    READY_KEY = "users:emails:ready"
+
+    def __init__(self, redis_connector, user_service, logger, redis_db: int = 0):
+        """
+        Initialize the EmailIndex instance.
+
+        Args:
+            redis_connector: Connector used to obtain Redis clients.
+            user_service: Service reading the registered emails from the database.
+            logger: A logger instance for logging messages.
+            redis_db (int): Redis database index holding the set.
+        """
+        self.redis_connector = redis_connector
+        self.user_service = user_service
+        self.logger = logger
+        self.redis_db = redis_db
+
+    async def is_taken(self, email: str) -> bool:
+        """
+        Check whether the email is registered, from Redis when possible.
+
+        Args:
+            email (str): The normalized email address.
+        """
+        redis_client = await self.redis_connector.get_client(db=self.redis_db)
+        if redis_client is not None:
+            try:
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    pipe.sismember(self.SET_KEY, email)
+                    pipe.exists(self.READY_KEY)
+                    member, ready = await pipe.execute()
+            except RedisError as e:
+                self.logger.error(f"Redis error while checking an email: {e}")
+            else:
+                if member or ready:
+                    return bool(member)
+        return await self.user_service.email_exists(email)
+
+    async def add(self, email: str) -> None:
+        """
+        Record a freshly registered email.
+        """
+        redis_client = await self.redis_connector.get_client(db=self.redis_db)
+        if redis_client is None:
+            return
+        try:
+            await redis_client.sadd(self.SET_KEY, email)
+        except RedisError as e:
+            self.logger.error(f"Redis error while recording an email: {e}")
+
+    async def warm(self, chunk_size: int = 1000) -> int:
+        """
+        Load every registered email into the set, unless it is already complete.
+
+        Emails are streamed from the database in chunks and added with one
+        SADD per chunk; the ready marker is set once all of them are in.
+
+        Args:
+            chunk_size (int): Number of emails read and added at once.
+
+        Returns:
+            int: Number of emails loaded.
+        """
+        redis_client = await self.redis_connector.get_client(db=self.redis_db)
+        if redis_client is None or await redis_client.exists(self.READY_KEY):
+            return 0
+        loaded = 0
+        async for chunk in self.user_service.stream_emails(chunk_size):
+            await redis_client.sadd(self.SET_KEY, *chunk)
+            loaded += len(chunk)
+        await redis_client.set(self.READY_KEY, 1)
+        self.logger.info(f"Loaded {loaded} registered emails into Redis")
+        return loaded
@@ -0,0 +1,46 @@
+import threading
+from typing import Any, Callable, Dict
+
+
+class LazyInstances:
+    """Module-level instances built on first access (PEP 562).
+
+    A settings module keeps the factories of its instances here and exposes
+    :meth:`get` as its ``__getattr__``, so importing the module does not read
+    the environment, validate settings or open log files.
+    """
+
+    def __init__(self, module_globals: Dict[str, Any], factories: Dict[str, Callable[[], Any]]):
+        """
+        Initialize the lazy instances of a module.
+
+        Args:
+            module_globals (Dict[str, Any]): The ``globals()`` of the module the instances are stored in.
+            factories (Dict[str, Callable[[], Any]]): Factory of each instance, by attribute name.
+        """
+        self.module_globals = module_globals
+        self.factories = factories
+        self._lock = threading.RLock()
+
+    def get(self, name: str) -> Any:
+        """
+        Return the module-level instance with the given name, building it once on first use.
+
+        Args:
+            name (str): Name of the instance, e.g. ``"redis_settings"``.
+
+        Returns:
+            The instance.
+
+        Raises:
+            AttributeError: If no instance with that name is defined.
+        """
+        if name in self.module_globals:
+            return self.module_globals[name]
+        factory = self.factories.get(name)
+        if factory is None:
+            raise AttributeError(f"module {self.module_globals['__name__']!r} has no attribute {name!r}")
+        with self._lock:
+            if name not in self.module_globals:
+                self.module_globals[name] = factory()
+            return self.module_globals[name]
@@ -0,0 +1,108 @@
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
+from redis.exceptions import RedisError
+
+# Atomically refills and checks every bucket in KEYS; tokens are only taken
+# when all buckets can pay the cost. Returns {0, 0} on success, otherwise
+# the number of milliseconds until the most constrained bucket can pay and
+# the (1-based) index of that bucket.
+# ARGV: cost, then a (rate per second, capacity) pair for each key.
+TOKEN_BUCKET_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local cost = tonumber(ARGV[1])
+local tokens = {}
+local wait = 0
+local refused = 0
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2])
+    local capacity = tonumber(ARGV[i * 2 + 1])
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local available = tonumber(bucket[1]) or capacity
+    local updated_at = tonumber(bucket[2]) or now
+    available = math.min(capacity, available + (now - updated_at) * rate / 1000)
+    tokens[i] = available
+    if available < cost then
+        local needed = math.ceil((cost - available) * 1000 / rate)
+        if needed > wait then
+            wait = needed
+            refused = i
+        end
+    end
+end
+if wait > 0 then
+    return {wait, refused}
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2])
+    local capacity = tonumber(ARGV[i * 2 + 1])
+    redis.call('HSET', key, 'tokens', tokens[i] - cost, 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(capacity * 1000 / rate) + 1000)
+end
+return {0, 0}
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class Bucket:
+    """
+    A token bucket stored in Redis.
+
+    Attributes:
+        key (str): Redis key of the bucket.
+        rate (float): Tokens added per second.
+        capacity (int): Maximum number of tokens, i.e. the allowed burst.
+    """
+    key: str
+    rate: float
+    capacity: int
+
+
+class TokenBucketLimiter:
+    """Distributed token-bucket rate limiter evaluated by a Lua script in Redis."""
+
+    def __init__(self, redis_connector, logger, db: int = 0):
+        """
+        Initialize the TokenBucketLimiter instance.
+
+        Args:
+            redis_connector: Connector used to obtain Redis clients.
+            logger: A logger instance for logging messages.
+            db (int): Redis database index holding the buckets.
+        """
+        self.redis_connector = redis_connector
+        self.logger = logger
+        self.db = db
+        self._script = None
+
+    async def acquire(self, buckets: Sequence[Bucket], cost: int = 1) -> Tuple[float, Optional[Bucket]]:
+        """
+        Take ``cost`` tokens from every bucket, or from none of them.
+
+        The limiter fails open: if Redis is unavailable the request is allowed.
+
+        Args:
+            buckets: Buckets the request is charged to.
+            cost (int): Number of tokens the request costs.
+
+        Returns:
+            (0, None) if the request is allowed, otherwise the number of seconds
+            to wait and the bucket that needs the longest to refill.
+        """
+        client = await self.redis_connector.get_client(db=self.db)
+        if client is None:
+            return 0.0, None
+        if self._script is None:
+            self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+        args = [cost]
+        for bucket in buckets:
+            args.extend((bucket.rate, bucket.capacity))
+        try:
+            wait_ms, refused = await self._script(keys=[bucket.key for bucket in buckets], args=args, client=client)
+        except RedisError as e:
+            self.logger.error(f"Rate limiter unavailable, allowing request: {e}")
+            return 0.0, None
+        if not wait_ms:
+            return 0.0, None
+        return int(wait_ms) / 1000, buckets[int(refused) - 1]
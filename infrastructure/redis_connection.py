@@ -1,99 +1,235 @@
-from typing import Optional
+import random
+import time
+from typing import Dict, Optional
 
 import redis.asyncio as redis
 import asyncio
 from tg_bot.config.settings import redis_settings
 
+
+class CircuitBreaker:
+    """Failure tracker of one Redis database with exponential reconnect backoff.
+
+    The circuit is closed while the database answers. Every failed connect or
+    health check opens it for an exponentially growing, jittered delay;
+    while it is open callers get no client and fall back immediately. Once
+    the delay has passed, a single probe decides whether it closes again.
+    """
+    def __init__(self, base_delay: float, max_delay: float):
+        """
+        Args:
+            base_delay (float): Delay after the first failure, in seconds.
+            max_delay (float): Upper bound of the delay, in seconds.
+        """
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failures = 0
+        self.open_until = 0.0
+
+    @property
+    def closed(self) -> bool:
+        return self.failures == 0
+
+    def allows_probe(self) -> bool:
+        """Whether a connection attempt may be made now."""
+        return self.closed or time.monotonic() >= self.open_until
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.open_until = 0.0
+
+    def record_failure(self) -> float:
+        """Open the circuit and return the delay before the next probe."""
+        self.failures += 1
+        delay = min(self.base_delay * 2 ** (self.failures - 1), self.max_delay)
+        delay *= random.uniform(0.5, 1.0)
+        self.open_until = time.monotonic() + delay
+        return delay
+
+
 class RedisConnector:
     """Asynchronous connector for a Redis server.
 
-    This class provides methods to establish and manage a connection
-    to a Redis server.
+    Every database index gets its own connection pool and client, created
+    once and reused across reconnects. Availability is tracked per database
+    by a circuit breaker: while Redis is down, :meth:`get_client` returns
+    None without touching the network, so callers fall back to the database
+    or their local caches instead of queueing behind connect attempts.
     """
-    def __init__(self, logger):
+    def __init__(self, logger, decode_responses: bool = True, client_class=None):
         """
         Initialize the RedisConnector instance.
 
         Args:
             logger: A logger instance for logging messages.
+            decode_responses (bool, optional): Whether replies are decoded to str.
+                Disable it for clients storing binary payloads. Defaults to True.
+            client_class (optional): Redis client class to instantiate, e.g. an
+                instrumented subclass. Defaults to redis.asyncio.Redis.
 
         Attributes:
             host (str): Redis server hostname obtained from RedisSettings.REDIS_HOST.
             port (int): Redis server port obtained from RedisSettings.REDIS_PORT.
             timeout (int): Connection timeout (in seconds) obtained from RedisSettings.REDIS_TIMEOUT.
-            _lock (asyncio.Lock): An asynchronous lock to synchronize connection initialization.
-            client: The Redis client instance (initially None).
+            decode_responses (bool): Whether replies are decoded to str.
+            client_class: Redis client class to instantiate.
+            pools (dict): Connection pool of each database index.
+            clients (dict): Client of each database index, bound to its pool.
+            breakers (dict): Circuit breaker of each database index.
+            _locks (dict): Per-database locks serialising connect attempts.
         """
         self.logger = logger
         self.host = redis_settings.REDIS_HOST
         self.port = redis_settings.REDIS_PORT
         self.timeout = redis_settings.REDIS_TIMEOUT
-        self._lock = asyncio.Lock()
-        self.clients = {}
+        self.decode_responses = decode_responses
+        self.client_class = client_class or redis.Redis
+        self.pools: Dict[int, redis.ConnectionPool] = {}
+        self.clients: Dict[int, redis.Redis] = {}
+        self.breakers: Dict[int, CircuitBreaker] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._health_task: Optional[asyncio.Task] = None
+
+    def _breaker(self, db: int) -> CircuitBreaker:
+        breaker = self.breakers.get(db)
+        if breaker is None:
+            breaker = self.breakers[db] = CircuitBreaker(
+                redis_settings.REDIS_BACKOFF_BASE, redis_settings.REDIS_BACKOFF_MAX
+            )
+        return breaker
+
+    def _lock(self, db: int) -> asyncio.Lock:
+        return self._locks.setdefault(db, asyncio.Lock())
+
+    def _client(self, db: int) -> redis.Redis:
+        """Return the client of the database, creating its connection pool on first use."""
+        client = self.clients.get(db)
+        if client is None:
+            pool = self.pools[db] = redis.ConnectionPool(
+                host=self.host,
+                port=self.port,
+                db=db,
+                decode_responses=self.decode_responses,
+                socket_timeout=self.timeout,
+                socket_connect_timeout=self.timeout,
+                max_connections=redis_settings.REDIS_MAX_CONNECTIONS,
+                health_check_interval=redis_settings.REDIS_HEALTH_CHECK_INTERVAL,
+            )
+            client = self.clients[db] = self.client_class(connection_pool=pool)
+        return client
 
-    async def connect(self, db: int = 0):
+    async def connect(self, db: int = 0) -> bool:
         """
-        Establish a connection to the Redis server using the specified database index
-        and validate the connection with a ping.
+        Validate the connection to the specified database with a ping and update its circuit.
 
-        Upon a successful connection, the client instance is stored and a success
-        message is logged. If the connection fails, the error is logged and the client
-        is set to None.
+        A success closes the circuit; a failure logs the error and opens the
+        circuit until the next backoff delay has passed.
 
         Args:
             db (int, optional): The Redis database index to connect to. Defaults to 0.
+
+        Returns:
+            bool: Whether the ping succeeded.
         """
+        breaker = self._breaker(db)
+        was_closed = breaker.closed and db in self.clients
         try:
-            self.db = db
-            client = redis.Redis(
-                host=self.host,
-                port=self.port,
-                db=db,
-                decode_responses=True,
-                socket_timeout=self.timeout
-            )
-            await client.ping()
-            self.clients[db] = client
-            self.logger.info(f"Connected to Redis (DB={self.db}) successfully!")
+            await self._client(db).ping()
         except Exception as e:
-            self.logger.error(f"Redis connection error (DB={self.db}): {e}")
-            self.clients[db] = None
+            delay = breaker.record_failure()
+            self.logger.error(
+                f"Redis connection error (DB={db}): {e} (failures: {breaker.failures}, next attempt in {delay:.1f}s)"
+            )
+            return False
+        breaker.record_success()
+        if not was_closed:
+            self.logger.info(f"Connected to Redis (DB={db}) successfully!")
+        return True
 
     async def get_client(self, db: int):
         """
-        Retrieve the active Redis client instance, establishing a connection if necessary.
+        Retrieve the Redis client of the database, reconnecting if its circuit allows it.
 
-        This method uses an asynchronous lock to ensure that multiple coroutines do not
-        initialize the connection concurrently. If the client is not already connected,
-        it will establish a connection using the default database index (0).
+        While the circuit is closed the client is returned without any I/O;
+        the first call connects under the database's lock. While the circuit
+        is open None is returned immediately; after the backoff delay one
+        caller probes the server while the others keep getting None.
+
+        Args:
+            db (int): The Redis database index.
 
         Returns:
-            The active Redis client instance.
+            The Redis client instance, or None if the database is unavailable.
         """
-        if db not in self.clients or self.clients[db] is None:
-            async with self._lock:
-                if db not in self.clients or self.clients[db] is None:
-                    await self.connect(db)
-        return self.clients.get(db)
+        breaker = self._breaker(db)
+        if breaker.closed and db in self.clients:
+            return self.clients[db]
+        if not breaker.allows_probe():
+            return None
+        lock = self._lock(db)
+        if lock.locked() and not breaker.closed:
+            return None
+        async with lock:
+            if not (breaker.closed and db in self.clients) and breaker.allows_probe():
+                await self.connect(db)
+        return self.clients[db] if breaker.closed else None
 
-    async def close_conn(self, db: Optional[int] = None):
+    async def check_health(self) -> None:
         """
-        Close the active Redis connection, if it exists, and log the operation.
-        After closing, the Redis client instance is set to None.
+        Ping every known database whose circuit allows it, updating the circuits.
+        """
+        for db in list(self.clients):
+            lock = self._lock(db)
+            if lock.locked() or not self._breaker(db).allows_probe():
+                continue
+            async with lock:
+                await self.connect(db)
+
+    async def _run_health_checks(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.check_health()
+            except Exception as e:
+                self.logger.error(f"Redis health check failed: {e}")
+
+    def start_health_checks(self, interval: Optional[float] = None) -> None:
+        """
+        Start pinging the databases in the background, so outages open the circuits
+        before callers run into socket timeouts.
 
         Args:
-            db (int, optional): The Redis database index to close the connection for. Defaults to None.
+            interval (float, optional): Seconds between checks. Defaults to REDIS_HEALTH_CHECK_INTERVAL.
         """
-        if db is not None:
-            if db in self.clients and self.clients[db]:
-                await self.clients[db].close()
-                self.logger.info(f"Redis connection (DB={db}) closed!")
-                del self.clients[db]
-        else:
-            for db, client in self.clients.items():
-                if client:
-                    await client.close()
-                    self.logger.info(f"Redis connection (DB={db}) closed!")
-            self.clients.clear()
+        if self._health_task is None:
+            self._health_task = asyncio.create_task(
+                self._run_health_checks(interval or redis_settings.REDIS_HEALTH_CHECK_INTERVAL)
+            )
+
+    async def _stop_health_checks(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
 
+    async def close_conn(self, db: Optional[int] = None):
+        """
+        Close the client and connection pool of a database, or of all databases, and log the operation.
 
+        Args:
+            db (int, optional): The Redis database index to close the connection for. Defaults to None.
+        """
+        dbs = [db] if db is not None else list(self.clients)
+        if db is None:
+            await self._stop_health_checks()
+        for index in dbs:
+            client = self.clients.pop(index, None)
+            pool = self.pools.pop(index, None)
+            self.breakers.pop(index, None)
+            if client is not None:
+                await client.aclose()
+                await pool.disconnect()
+                self.logger.info(f"Redis connection (DB={index}) closed!")
@@ -0,0 +1,154 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+update_id_var: ContextVar[Optional[int]] = ContextVar("update_id", default=None)
+tg_id_var: ContextVar[Optional[int]] = ContextVar("tg_id", default=None)
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [update=%(update_id)s user=%(tg_id)s] %(message)s"
+
+_listeners: List[QueueListener] = []
+
+
+@contextmanager
+def log_context(update_id: Optional[int] = None, tg_id: Optional[int] = None) -> Iterator[None]:
+    """
+    Attach the update and user IDs to every record logged inside the block.
+
+    Args:
+        update_id (Optional[int]): ID of the update being processed.
+        tg_id (Optional[int]): Telegram ID of the user who sent it.
+    """
+    update_token = update_id_var.set(update_id)
+    tg_token = tg_id_var.set(tg_id)
+    try:
+        yield
+    finally:
+        tg_id_var.reset(tg_token)
+        update_id_var.reset(update_token)
+
+
+class ContextFilter(logging.Filter):
+    """Copies the logging context variables onto the record while still in the caller's task."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.update_id = update_id_var.get()
+        record.tg_id = tg_id_var.get()
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Keeps every record above DEBUG and only a random share of the DEBUG ones."""
+
+    def __init__(self, rate: float):
+        """
+        Args:
+            rate (float): Share of DEBUG records kept, between 0 and 1.
+        """
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or self.rate >= 1 or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "update_id": getattr(record, "update_id", None),
+            "tg_id": getattr(record, "tg_id", None),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _ContextQueueHandler(QueueHandler):
+    """
+    QueueHandler that keeps the exception text separate from the message.
+
+    The stock handler merges the traceback into ``msg``; keeping it in
+    ``exc_text`` lets the JSON formatter emit it as its own field.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+def create_queue_logger(
+    name: str,
+    log_file: Path,
+    level: str,
+    json_format: bool = False,
+    max_bytes: int = 10 * 1024 * 1024,
+    backup_count: int = 5,
+    debug_sample_rate: float = 1.0,
+) -> logging.Logger:
+    """
+    Configure a logger whose records are written to a rotating file by a background thread.
+
+    The caller only enqueues the record, so logging never blocks the event
+    loop on disk I/O. Context variables and DEBUG sampling are applied before
+    enqueueing, in the task that logs.
+
+    Args:
+        name (str): Logger name.
+        log_file (Path): Path to the log file.
+        level (str): Logging level name.
+        json_format (bool): Write JSON lines instead of plain text.
+        max_bytes (int): Size at which the log file is rotated; 0 disables rotation.
+        backup_count (int): Number of rotated files kept.
+        debug_sample_rate (float): Share of DEBUG records kept.
+
+    Returns:
+        logging.Logger: The configured logger.
+    """
+    logger = logging.getLogger(name)
+    logger.setLevel(level.upper())
+    if logger.handlers:
+        return logger
+
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+    file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+    file_handler.setFormatter(JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT))
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = _ContextQueueHandler(log_queue)
+    queue_handler.addFilter(DebugSamplingFilter(debug_sample_rate))
+    queue_handler.addFilter(ContextFilter())
+    logger.addHandler(queue_handler)
+
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    return logger
+
+
+@atexit.register
+def stop_listeners() -> None:
+    """Flush the queued records and stop the writer threads."""
+    while _listeners:
+        _listeners.pop().stop()
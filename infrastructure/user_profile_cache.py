@@ -0,0 +1,333 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional, Set, Tuple
+
+from redis.exceptions import RedisError
+
+
+@dataclass(frozen=True, slots=True)
+class UserProfile:
+    """Cached view of a bot user.
+
+    Attributes:
+        lang (str): The user's language code.
+        status (str): The user's status ('admin' or 'base_user').
+        has_credentials (bool): Whether the user registered an email and password.
+        active (bool): False once the user blocked the bot, until they send /start again.
+    """
+    lang: str
+    status: str
+    has_credentials: bool = False
+    active: bool = True
+
+
+# Sentinel stored in the local tier for users known to be absent from the database.
+_MISSING = object()
+
+
+class LocalTTLCache:
+    """Bounded in-process LRU cache with a per-entry time-to-live."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        Initialize the local cache.
+
+        Args:
+            maxsize (int): Maximum number of entries kept before the least recently used is evicted.
+            ttl (float): Default lifetime of an entry, in seconds.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: Any) -> Any:
+        """
+        Return the cached value for the key, or None if it is absent or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store the value under the key, evicting the least recently used entry if full.
+        """
+        self._entries[key] = (value, time.monotonic() + (ttl if ttl is not None else self.ttl))
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Any) -> None:
+        """
+        Remove the key from the cache if present.
+        """
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Remove every entry from the cache.
+        """
+        self._entries.clear()
+
+
+class UserProfileCache:
+    """Read-through cache of user profiles shared by the bot middlewares.
+
+    Lookups go through three tiers: an in-process LRU/TTL cache, a Redis hash
+    stored under ``user:{tg_id}`` and finally the database. Users that are not
+    registered are cached negatively so repeated updates from them do not hit
+    the database either.
+
+    Every bot process keeps its own in-process tier, so invalidations are
+    published on ``INVALIDATION_CHANNEL`` and applied by the listener started
+    with :meth:`start` in every other process.
+    """
+    KEY_TEMPLATE = "user:{tg_id}"
+    MISSING_FIELD = "missing"
+    INVALIDATION_CHANNEL = "user:invalidations"
+
+    def __init__(
+        self,
+        redis_connector,
+        user_service,
+        logger,
+        admin_id: Optional[str] = None,
+        redis_db: int = 0,
+        redis_ttl: int = 3600,
+        negative_ttl: int = 60,
+        local_ttl: float = 30,
+        local_maxsize: int = 10_000,
+        invalidation_delay: float = 1.0,
+        listener_retry_delay: float = 1.0,
+    ):
+        """
+        Initialize the UserProfileCache instance.
+
+        Args:
+            redis_connector: Connector used to obtain Redis clients.
+            user_service: Service for reading user data from the database.
+            logger: A logger instance for logging messages.
+            admin_id (str, optional): Telegram ID of the bot administrator.
+            redis_db (int): Redis database index holding the profiles.
+            redis_ttl (int): Lifetime of a profile in Redis, in seconds.
+            negative_ttl (int): Lifetime of a "user not found" entry, in seconds.
+            local_ttl (float): Lifetime of a profile in the in-process tier, in seconds.
+            local_maxsize (int): Maximum number of profiles kept in the in-process tier.
+            invalidation_delay (float): Delay of the second invalidation after a profile change, in seconds.
+            listener_retry_delay (float): Delay before the invalidation listener resubscribes after a Redis error, in seconds.
+        """
+        self.redis_connector = redis_connector
+        self.user_service = user_service
+        self.logger = logger
+        self.admin_id = str(admin_id) if admin_id is not None else None
+        self.redis_db = redis_db
+        self.redis_ttl = redis_ttl
+        self.negative_ttl = negative_ttl
+        self.local = LocalTTLCache(local_maxsize, local_ttl)
+        self.invalidation_delay = invalidation_delay
+        self._delayed_invalidations: Set[asyncio.Task] = set()
+        self.listener_retry_delay = listener_retry_delay
+        # Identifies the invalidations published by this process, which the listener skips.
+        self.instance_id = uuid.uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+
+    def key(self, tg_id: int) -> str:
+        """
+        Build the Redis key holding the profile of the user.
+        """
+        return self.KEY_TEMPLATE.format(tg_id=tg_id)
+
+    def resolve_status(self, tg_id: int) -> str:
+        """
+        Determine the status of the user from the configured administrator ID.
+        """
+        return "admin" if str(tg_id) == self.admin_id else "base_user"
+
+    def lookup_local(self, tg_id: int) -> Tuple[bool, Optional[UserProfile]]:
+        """
+        Look the user up in the in-process tier.
+
+        Returns:
+            A (hit, profile) pair; profile is None on a miss or for a negative entry.
+        """
+        cached = self.local.get(tg_id)
+        if cached is None:
+            return False, None
+        return True, None if cached is _MISSING else cached
+
+    def parse(self, tg_id: int, fields: dict) -> Tuple[bool, Optional[UserProfile]]:
+        """
+        Interpret the fields of the user's Redis hash and promote them to the local tier.
+
+        Returns:
+            A (hit, profile) pair; profile is None on a miss or for a negative entry.
+        """
+        if not fields:
+            return False, None
+        if fields.get(self.MISSING_FIELD):
+            return True, self.remember(tg_id, None)
+        profile = UserProfile(
+            lang=fields["lang"],
+            status=fields.get("status") or self.resolve_status(tg_id),
+            has_credentials=fields.get("has_credentials") == "1",
+            active=fields.get("active", "1") == "1",
+        )
+        return True, self.remember(tg_id, profile)
+
+    async def load_from_db(self, tg_id: int) -> Optional[UserProfile]:
+        """
+        Load the profile from the database and store it in the local tier.
+        """
+        row = await self.user_service.get_profile(tg_id)
+        if row is None:
+            return self.remember(tg_id, None)
+        lang, has_credentials, active = row
+        return self.remember(tg_id, UserProfile(
+            lang=lang, status=self.resolve_status(tg_id), has_credentials=has_credentials, active=active
+        ))
+
+    async def invalidate(self, tg_id: int) -> None:
+        """
+        Drop the user's profile from every cache tier, in every bot process.
+
+        Must be called whenever the user's language, status or credentials change.
+
+        Args:
+            tg_id (int): The Telegram ID of the user.
+        """
+        await self.invalidate_many([tg_id])
+
+    async def invalidate_many(self, tg_ids: Iterable[int]) -> None:
+        """
+        Drop the profiles of several users from every cache tier, with one Redis round trip.
+
+        Args:
+            tg_ids (Iterable[int]): The Telegram IDs of the users.
+        """
+        tg_ids = list(tg_ids)
+        if not tg_ids:
+            return
+        for tg_id in tg_ids:
+            self.local.pop(tg_id)
+        redis_client = await self.redis_connector.get_client(db=self.redis_db)
+        if redis_client is not None:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.delete(*(self.key(tg_id) for tg_id in tg_ids))
+                self.queue_publish(pipe, tg_ids)
+                await pipe.execute()
+
+    def queue_publish(self, pipe, tg_ids: Iterable[int]) -> None:
+        """
+        Queue the publication of an invalidation, telling the other bot processes
+        to drop the users from their in-process tier.
+        """
+        pipe.publish(self.INVALIDATION_CHANNEL, f"{self.instance_id}:{','.join(map(str, tg_ids))}")
+
+    def apply_invalidation(self, message: str) -> None:
+        """
+        Drop the users named by an invalidation published by another process.
+        """
+        sender, _, tg_ids = message.partition(":")
+        if sender == self.instance_id:
+            return
+        for tg_id in tg_ids.split(","):
+            if tg_id:
+                self.local.pop(int(tg_id))
+
+    def invalidate_later(self, tg_id: int) -> None:
+        """
+        Schedule an invalidation of the user's profile after ``invalidation_delay`` seconds.
+
+        Profile lookups read the replica, so an update processed concurrently
+        with a profile change may still load and cache the old profile after
+        the change is committed. Dropping the profile once more after the
+        replica has caught up bounds how long such a stale copy is served.
+
+        Args:
+            tg_id (int): The Telegram ID of the user.
+        """
+        task = asyncio.get_running_loop().create_task(self._invalidate_after(tg_id, self.invalidation_delay))
+        self._delayed_invalidations.add(task)
+        task.add_done_callback(self._delayed_invalidations.discard)
+
+    async def _invalidate_after(self, tg_id: int, delay: float) -> None:
+        await asyncio.sleep(delay)
+        try:
+            await self.invalidate(tg_id)
+        except RedisError as e:
+            self.logger.error(f"Redis error while invalidating the profile of user {tg_id}: {e}")
+
+    def start(self) -> None:
+        """
+        Start listening for the invalidations published by the other bot processes.
+        """
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """
+        Stop the invalidation listener.
+        """
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def _listen(self) -> None:
+        while True:
+            redis_client = await self.redis_connector.get_client(db=self.redis_db)
+            if redis_client is None:
+                await asyncio.sleep(self.listener_retry_delay)
+                continue
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.INVALIDATION_CHANNEL)
+                # Invalidations published while the listener was not subscribed are lost.
+                self.local.clear()
+                async for message in pubsub.listen():
+                    data = message["data"]
+                    self.apply_invalidation(data.decode() if isinstance(data, bytes) else data)
+            except (RedisError, ConnectionError) as e:
+                self.logger.error(f"Redis error in the profile invalidation listener: {e}")
+            finally:
+                await pubsub.aclose()
+            await asyncio.sleep(self.listener_retry_delay)
+
+    def remember(self, tg_id: int, profile: Optional[UserProfile]) -> Optional[UserProfile]:
+        """
+        Store the profile, or its absence, in the in-process tier.
+        """
+        if profile is None:
+            self.local.set(tg_id, _MISSING, min(self.local.ttl, self.negative_ttl))
+        else:
+            self.local.set(tg_id, profile)
+        return profile
+
+    def queue_store(self, pipe, tg_id: int, profile: Optional[UserProfile]) -> None:
+        """
+        Queue the commands writing the profile, or a negative entry, on a Redis pipeline.
+        """
+        redis_key = self.key(tg_id)
+        if profile is None:
+            mapping, ttl = {self.MISSING_FIELD: 1}, self.negative_ttl
+        else:
+            mapping = {
+                "lang": profile.lang, "status": profile.status,
+                "has_credentials": int(profile.has_credentials), "active": int(profile.active),
+            }
+            ttl = self.redis_ttl
+        pipe.delete(redis_key)
+        pipe.hset(redis_key, mapping=mapping)
+        pipe.expire(redis_key, ttl)
@@ -0,0 +1,4 @@
+from tests.load.environment import apply_defaults
+
+# Before any test module is imported, so that the settings are read with these defaults.
+apply_defaults()
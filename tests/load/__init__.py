@@ -0,0 +1,46 @@
+"""
+Load-testing scenarios, one module per subsystem, run with ``python -m tests.load``.
+
+The default ``updates`` scenario replays synthetic Telegram updates through the bot's dispatcher.
+
+The real dispatcher is built by :class:`tg_bot.bot.BotContainer` with all its
+middlewares and routers. Only the edges are replaced: the Bot API session
+answers locally after a configurable delay, Redis is fakeredis, and the
+database is a SQLite file. The report contains the throughput, the p50/p99
+latency of ``feed_update`` and the time spent per stage (handler, Redis,
+database, Telegram), taken from the Prometheus histograms of ``tg_bot.metrics``.
+
+The ``registration`` scenario runs email/password registrations while
+other users send commands, and reports the latency of those unrelated
+updates; ``--inline-hashing`` hashes on the event loop instead of the
+process pool, as a baseline.
+
+The ``keyboards`` scenario times building and encoding a sendMessage with
+the localized menu: keyboards built per call and encoded by aiogram,
+against the prebuilt keyboards of :class:`tg_bot.keyboards.KeyboardRegistry`
+sent as their cached JSON.
+
+The ``fsm`` scenario compares the get/set state and data latency of the
+Redis FSM storage with aiogram's MemoryStorage over thousands of chats.
+The ``translations`` scenario measures the throughput of ``Translator.get``
+against the former nested-dict lookup. The ``inference`` scenario reports
+the p50/p99 latency and throughput of the micro-batched inference service
+for a range of batch sizes. The ``api`` scenario load-tests the FastAPI
+endpoints with httpx over SQLite and fakeredis. The ``notifications``
+scenario reports the dispatch throughput of pending notifications for
+several claim batch sizes. The ``logging`` scenario compares the event loop
+stalls caused by a FileHandler writing on the loop with those of the queue
+logger of ``setup_logger``.
+
+Usage::
+
+    python -m tests.load --updates 5000 --users 1000 --concurrency 100
+    python -m tests.load --scenario registration --registrations 100 [--inline-hashing]
+    python -m tests.load --scenario keyboards --iterations 10000
+    python -m tests.load --scenario fsm --chats 5000 --concurrency 100
+    python -m tests.load --scenario translations --iterations 10000
+    python -m tests.load --scenario inference --requests 2000 --concurrency 32
+    python -m tests.load --scenario api --requests 1000 --users 10000 --concurrency 50
+    python -m tests.load --scenario notifications --notifications 100000 --concurrency 100 [--send-latency 0.01]
+    python -m tests.load --scenario logging --records 100000 --concurrency 100 [--write-latency 0.0005]
+"""
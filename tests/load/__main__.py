@@ -0,0 +1,64 @@
+"""
+Command line of the load scenarios; see :mod:`tests.load`.
+"""
+import argparse
+import asyncio
+
+from tests.load.environment import apply_defaults
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay synthetic updates through the bot's dispatcher.")
+    parser.add_argument("--scenario", default="updates", choices=[
+        "updates", "registration", "keyboards", "fsm", "translations", "inference", "api", "notifications", "logging",
+    ])
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100, help="Updates, or registrations, in flight")
+    parser.add_argument("--send-latency", type=float, default=0.0, help="Simulated Bot API latency, in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--registrations", type=int, default=100)
+    parser.add_argument("--inline-hashing", action="store_true", help="Hash passwords on the event loop")
+    parser.add_argument("--iterations", type=int, default=10000)
+    parser.add_argument("--chats", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--notifications", type=int, default=100_000)
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--write-latency", type=float, default=0.0, help="Simulated time of a log write, in seconds")
+    args = parser.parse_args()
+    apply_defaults()
+    if args.scenario == "logging":
+        from tests.load.logs import run_logging_benchmark
+        report = asyncio.run(run_logging_benchmark(args.records, args.concurrency, args.write_latency))
+    elif args.scenario == "notifications":
+        from tests.load.notifications import run_notification_benchmark
+        report = asyncio.run(run_notification_benchmark(args.notifications, concurrency=args.concurrency,
+                                                        send_latency=args.send_latency))
+    elif args.scenario == "api":
+        from tests.load.api import run_api_load
+        report = asyncio.run(run_api_load(args.requests, args.users, args.concurrency))
+    elif args.scenario == "inference":
+        from tests.load.inference import run_inference_benchmark
+        report = run_inference_benchmark(args.requests, args.concurrency)
+    elif args.scenario == "translations":
+        from tests.load.translations import run_translation_benchmark
+        report = run_translation_benchmark(args.iterations * 10)
+    elif args.scenario == "fsm":
+        from tests.load.fsm import run_fsm_benchmark
+        report = asyncio.run(run_fsm_benchmark(args.chats, args.concurrency))
+    elif args.scenario == "keyboards":
+        from tests.load.keyboards import run_keyboard_benchmark
+        report = asyncio.run(run_keyboard_benchmark(args.iterations))
+    elif args.scenario == "registration":
+        from tests.load.updates import run_registration_load
+        report = asyncio.run(run_registration_load(
+            args.registrations, min(args.concurrency, args.registrations), inline_hashing=args.inline_hashing
+        ))
+    else:
+        from tests.load.updates import run_load
+        report = asyncio.run(run_load(args.updates, args.users, args.concurrency, args.send_latency, args.seed))
+    print(report.format())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+FastAPI endpoints.
+"""
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from tests.load.fakes import LANGUAGES, UTM_TAGS, FakeRedisConnector, create_sqlite_database
+from tests.load.reports import BenchmarkReport
+
+
+async def run_api_load(requests: int = 1000, users: int = 10000, concurrency: int = 50,
+                       db_path: Optional[str] = None) -> BenchmarkReport:
+    """
+    Send ``requests`` requests per endpoint, ``concurrency`` at a time, to the FastAPI app
+    through httpx's ASGI transport, with a SQLite database of ``users`` users and fakeredis.
+
+    Pages start at random keyset cursors, so deep pages are included; the
+    aggregate endpoints are served from the response cache after their first
+    request, and the ``304`` row revalidates the cached body with its ETag.
+    """
+    import httpx
+    from sqlalchemy import insert
+
+    from api.main import app
+    from tg_bot.db.models import Notification, Users
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        database = await create_sqlite_database(db_path or os.path.join(directory, "api.db"))
+        async with database["async_session_maker"]() as session:
+            await session.execute(insert(Users), [
+                {"tg_id": 1_000_000 + index, "tg_name": None, "lang": rng.choice(LANGUAGES),
+                 "active": index % 10 != 0, "utm": rng.choice(UTM_TAGS + [None])}
+                for index in range(users)
+            ])
+            await session.execute(insert(Notification), [
+                {"tg_id": 1_000_000 + index % users, "notification_date": datetime.now(), "notification_type": "reminder"}
+                for index in range(users)
+            ])
+            await session.commit()
+        # The lifespan is replaced by the stand-ins, as httpx's ASGI transport does not run it.
+        app.state.redis_connector = FakeRedisConnector()
+        app.state.session_maker = database["async_session_maker"]
+
+        report = BenchmarkReport(f"API, {requests} requests per endpoint, {concurrency} concurrent, {users} users", unit="ms")
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://api", headers={"X-API-Key": os.environ["API_KEY"]}
+        ) as client:
+            etag = (await client.get("/users/stats")).headers["etag"]
+            endpoints = {
+                "GET /users (keyset page)": lambda: client.get("/users", params={"after_id": rng.randrange(users), "limit": 100}),
+                "GET /notifications (keyset page)": lambda: client.get(
+                    "/notifications", params={"after_id": rng.randrange(users), "limit": 100}
+                ),
+                "GET /users/stats": lambda: client.get("/users/stats"),
+                "GET /users/stats (304)": lambda: client.get("/users/stats", headers={"If-None-Match": etag}),
+                "GET /utm/stats?days=7": lambda: client.get("/utm/stats", params={"days": 7}),
+            }
+            for name, send in endpoints.items():
+                semaphore = asyncio.Semaphore(concurrency)
+                latencies: List[float] = []
+
+                async def request() -> None:
+                    async with semaphore:
+                        started = time.perf_counter()
+                        response = await send()
+                        latencies.append(time.perf_counter() - started)
+                        if response.status_code not in (200, 304):
+                            raise RuntimeError(f"{name} answered {response.status_code}")
+
+                started = time.perf_counter()
+                await asyncio.gather(*(request() for _ in range(requests)))
+                report.add(name, latencies, time.perf_counter() - started)
+
+        await app.state.redis_connector.close_conn()
+        await database["engine"].dispose()
+    return report
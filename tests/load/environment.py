@@ -0,0 +1,29 @@
+"""
+Environment of a self-contained run of the bot's code: tests and load scenarios
+need no .env file, Redis server or Telegram token.
+"""
+import os
+
+DEFAULT_ENV = {
+    "TG_BOT_API_TOKEN": "123456:ABCdefGhIJKlmnoPQRstuVWXyz012345678",
+    "LOG_LEVEL": "WARNING",
+    "ADMIN_ID": "1",
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6379",
+    "REDIS_TIMEOUT": "1",
+    # The scenarios measure the processing path, so throttling and send pacing are effectively disabled.
+    "THROTTLE_USER_RATE": "1000000", "THROTTLE_USER_BURST": "1000000",
+    "THROTTLE_GLOBAL_RATE": "1000000", "THROTTLE_GLOBAL_BURST": "1000000",
+    "THROTTLE_COMMAND_RATES": "{}", "SEND_GLOBAL_RATE": "1000000", "SEND_CHAT_RATE": "1000000",
+    "METRICS_ENABLED": "true", "NOTIFICATIONS_ENABLED": "false",
+    "INFERENCE_MODEL": "tests.load.fakes:StubModel",
+    "API_KEY": "test-api-key",
+}
+
+
+def apply_defaults() -> None:
+    """
+    Set every variable of DEFAULT_ENV that is not set yet; must run before the settings are first read.
+    """
+    for name, value in DEFAULT_ENV.items():
+        os.environ.setdefault(name, value)
@@ -0,0 +1,196 @@
+"""
+Stand-ins for the edges of the bot: the Bot API session, Redis and the database, plus synthetic updates.
+"""
+import asyncio
+import random
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+UTM_TAGS = ["ads_vk", "ads_tg", "blog", "friend"]
+LANGUAGES = ["ru", "en", "de", "es"]
+COMMANDS = ["/menu", "/change_language", "/start"]
+
+
+class FakeSession:
+    """
+    Bot API session answering every method locally.
+
+    ``sendMessage`` returns a message echoing the request; other methods return True.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        from aiogram.client.session.base import BaseSession
+
+        # Subclassed at runtime so that importing the harness does not import aiogram.
+        class _Session(BaseSession):
+            async def make_request(session, bot, method, timeout=None):
+                return await self.make_request(bot, method, timeout)
+
+            async def stream_content(session, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+                yield b""
+
+            async def close(session):
+                pass
+
+        self.latency = latency
+        self.requests = 0
+        self.session = _Session()
+
+    async def make_request(self, bot, method, timeout=None):
+        from aiogram.methods import SendMessage
+        from aiogram.types import Chat, Message
+
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if isinstance(method, SendMessage):
+            return Message(
+                message_id=self.requests,
+                date=datetime.now(),
+                chat=Chat(id=method.chat_id, type="private"),
+                text=method.text,
+            )
+        return True
+
+
+class StubModel:
+    """
+    Deterministic stand-in for the language model: the answer to a prompt is the prompt echoed word by word.
+
+    Like a real model it generates a whole batch in lockstep, one word of
+    every answer per step, and a batch costs a fixed ``pass_overhead`` plus
+    ``item_cost`` per prompt, spread over its steps.
+    """
+
+    def __init__(self, pass_overhead: float = 0.0, item_cost: float = 0.0):
+        self.pass_overhead = pass_overhead
+        self.item_cost = item_cost
+
+    def stream_batch(self, prompts: List[str]) -> Iterator[List[str]]:
+        answers = [f"You asked: {prompt}".split() for prompt in prompts]
+        steps = max(len(words) for words in answers)
+        delay = (self.pass_overhead + self.item_cost * len(prompts)) / steps
+        for step in range(steps):
+            if delay:
+                time.sleep(delay)
+            yield [words[step] + " " if step < len(words) else "" for words in answers]
+
+
+class FakeRedisConnector:
+    """RedisConnector stand-in serving every database index from one fakeredis server."""
+
+    def __init__(self, decode_responses: bool = True):
+        import fakeredis
+        from fakeredis import aioredis
+
+        from tg_bot.metrics import InstrumentedRedis
+
+        class InstrumentedFakeRedis(InstrumentedRedis, aioredis.FakeRedis):
+            pass
+
+        self._server = fakeredis.FakeServer()
+        self._client_class = InstrumentedFakeRedis
+        self.decode_responses = decode_responses
+        self.clients: Dict[int, Any] = {}
+
+    async def get_client(self, db: int):
+        client = self.clients.get(db)
+        if client is None:
+            client = self.clients[db] = self._client_class(
+                server=self._server, db=db, decode_responses=self.decode_responses
+            )
+        return client
+
+    def start_health_checks(self, interval: Optional[float] = None) -> None:
+        pass
+
+    async def close_conn(self, db: Optional[int] = None):
+        for index in [db] if db is not None else list(self.clients):
+            client = self.clients.pop(index, None)
+            if client is not None:
+                await client.aclose()
+
+
+async def create_sqlite_database(path: str) -> Dict[str, Any]:
+    """
+    Create the schema in a SQLite file and return the engines in the layout of ``get_database``.
+    """
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from tg_bot.db.models import UTMInfo
+    from tg_bot.db.pool_metrics import PoolMetrics
+    from tg_bot.db.session import Base
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def use_wal(dbapi_connection, connection_record):
+        # Lets writes proceed while a cursor is streaming, as they do in PostgreSQL.
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_maker() as session:
+        session.add_all([UTMInfo(utm=utm, source=utm.split("_")[0]) for utm in UTM_TAGS])
+        await session.commit()
+    pool_metrics = PoolMetrics(engine, "sqlite")
+    return {
+        "engine": engine,
+        "async_session_maker": session_maker,
+        "pool_metrics": pool_metrics,
+        "read_engine": engine,
+        "read_session_maker": session_maker,
+        "read_pool_metrics": pool_metrics,
+    }
+
+
+def generate_updates(count: int, users: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Generate a stream of raw message updates.
+
+    Each user starts with ``/start``, carrying a UTM tag half of the time (one
+    in ten tags is unknown); the following updates are plain text, which
+    exercises the language lookup, and commands.
+    """
+    rng = random.Random(seed)
+    started = set()
+    updates = []
+    for update_id in range(1, count + 1):
+        tg_id = 1_000_000 + rng.randrange(users)
+        if tg_id not in started:
+            started.add(tg_id)
+            text = "/start"
+            if rng.random() < 0.5:
+                text += " " + (rng.choice(UTM_TAGS) if rng.random() < 0.9 else "unknown_tag")
+        elif rng.random() < 0.6:
+            text = rng.choice(["hello", "how are you?", "what can you do?"])
+        else:
+            text = rng.choice(COMMANDS)
+        updates.append(message_update(update_id, tg_id, text))
+    return updates
+
+
+def message_update(update_id: int, tg_id: int, text: str) -> Dict[str, Any]:
+    """
+    Build a raw update of a private text message from the user.
+    """
+    user = {
+        "id": tg_id,
+        "is_bot": False,
+        "first_name": f"user{tg_id}",
+        "username": f"user{tg_id}",
+        "language_code": LANGUAGES[tg_id % len(LANGUAGES)],
+    }
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": tg_id, "type": "private"},
+            "from": user,
+            "text": text,
+        },
+    }
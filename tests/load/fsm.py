@@ -0,0 +1,55 @@
+"""
+FSM storage latency.
+"""
+import asyncio
+import logging
+import time
+from typing import List
+
+from tests.load.fakes import FakeRedisConnector
+from tests.load.reports import BenchmarkReport
+
+
+async def run_fsm_benchmark(chats: int = 5000, concurrency: int = 100) -> BenchmarkReport:
+    """
+    Time the state and data operations of ``chats`` chats, ``concurrency`` at a time,
+    on aiogram's MemoryStorage and on RedisFSMStorage over fakeredis.
+
+    fakeredis runs the server in process, so the Redis figures include its
+    command processing but no network round trip. ``concurrency`` must stay
+    within the connection pool, as it does in the bot.
+    """
+    from aiogram.fsm.storage.base import StorageKey
+    from aiogram.fsm.storage.memory import MemoryStorage
+
+    from tg_bot.fsm_storage import RedisFSMStorage
+
+    connector = FakeRedisConnector(decode_responses=False)
+    storages = {
+        "memory": MemoryStorage(),
+        "redis": RedisFSMStorage(connector, logging.getLogger("tests.load"), db=1, ttl=3600),
+    }
+    operations = {
+        "set_state": lambda storage, key: storage.set_state(key, "Registration:email"),
+        "get_state": lambda storage, key: storage.get_state(key),
+        "set_data": lambda storage, key: storage.set_data(key, {"email": f"user{key.chat_id}@example.com"}),
+        "get_data": lambda storage, key: storage.get_data(key),
+    }
+    keys = [StorageKey(bot_id=1, chat_id=chat_id, user_id=chat_id) for chat_id in range(1_000_000, 1_000_000 + chats)]
+    report = BenchmarkReport(f"FSM storage, {chats} chats, {concurrency} concurrent")
+    for storage_name, storage in storages.items():
+        for operation_name, operation in operations.items():
+            semaphore = asyncio.Semaphore(concurrency)
+            latencies: List[float] = []
+
+            async def run(key: StorageKey) -> None:
+                async with semaphore:
+                    started = time.perf_counter()
+                    await operation(storage, key)
+                    latencies.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(run(key) for key in keys))
+            report.add(f"{storage_name} {operation_name}", latencies, time.perf_counter() - started)
+        await storage.close()
+    return report
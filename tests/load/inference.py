@@ -0,0 +1,53 @@
+"""
+Micro-batched inference service.
+"""
+import time
+from typing import List, Tuple
+
+from tests.load.reports import BenchmarkReport
+
+
+def run_inference_benchmark(requests: int = 2000, concurrency: int = 32,
+                            batch_sizes: Tuple[int, ...] = (1, 2, 4, 8, 16, 32),
+                            pass_overhead: float = 0.005, item_cost: float = 0.0005,
+                            max_wait_ms: float = 5.0) -> BenchmarkReport:
+    """
+    Answer ``requests`` distinct prompts from ``concurrency`` threads, as the worker's
+    thread pool does, through InferenceService for each maximum batch size.
+
+    The StubModel sleeps ``pass_overhead`` per forward pass plus ``item_cost``
+    per prompt, the cost profile of a model on CPU. A last row repeats the
+    largest batch size with every prompt asked twice, to show the response cache.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from api.neural_network.inference import InferenceService
+    from tests.load.fakes import StubModel
+
+    def run(batch_size: int, prompts: List[str]) -> Tuple[List[float], float]:
+        service = InferenceService(StubModel(pass_overhead, item_cost), batch_size, max_wait_ms, cache_size=requests)
+        latencies: List[float] = []
+
+        def ask(prompt: str) -> None:
+            started = time.perf_counter()
+            service.generate(prompt, timeout=60)
+            latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(ask, prompts))
+        elapsed = time.perf_counter() - started
+        service.close()
+        return latencies, elapsed
+
+    report = BenchmarkReport(
+        f"InferenceService, {requests} prompts from {concurrency} threads "
+        f"({pass_overhead * 1000:g} ms per pass + {item_cost * 1000:g} ms per prompt)",
+        unit="ms",
+    )
+    distinct = [f"question number {index}" for index in range(requests)]
+    for batch_size in batch_sizes:
+        report.add(f"batch {batch_size}", *run(batch_size, distinct))
+    repeated = distinct[:requests // 2] * 2
+    report.add(f"batch {batch_sizes[-1]}, prompts asked twice", *run(batch_sizes[-1], repeated))
+    return report
@@ -0,0 +1,53 @@
+"""
+Building and encoding localized keyboards.
+"""
+import time
+from dataclasses import dataclass
+
+
+@dataclass
+class KeyboardReport:
+    iterations: int
+    per_call: float
+    prebuilt: float
+
+    def format(self) -> str:
+        return "\n".join([
+            f"iterations:  {self.iterations}",
+            f"per call:    {self.per_call / self.iterations * 1e6:8.2f} us per message",
+            f"prebuilt:    {self.prebuilt / self.iterations * 1e6:8.2f} us per message",
+        ])
+
+
+async def run_keyboard_benchmark(iterations: int = 10000) -> KeyboardReport:
+    """
+    Time building and encoding ``iterations`` sendMessage requests with the menu keyboard,
+    cycling through the languages.
+    """
+    from aiogram import Bot
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.methods import SendMessage
+    from tg_bot.keyboards import KeyboardRegistry, PrebuiltMarkupSession, build_menu
+    from tg_bot.locals.extractor_translations import translator
+
+    keyboards = KeyboardRegistry(translator)
+    languages = keyboards.languages
+    default_session, prebuilt_session = AiohttpSession(), PrebuiltMarkupSession(keyboards)
+    bot = Bot(token="42:TEST", session=default_session)
+    try:
+        started = time.perf_counter()
+        for i in range(iterations):
+            lang = languages[i % len(languages)]
+            markup = build_menu(translator, lang, languages)
+            default_session.build_form_data(bot, SendMessage(chat_id=i, text="menu", reply_markup=markup))
+        per_call = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for i in range(iterations):
+            markup = keyboards.get("menu", languages[i % len(languages)])
+            prebuilt_session.build_form_data(bot, SendMessage(chat_id=i, text="menu", reply_markup=markup))
+        prebuilt = time.perf_counter() - started
+    finally:
+        await default_session.close()
+        await prebuilt_session.close()
+    return KeyboardReport(iterations, per_call, prebuilt)
@@ -0,0 +1,99 @@
+"""
+Event loop stalls caused by logging.
+"""
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List
+
+from tests.load.reports import BenchmarkReport, percentile
+
+
+@dataclass
+class LoggingReport:
+    calls: BenchmarkReport
+    lags: Dict[str, List[float]]
+
+    def format(self) -> str:
+        lines = [self.calls.format(), "event loop lag:          p50        p99        max"]
+        for name, lags in self.lags.items():
+            lines.append(
+                f"  {name:<16} {percentile(lags, 0.50) * 1000:8.2f} ms {percentile(lags, 0.99) * 1000:8.2f} ms "
+                f"{max(lags, default=0.0) * 1000:8.2f} ms"
+            )
+        return "\n".join(lines)
+
+
+async def run_logging_benchmark(records: int = 100_000, tasks: int = 100, write_latency: float = 0.0) -> LoggingReport:
+    """
+    Log ``records`` records from ``tasks`` concurrent tasks through a FileHandler writing
+    on the event loop and through the queue logger of ``setup_logger``, and report the
+    duration of the log calls and the lag of the event loop meanwhile.
+
+    ``write_latency`` adds a pause to every write, in seconds, to model a slow or busy
+    disk. The queue logger writes in its listener thread after the calls return, so its
+    rows do not include the writes.
+    """
+    from infrastructure import structured_logging
+
+    lags: Dict[str, List[float]] = {}
+    report = BenchmarkReport(
+        f"Logging, {records} records from {tasks} tasks, {write_latency * 1000:g} ms per write (per log call)"
+    )
+
+    def slow_write(record: logging.LogRecord) -> bool:
+        time.sleep(write_latency)
+        return True
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_handler = logging.FileHandler(os.path.join(directory, "file.log"), encoding="utf-8")
+        file_handler.setFormatter(logging.Formatter(structured_logging.TEXT_FORMAT))
+        file_handler.addFilter(structured_logging.ContextFilter())
+        file_logger = logging.getLogger("tests.load.logging.file")
+        file_logger.propagate = False
+        file_logger.setLevel(logging.INFO)
+        file_logger.addHandler(file_handler)
+        queue_logger = structured_logging.create_queue_logger(
+            "tests.load.logging.queue", Path(directory) / "queue.log", "INFO"
+        )
+        queue_logger.propagate = False
+        if write_latency:
+            file_handler.addFilter(slow_write)
+            for handler in structured_logging._listeners[-1].handlers:
+                handler.addFilter(slow_write)
+
+        for name, logger in (("file handler", file_logger), ("queue handler", queue_logger)):
+            latencies: List[float] = []
+            loop_lags: List[float] = []
+            stop = asyncio.Event()
+
+            async def sample_lag(interval: float = 0.001) -> None:
+                while not stop.is_set():
+                    started = time.perf_counter()
+                    await asyncio.sleep(interval)
+                    loop_lags.append(time.perf_counter() - started - interval)
+
+            async def update(tg_id: int) -> None:
+                with structured_logging.log_context(update_id=tg_id, tg_id=tg_id):
+                    for index in range(records // tasks):
+                        started = time.perf_counter()
+                        logger.info("Processed update %s of user %s", index, tg_id)
+                        latencies.append(time.perf_counter() - started)
+                        await asyncio.sleep(0)
+
+            lag_task = asyncio.create_task(sample_lag())
+            started = time.perf_counter()
+            await asyncio.gather(*(update(tg_id) for tg_id in range(tasks)))
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await lag_task
+            report.add(name, latencies, elapsed)
+            lags[name] = loop_lags
+
+        structured_logging.stop_listeners()
+        file_handler.close()
+    return LoggingReport(report, lags)
@@ -0,0 +1,86 @@
+"""
+Dispatch of scheduled notifications.
+"""
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from tests.load.fakes import LANGUAGES, FakeSession, create_sqlite_database
+from tests.load.reports import BenchmarkReport
+
+
+async def run_notification_benchmark(notifications: int = 100_000, batch_sizes=(100, 500, 2000),
+                                     concurrency: int = 100, send_latency: float = 0.0,
+                                     db_path: Optional[str] = None) -> BenchmarkReport:
+    """
+    Dispatch ``notifications`` due notifications with :class:`NotificationDispatcher` for
+    each batch size, against a SQLite database and a Bot API answering locally after
+    ``send_latency`` seconds with at most ``concurrency`` sends in flight.
+
+    The latencies are those of whole batches (claim, send, mark); the
+    throughput is in notifications per second. The same rows are set back to
+    pending before every run.
+    """
+    from aiogram import Bot
+    from sqlalchemy import func, insert, select, update
+
+    from tg_bot.db.crud import NotificationService
+    from tg_bot.db.models import Notification, Users
+    from tg_bot.notification_dispatcher import NotificationDispatcher
+    from tg_bot.sender import SENT, BulkSender
+
+    logger = logging.getLogger("tests.load")
+    users = min(notifications, 10000)
+    with tempfile.TemporaryDirectory() as directory:
+        database = await create_sqlite_database(db_path or os.path.join(directory, "notifications.db"))
+        session_maker = database["async_session_maker"]
+        due = datetime.now()
+        async with session_maker() as session:
+            await session.execute(insert(Users), [
+                {"tg_id": 1_000_000 + index, "lang": LANGUAGES[index % len(LANGUAGES)], "active": True}
+                for index in range(users)
+            ])
+            for start in range(0, notifications, 10000):
+                await session.execute(insert(Notification), [
+                    {"tg_id": 1_000_000 + index % users, "notification_date": due, "notification_type": "start"}
+                    for index in range(start, min(start + 10000, notifications))
+                ])
+            await session.commit()
+
+        fake = FakeSession(send_latency)
+        bot = Bot(token="42:TEST", session=fake.session)
+        report = BenchmarkReport(
+            f"Notification dispatch, {notifications} notifications, {concurrency} sends in flight, "
+            f"{send_latency * 1000:g} ms per send", unit="ms"
+        )
+        for batch_size in batch_sizes:
+            async with session_maker() as session:
+                await session.execute(update(Notification).values(status="pending", claimed_at=None, sent_at=None))
+                await session.commit()
+            dispatcher = NotificationDispatcher(
+                NotificationService(session_maker), BulkSender(bot, logger, concurrency=concurrency), logger,
+                batch_size=batch_size,
+            )
+            latencies: List[float] = []
+            dispatched = 0
+            started = time.perf_counter()
+            while True:
+                batch_started = time.perf_counter()
+                processed = await dispatcher.run_once()
+                if not processed:
+                    break
+                latencies.append(time.perf_counter() - batch_started)
+                dispatched += processed
+            report.add(f"batch size {batch_size}", latencies, time.perf_counter() - started, dispatched)
+            async with session_maker() as session:
+                sent = await session.scalar(
+                    select(func.count()).select_from(Notification).where(Notification.status == SENT)
+                )
+            if sent != notifications:
+                raise RuntimeError(f"{sent} of {notifications} notifications were sent with batch size {batch_size}")
+        await bot.session.close()
+        await database["engine"].dispose()
+    return report
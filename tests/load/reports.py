@@ -0,0 +1,52 @@
+"""
+Latency percentiles and throughput of the load scenarios.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)] if ordered else 0.0
+
+
+@dataclass
+class BenchmarkReport:
+    """Latency percentiles and throughput of the variants of a micro-benchmark."""
+    title: str
+    rows: Dict[str, Tuple[List[float], float, int]] = field(default_factory=dict)
+    unit: str = "us"
+
+    def add(self, name: str, latencies: List[float], elapsed: float, operations: Optional[int] = None) -> None:
+        """
+        Record a variant; ``operations`` defaults to one per latency sample.
+        """
+        self.rows[name] = (latencies, elapsed, operations if operations is not None else len(latencies))
+
+    def format(self) -> str:
+        scale = {"us": 1e6, "ms": 1e3}[self.unit]
+        width = max((len(name) for name in self.rows), default=0)
+        lines = [self.title, f"  {'':<{width}} {'count':>8} {'p50':>11} {'p99':>11} {'throughput':>14}"]
+        for name, (latencies, elapsed, operations) in self.rows.items():
+            throughput = operations / elapsed if elapsed else 0.0
+            lines.append(
+                f"  {name:<{width}} {operations:8d} {percentile(latencies, 0.50) * scale:8.1f} {self.unit} "
+                f"{percentile(latencies, 0.99) * scale:8.1f} {self.unit} {throughput:10.0f} op/s"
+            )
+        return "\n".join(lines)
+
+
+def _time_calls(call, iterations: int, chunk: int = 1000) -> Tuple[List[float], float, int]:
+    """
+    Run ``call`` in chunks of ``chunk`` calls and return the mean duration of a call in
+    every chunk, the total time and the number of calls; single calls are too short to time.
+    """
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(0, iterations, chunk):
+        chunk_started = time.perf_counter()
+        for _ in range(chunk):
+            call()
+        latencies.append((time.perf_counter() - chunk_started) / chunk)
+    return latencies, time.perf_counter() - started, len(latencies) * chunk
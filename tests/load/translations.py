@@ -0,0 +1,32 @@
+"""
+Translation lookups.
+"""
+from tests.load.reports import BenchmarkReport, _time_calls
+
+
+def run_translation_benchmark(iterations: int = 100_000) -> BenchmarkReport:
+    """
+    Time ``Translator.get`` against the former lookup (two nested dict lookups with
+    the fallback chain and ``str.format`` on every call) for a plain text, a text
+    falling back to the default language and a template.
+    """
+    from tg_bot.locals.extractor_translations import translator
+
+    translations, default_lang = translator.translations, translator.default_lang
+
+    def nested_get(key: str, lang: str, **kwargs) -> str:
+        text = translations.get(key, {}).get(lang, None)
+        if text is None:
+            text = translations.get(key, {}).get(default_lang, key)
+        return text.format(**kwargs)
+
+    cases = {
+        "plain": (("start", "ru"), {}),
+        "fallback": (("start", "de"), {}),
+        "template": (("broadcast_started", "en"), {"broadcast_id": 42}),
+    }
+    report = BenchmarkReport(f"Translator.get, {iterations} calls per row (mean per call of 1000-call chunks)")
+    for case, (args, kwargs) in cases.items():
+        for name, get in (("nested", nested_get), ("compiled", translator.get)):
+            report.add(f"{name} {case}", *_time_calls(lambda: get(*args, **kwargs), iterations))
+    return report
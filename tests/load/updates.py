@@ -0,0 +1,301 @@
+"""
+Updates replayed through the real dispatcher: plain load and email/password registrations.
+"""
+import asyncio
+import gc
+import itertools
+import logging
+import os
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from tests.load.fakes import FakeRedisConnector, FakeSession, create_sqlite_database, generate_updates, message_update
+from tests.load.reports import percentile
+
+
+def _histogram_totals(histogram) -> Dict[str, float]:
+    """
+    Sum the _sum and _count samples of a histogram over all its labels.
+    """
+    totals = {"sum": 0.0, "count": 0.0}
+    for metric in histogram.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_sum"):
+                totals["sum"] += sample.value
+            elif sample.name.endswith("_count"):
+                totals["count"] += sample.value
+    return totals
+
+
+def _stage_histograms():
+    from tg_bot import metrics
+
+    return {
+        "handler": metrics.HANDLER_LATENCY,
+        "redis": metrics.REDIS_LATENCY,
+        "db": metrics.DB_LATENCY,
+        "telegram": metrics.TELEGRAM_LATENCY,
+    }
+
+
+@dataclass
+class LoadReport:
+    updates: int
+    elapsed: float
+    latencies: List[float]
+    stages: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    registered_users: int = 0
+    bot_requests: int = 0
+
+    @property
+    def updates_per_second(self) -> float:
+        return self.updates / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, q: float) -> float:
+        return percentile(self.latencies, q)
+
+    def format(self) -> str:
+        lines = [
+            f"updates:        {self.updates}",
+            f"elapsed:        {self.elapsed:.2f}s",
+            f"throughput:     {self.updates_per_second:.1f} updates/s",
+            f"latency p50:    {self.percentile(0.50) * 1000:.2f} ms",
+            f"latency p99:    {self.percentile(0.99) * 1000:.2f} ms",
+            f"latency mean:   {statistics.fmean(self.latencies) * 1000:.2f} ms" if self.latencies else "",
+            f"users in DB:    {self.registered_users}",
+            f"bot requests:   {self.bot_requests}",
+            "per stage (total time, calls, mean):",
+        ]
+        for stage, totals in self.stages.items():
+            mean = totals["sum"] / totals["count"] * 1000 if totals["count"] else 0.0
+            lines.append(f"  {stage:<9} {totals['sum']:8.3f}s {int(totals['count']):8d} {mean:8.3f} ms")
+        return "\n".join(line for line in lines if line)
+
+
+async def run_load(updates: int = 1000, users: int = 200, concurrency: int = 50,
+                   send_latency: float = 0.0, seed: int = 0, db_path: Optional[str] = None) -> LoadReport:
+    """
+    Replay ``updates`` synthetic updates from ``users`` users through the dispatcher.
+
+    Updates are fed concurrently, at most ``concurrency`` at a time, as the
+    webhook handler does. The dispatcher's routers are module-level, so a
+    process can run the harness only once.
+    """
+    from aiogram.types import Update
+    from sqlalchemy import func, select
+
+    from tg_bot.bot import BotContainer
+    from tg_bot.db.models import Users
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = await create_sqlite_database(db_path or os.path.join(directory, "load.db"))
+        session = FakeSession(send_latency)
+        logger = logging.getLogger("tests.load")
+        container = BotContainer(
+            logger=logger,
+            bot_session=session.session,
+            redis_connector=FakeRedisConnector(),
+            fsm_redis_connector=FakeRedisConnector(decode_responses=False),
+            database=database,
+        )
+        bot, dp = container.bot, container.dp
+        raw_updates = generate_updates(updates, users, seed)
+        parsed = [Update.model_validate(raw, context={"bot": bot}) for raw in raw_updates]
+
+        before = {stage: _histogram_totals(histogram) for stage, histogram in _stage_histograms().items()}
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies: List[float] = []
+
+        async def feed(update: Update) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                await dp.feed_update(bot, update)
+                latencies.append(time.perf_counter() - started)
+
+        container.registration_buffer.start()
+        started = time.perf_counter()
+        await asyncio.gather(*(feed(update) for update in parsed))
+        elapsed = time.perf_counter() - started
+        await container.registration_buffer.stop()
+
+        after = {stage: _histogram_totals(histogram) for stage, histogram in _stage_histograms().items()}
+        stages = {
+            stage: {key: after[stage][key] - before[stage][key] for key in ("sum", "count")}
+            for stage in after
+        }
+        async with database["async_session_maker"]() as db_session:
+            registered = await db_session.scalar(select(func.count()).select_from(Users))
+
+        await container.redis_connector.close_conn()
+        await container.fsm_redis_connector.close_conn()
+        await bot.session.close()
+        await database["engine"].dispose()
+
+    return LoadReport(
+        updates=updates,
+        elapsed=elapsed,
+        latencies=latencies,
+        stages=stages,
+        registered_users=registered,
+        bot_requests=session.requests,
+    )
+
+
+class InlinePasswordHasher:
+    """PasswordHasher stand-in hashing on the event loop, the baseline of the registration scenario."""
+
+    async def hash(self, password: str) -> str:
+        from tg_bot.passwords import hash_password
+        return hash_password(password)
+
+    async def verify(self, password: str, encoded: str) -> bool:
+        from tg_bot.passwords import verify_password
+        return verify_password(password, encoded)
+
+    def close(self) -> None:
+        pass
+
+
+@dataclass
+class RegistrationReport:
+    registrations: int
+    completed: int
+    elapsed: float
+    idle: LoadReport
+    during: LoadReport
+    idle_lag: float
+    during_lag: float
+
+    def format(self) -> str:
+        lines = [f"registrations:  {self.completed}/{self.registrations} in {self.elapsed:.2f}s",
+                 "unrelated updates:           p50        p99        max   max loop lag"]
+        for name, report, lag in (("idle", self.idle, self.idle_lag), ("during registrations", self.during, self.during_lag)):
+            lines.append(
+                f"  {name:<20} {report.percentile(0.50) * 1000:8.2f} ms {report.percentile(0.99) * 1000:8.2f} ms "
+                f"{max(report.latencies, default=0.0) * 1000:8.2f} ms {lag * 1000:8.2f} ms"
+            )
+        return "\n".join(lines)
+
+
+async def run_registration_load(registrations: int = 100, concurrency: int = 10, background_users: int = 200,
+                                background_interval: float = 0.01, inline_hashing: bool = False,
+                                db_path: Optional[str] = None) -> RegistrationReport:
+    """
+    Register ``registrations`` users through the /ask_ai email/password flow, ``concurrency``
+    at a time, while ``background_users`` other users send /menu every ``background_interval`` seconds.
+
+    The latency of the /menu updates and the event-loop lag, compared with an
+    idle period before the registrations, show how much the password hashing
+    stalls the event loop for the rest of the bot.
+    """
+    from aiogram.types import Update
+    from sqlalchemy import func, select
+
+    from tg_bot.bot import BotContainer
+    from tg_bot.db.models import Users
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = await create_sqlite_database(db_path or os.path.join(directory, "registration.db"))
+        session = FakeSession()
+        overrides = {"password_hasher": InlinePasswordHasher()} if inline_hashing else {}
+        container = BotContainer(
+            logger=logging.getLogger("tests.load"),
+            bot_session=session.session,
+            redis_connector=FakeRedisConnector(),
+            fsm_redis_connector=FakeRedisConnector(decode_responses=False),
+            database=database,
+            **overrides,
+        )
+        bot, dp = container.bot, container.dp
+        registrants = [2_000_000 + index for index in range(registrations + 1)]
+        others = [1_000_000 + index for index in range(background_users)]
+        await container.user_service.add_new_users(
+            {"tg_id": tg_id, "tg_name": None, "lang": "en"} for tg_id in registrants + others
+        )
+        warm_up_user = registrants.pop()
+        update_ids = iter(range(1, 10 ** 9))
+
+        async def feed(tg_id: int, text: str) -> float:
+            update = Update.model_validate(message_update(next(update_ids), tg_id, text), context={"bot": bot})
+            started = time.perf_counter()
+            await dp.feed_update(bot, update)
+            return time.perf_counter() - started
+
+        async def register(tg_id: int) -> None:
+            password = f"password-{tg_id}"
+            for text in ("/ask_ai hello", f"user{tg_id}@example.com", password, password):
+                await feed(tg_id, text)
+
+        registration_slots = asyncio.Semaphore(concurrency)
+
+        async def register_bounded(tg_id: int) -> None:
+            async with registration_slots:
+                await register(tg_id)
+
+        latencies: List[float] = []
+        lags: List[float] = []
+
+        async def sample_lag(stop: asyncio.Event, interval: float = 0.005) -> None:
+            while not stop.is_set():
+                started = time.perf_counter()
+                await asyncio.sleep(interval)
+                lags.append(time.perf_counter() - started - interval)
+
+        async def background(stop: asyncio.Event) -> None:
+            pending = set()
+            for tg_id in itertools.cycle(others):
+                if stop.is_set():
+                    break
+                task = asyncio.create_task(feed(tg_id, "/menu"))
+                task.add_done_callback(lambda done: latencies.append(done.result()))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+                await asyncio.sleep(background_interval)
+            await asyncio.gather(*pending)
+
+        # One registration first, so neither the process pool start-up nor aiogram's
+        # lazily built method models are counted.
+        await register(warm_up_user)
+        await feed(warm_up_user, "/menu")
+        # Full collections of the warmed-up heap pause the loop for hundreds of
+        # milliseconds whatever the hashing does; keep them out of the comparison.
+        gc.collect()
+        gc.freeze()
+        stop = asyncio.Event()
+        background_task = asyncio.create_task(background(stop))
+        lag_task = asyncio.create_task(sample_lag(stop))
+        # The idle period covers every background user once, so their profiles are cached.
+        idle_period = background_users * background_interval + 0.5
+        await asyncio.sleep(idle_period)
+        idle, idle_lags = list(latencies), list(lags)
+        started = time.perf_counter()
+        await asyncio.gather(*(register_bounded(tg_id) for tg_id in registrants))
+        elapsed = time.perf_counter() - started
+        during, during_lags = latencies[len(idle):], lags[len(idle_lags):]
+        stop.set()
+        await asyncio.gather(background_task, lag_task)
+
+        async with database["async_session_maker"]() as db_session:
+            completed = await db_session.scalar(
+                select(func.count()).where(Users.password_hash.is_not(None), Users.tg_id != warm_up_user)
+            )
+
+        gc.unfreeze()
+        container.password_hasher.close()
+        await container.redis_connector.close_conn()
+        await container.fsm_redis_connector.close_conn()
+        await bot.session.close()
+        await database["engine"].dispose()
+
+    return RegistrationReport(
+        registrations=registrations,
+        completed=completed,
+        elapsed=elapsed,
+        idle=LoadReport(updates=len(idle), elapsed=idle_period, latencies=idle),
+        during=LoadReport(updates=len(during), elapsed=elapsed, latencies=during),
+        idle_lag=max(idle_lags, default=0.0),
+        during_lag=max(during_lags, default=0.0),
+    )
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import threading
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+
+from api.celery_app import celery_app, tasks
+from api.neural_network import inference
+from api.neural_network.inference import InferenceService
+from tests.load.fakes import FakeRedisConnector, StubModel
+from tg_bot.ai_client import AIClient, AIServiceUnavailable
+from tg_bot.handlers.commands import ask_ai
+from tg_bot.locals.extractor_translations import translator
+
+logger = logging.getLogger("test_ai_pipeline")
+
+
+class FailingModel:
+    def stream_batch(self, prompts):
+        yield ["partial "] * len(prompts)
+        raise RuntimeError("model crashed")
+
+
+class StalledModel:
+    def __init__(self):
+        self.release = threading.Event()
+
+    def stream_batch(self, prompts):
+        self.release.wait()
+        yield [""] * len(prompts)
+
+
+class FakeReply:
+    def __init__(self):
+        self.edits = []
+
+    async def edit_text(self, text):
+        self.edits.append(text)
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """Runs generate_answer eagerly, publishing to the fakeredis server the AIClient reads from."""
+    connector = FakeRedisConnector()
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(tasks, "_redis_client", fakeredis.FakeRedis(server=connector._server, decode_responses=True))
+
+    def use_model(model):
+        service = InferenceService(model, max_wait_ms=1)
+        monkeypatch.setattr(inference, "_service", service)
+        return service
+
+    services = []
+    yield connector, lambda model: services.append(use_model(model))
+    for service in services:
+        service.close()
+
+
+def test_relay_shows_the_streamed_answer(pipeline):
+    connector, use_model = pipeline
+    use_model(StubModel())
+
+    async def scenario():
+        client = AIClient(connector, tasks.ai_settings, logger)
+        task_id, reused = await client.submit(1, "What is a black hole?")
+        assert not reused
+        assert await client.submit(1, "what is a  black hole?") == (task_id, True)
+
+        redis_client = await connector.get_client(0)
+        entries = [fields for _, fields in await redis_client.xrange(tasks.STREAM_KEY.format(task_id=task_id))]
+        assert entries[-1] == {"done": "1"}
+        assert "".join(entry["chunk"] for entry in entries[:-1]) == "You asked: What is a black hole? "
+        assert await redis_client.ttl(tasks.STREAM_KEY.format(task_id=task_id)) > 0
+
+        reply = FakeReply()
+        client.relay(task_id, reply, "en")
+        await client.close()
+        assert reply.edits[-1] == "You asked: What is a black hole?"
+
+    asyncio.run(scenario())
+
+
+def test_relay_reports_a_failed_generation(pipeline):
+    connector, use_model = pipeline
+    use_model(FailingModel())
+
+    async def scenario():
+        client = AIClient(connector, tasks.ai_settings, logger)
+        task_id, _ = await client.submit(1, "question")
+
+        redis_client = await connector.get_client(0)
+        entries = [fields for _, fields in await redis_client.xrange(tasks.STREAM_KEY.format(task_id=task_id))]
+        assert entries == [{"chunk": "partial "}, {"error": "model crashed"}]
+
+        reply = FakeReply()
+        client.relay(task_id, reply, "en")
+        await client.close()
+        assert reply.edits[-1] == translator.get("ai_error", "en")
+
+    asyncio.run(scenario())
+
+
+def test_generation_timeout_is_reported(pipeline, monkeypatch):
+    connector, use_model = pipeline
+    model = StalledModel()
+    use_model(model)
+    monkeypatch.setattr(tasks.ai_settings, "AI_INFERENCE_TIMEOUT", 0.05)
+
+    async def scenario():
+        client = AIClient(connector, tasks.ai_settings, logger)
+        task_id, _ = await client.submit(1, "question")
+        model.release.set()
+
+        redis_client = await connector.get_client(0)
+        entries = [fields for _, fields in await redis_client.xrange(tasks.STREAM_KEY.format(task_id=task_id))]
+        assert entries == [{"error": "timeout"}]
+        with pytest.raises(RuntimeError, match="timeout"):
+            async for _ in client.stream(task_id):
+                pass
+
+    asyncio.run(scenario())
+
+
+def test_submit_without_redis_is_unavailable(pipeline):
+    connector, use_model = pipeline
+    use_model(StubModel())
+
+    async def scenario():
+        client = AIClient(connector, tasks.ai_settings, logger)
+        connector._server.connected = False
+        with pytest.raises(AIServiceUnavailable):
+            await client.submit(1, "question")
+
+    asyncio.run(scenario())
+
+
+def test_ask_ai_tells_the_user_when_the_service_is_unavailable(pipeline):
+    connector, use_model = pipeline
+    use_model(StubModel())
+
+    class FakeMessage:
+        from_user = SimpleNamespace(id=1)
+
+        def __init__(self):
+            self.reply_message = FakeReply()
+
+        async def reply(self, text):
+            self.reply_message.edits.append(text)
+            return self.reply_message
+
+    async def scenario():
+        client = AIClient(connector, tasks.ai_settings, logger)
+        connector._server.connected = False
+        message = FakeMessage()
+        await ask_ai(
+            message, SimpleNamespace(args="question"), state=None, ai_client=client, user_lang="en",
+            user_context=SimpleNamespace(profile=SimpleNamespace(has_credentials=True)),
+        )
+        assert message.reply_message.edits == [translator.get("ai_thinking", "en"), translator.get("ai_unavailable", "en")]
+
+    asyncio.run(scenario())
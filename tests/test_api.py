@@ -0,0 +1,31 @@
+import asyncio
+import os
+
+import httpx
+
+from api.main import app
+from tests.load.fakes import FakeRedisConnector, create_sqlite_database
+from tg_bot.db.models import Users
+
+
+def test_endpoints_require_api_key(tmp_path):
+    async def scenario():
+        database = await create_sqlite_database(tmp_path / "api.db")
+        async with database["async_session_maker"]() as session:
+            session.add(Users(tg_id=1, lang="ru"))
+            await session.commit()
+        # httpx's ASGI transport does not run the lifespan, so its state is set directly.
+        app.state.redis_connector = FakeRedisConnector()
+        app.state.session_maker = database["async_session_maker"]
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as client:
+            assert (await client.get("/users")).status_code == 401
+            assert (await client.get("/users/stats", headers={"X-API-Key": "wrong"})).status_code == 401
+            response = await client.get("/users", headers={"X-API-Key": os.environ["API_KEY"]})
+            assert response.status_code == 200
+            assert [user["tg_id"] for user in response.json()["items"]] == [1]
+
+        await app.state.redis_connector.close_conn()
+        await database["engine"].dispose()
+
+    asyncio.run(scenario())
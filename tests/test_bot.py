@@ -0,0 +1,14 @@
+import asyncio
+
+from tests.load.updates import run_load
+
+
+def test_dispatcher_handles_synthetic_load():
+    report = asyncio.run(run_load(updates=300, users=50, concurrency=20))
+
+    assert len(report.latencies) == 300
+    assert report.registered_users == 50
+    assert report.bot_requests > 0
+    assert report.stages["handler"]["count"] == report.bot_requests
+    assert report.stages["redis"]["count"] > 0
+    assert report.updates_per_second > 0
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+
+from tests.load.fakes import FakeRedisConnector, create_sqlite_database
+from tg_bot.broadcast import Broadcaster
+from tg_bot.db.crud import UsersService
+from tg_bot.sender import BLOCKED, SENT
+
+logger = logging.getLogger("test_broadcast")
+
+
+class FakeSender:
+    """Delivers every message except to the blocked users; ``on_chunk`` runs before each chunk is answered."""
+
+    def __init__(self, blocked=(), on_chunk=None):
+        self.blocked = set(blocked)
+        self.on_chunk = on_chunk
+        self.sent = []
+
+    async def send_many(self, messages):
+        messages = list(messages)
+        if self.on_chunk is not None:
+            await self.on_chunk(messages)
+        self.sent.extend(tg_id for tg_id, _ in messages)
+        return [BLOCKED if tg_id in self.blocked else SENT for tg_id, _ in messages]
+
+
+class RecordingProfileCache:
+    def __init__(self):
+        self.invalidated = []
+
+    async def invalidate_many(self, tg_ids):
+        self.invalidated.extend(tg_ids)
+
+
+async def setup(tmp_path, users: int = 7):
+    database = await create_sqlite_database(tmp_path / "broadcast.db")
+    service = UsersService(database["async_session_maker"])
+    await service.add_new_users([{"tg_id": tg_id, "lang": "ru"} for tg_id in range(1, users + 1)])
+    return database, service
+
+
+def make_broadcaster(database, service, sender, connector, **kwargs) -> Broadcaster:
+    return Broadcaster(database["async_session_maker"], service, sender, connector, logger, chunk_size=3, **kwargs)
+
+
+def test_broadcast_reaches_every_active_user_and_deactivates_blocked(tmp_path):
+    async def scenario():
+        database, service = await setup(tmp_path)
+        await service.deactivate_users([7])
+        cache = RecordingProfileCache()
+        sender = FakeSender(blocked={2, 5})
+        broadcaster = make_broadcaster(database, service, sender, FakeRedisConnector(), user_profile_cache=cache)
+
+        broadcast_id = await broadcaster.start("hello")
+        assert await broadcaster.start("again") is None
+        await broadcaster._task
+
+        assert sender.sent == [1, 2, 3, 4, 5, 6]
+        status = await broadcaster.status()
+        assert status["id"] == broadcast_id and status["status"] == "finished"
+        assert (status[SENT], status[BLOCKED]) == (4, 2)
+        assert (await service.get_profile(2))[2] is False
+        assert sorted(cache.invalidated) == [2, 5]
+        # The slot is free again once the broadcast finished.
+        assert await broadcaster.start("next") is not None
+        await broadcaster._task
+        await database["engine"].dispose()
+
+    asyncio.run(scenario())
+
+
+def test_stopped_broadcast_resumes_after_the_checkpoint(tmp_path):
+    async def scenario():
+        database, service = await setup(tmp_path)
+        connector = FakeRedisConnector()
+        first_chunk_done = asyncio.Event()
+        release = asyncio.Event()
+
+        async def pause_after_first_chunk(messages):
+            if messages[0][0] > 1:
+                first_chunk_done.set()
+                await release.wait()
+
+        first = make_broadcaster(database, service, FakeSender(on_chunk=pause_after_first_chunk), connector)
+        broadcast_id = await first.start("hello")
+        await first_chunk_done.wait()
+        await first.stop()
+        assert (await first.status())["status"] == "running"
+
+        sender = FakeSender()
+        second = make_broadcaster(database, service, sender, connector)
+        await second.resume()
+        await second._task
+
+        assert sender.sent == [4, 5, 6, 7]
+        status = await second.status()
+        assert status["id"] == broadcast_id
+        assert (status["status"], status[SENT]) == ("finished", 7)
+        await database["engine"].dispose()
+
+    asyncio.run(scenario())
+
+
+def test_resume_skips_a_broadcast_leased_by_another_replica(tmp_path):
+    async def scenario():
+        database, service = await setup(tmp_path)
+        connector = FakeRedisConnector()
+        running = asyncio.Event()
+        release = asyncio.Event()
+
+        async def hold(messages):
+            running.set()
+            await release.wait()
+
+        first = make_broadcaster(database, service, FakeSender(on_chunk=hold), connector)
+        await first.start("hello")
+        await running.wait()
+
+        sender = FakeSender()
+        second = make_broadcaster(database, service, sender, connector)
+        await second.resume()
+        assert second._task is None
+
+        release.set()
+        await first._task
+        assert sender.sent == []
+        assert (await first.status())["status"] == "finished"
+        await database["engine"].dispose()
+
+    asyncio.run(scenario())
+
+
+def test_broadcast_stops_when_its_lease_is_taken_over(tmp_path):
+    async def scenario():
+        database, service = await setup(tmp_path)
+        connector = FakeRedisConnector()
+        client = await connector.get_client(0)
+        broadcaster = None
+
+        async def steal_lease(messages):
+            lease_key = Broadcaster.LEASE_KEY.format(broadcast_id=await client.get(Broadcaster.CURRENT_KEY))
+            await client.set(lease_key, "other replica")
+
+        sender = FakeSender(on_chunk=steal_lease)
+        broadcaster = make_broadcaster(database, service, sender, connector)
+        broadcast_id = await broadcaster.start("hello")
+        await broadcaster._task
+
+        # Neither the progress nor the end of the broadcast was written by the replica that lost the lease.
+        assert sender.sent == [1, 2, 3]
+        state = await client.hgetall(Broadcaster.STATE_KEY.format(broadcast_id=broadcast_id))
+        assert (state["status"], state["last_tg_id"], state[SENT]) == ("running", "0", "0")
+        assert await client.get(Broadcaster.CURRENT_KEY) == broadcast_id
+        await database["engine"].dispose()
+
+    asyncio.run(scenario())
+
+
+def test_failed_broadcast_is_marked_failed(tmp_path):
+    async def scenario():
+        database, service = await setup(tmp_path)
+
+        async def fail(messages):
+            raise RuntimeError("Bot API is down")
+
+        broadcaster = make_broadcaster(database, service, FakeSender(on_chunk=fail), FakeRedisConnector())
+        await broadcaster.start("hello")
+        await broadcaster._task
+
+        assert (await broadcaster.status())["status"] == "failed"
+        await database["engine"].dispose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+
+from tests.load.fakes import FakeRedisConnector
+from tg_bot.fsm_storage import RedisFSMStorage
+
+logger = logging.getLogger("test_fsm_storage")
+KEY = StorageKey(bot_id=42, chat_id=7, user_id=7)
+
+
+class Form(StatesGroup):
+    email = State()
+
+
+def make_storage(connector=None, ttl=None) -> RedisFSMStorage:
+    return RedisFSMStorage(connector or FakeRedisConnector(decode_responses=False), logger, db=3, ttl=ttl)
+
+
+def test_state_and_data_round_trip():
+    async def scenario():
+        storage = make_storage()
+        assert await storage.get_state(KEY) is None
+        assert await storage.get_data(KEY) == {}
+
+        await storage.set_state(KEY, Form.email)
+        await storage.set_data(KEY, {"email": "user@example.com", "attempts": 2})
+        assert await storage.get_state(KEY) == Form.email.state
+        assert await storage.get_data(KEY) == {"email": "user@example.com", "attempts": 2}
+
+        other = StorageKey(bot_id=42, chat_id=8, user_id=8)
+        assert await storage.get_state(other) is None
+
+        await storage.set_state(KEY, None)
+        await storage.set_data(KEY, {})
+        assert await storage.get_state(KEY) is None
+        assert await storage.get_data(KEY) == {}
+
+    asyncio.run(scenario())
+
+
+def test_writes_refresh_the_ttl():
+    async def scenario():
+        connector = FakeRedisConnector(decode_responses=False)
+        storage = make_storage(connector, ttl=600)
+        await storage.set_state(KEY, Form.email)
+
+        client = await connector.get_client(3)
+        assert 0 < await client.ttl(storage.build_key(KEY)) <= 600
+
+    asyncio.run(scenario())
+
+
+def test_storage_fails_open_without_redis():
+    class DownConnector:
+        async def get_client(self, db):
+            return None
+
+    async def scenario():
+        storage = make_storage(DownConnector())
+        await storage.set_state(KEY, Form.email)
+        await storage.set_data(KEY, {"email": "user@example.com"})
+        assert await storage.get_state(KEY) is None
+        assert await storage.get_data(KEY) == {}
+
+    asyncio.run(scenario())
+
+
+def test_storage_fails_open_on_redis_error():
+    async def scenario():
+        connector = FakeRedisConnector(decode_responses=False)
+        storage = make_storage(connector)
+        await storage.set_state(KEY, Form.email)
+
+        connector._server.connected = False
+        await storage.set_data(KEY, {"email": "user@example.com"})
+        assert await storage.get_state(KEY) is None
+        assert await storage.get_data(KEY) == {}
+
+        connector._server.connected = True
+        assert await storage.get_state(KEY) == Form.email.state
+
+    asyncio.run(scenario())
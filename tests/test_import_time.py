@@ -0,0 +1,56 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+from tests.load.environment import DEFAULT_ENV
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Packages that must only be imported once the bot starts, by the components using them.
+DEFERRED_PACKAGES = {
+    "aiogram", "aiohttp", "sqlalchemy", "redis", "celery", "prometheus_client", "fastapi", "msgpack", "uvloop",
+}
+# tg_bot.main takes ~150 ms on a laptop, nearly all of it pydantic; the margin absorbs slow CI machines.
+CUMULATIVE_BUDGET_US = 1_500_000
+
+
+def import_times(module: str) -> Dict[str, int]:
+    """
+    Import the module in a fresh interpreter and return the cumulative import time of every module, in µs.
+    """
+    env = {**os.environ, **DEFAULT_ENV}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_main_defers_heavy_imports():
+    times = import_times("tg_bot.main")
+
+    imported = {name.split(".", 1)[0] for name in times}
+    assert not imported & DEFERRED_PACKAGES
+    assert times["tg_bot.main"] < CUMULATIVE_BUDGET_US
+
+
+def test_disabled_metrics_do_not_import_prometheus():
+    # Building the engines does not connect, so any database config will do.
+    db_configs = {"tg_db": {"host": "localhost", "port": 5432, "user": "bot", "password": "bot", "db_name": "bot"}}
+    env = {**os.environ, **DEFAULT_ENV, "METRICS_ENABLED": "false", "DB_CONFIGS": json.dumps(db_configs)}
+    code = (
+        "import sys; from tg_bot.bot import container; container.dp, container.media_registry; "
+        "print('prometheus_client' in sys.modules)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "False"
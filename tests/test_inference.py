@@ -0,0 +1,119 @@
+import threading
+import time
+from concurrent.futures import TimeoutError, ThreadPoolExecutor
+
+import pytest
+
+from api.neural_network import inference
+from api.neural_network.inference import InferenceService, MicroBatcher
+from tests.load.fakes import StubModel
+
+
+class SteppedModel:
+    """Generates one word per step, each step waiting for the test to release it."""
+
+    def __init__(self):
+        self.batches = []
+        self.steps = threading.Semaphore(0)
+
+    def stream_batch(self, prompts):
+        self.batches.append(list(prompts))
+        answers = [prompt.split() for prompt in prompts]
+        for step in range(max(len(words) for words in answers)):
+            self.steps.acquire()
+            yield [words[step] + " " if step < len(words) else "" for words in answers]
+
+
+class ShortModel:
+    """Returns one chunk too few at every step."""
+
+    def stream_batch(self, prompts):
+        yield ["chunk"] * (len(prompts) - 1)
+
+
+def test_concurrent_prompts_share_a_batch():
+    model = SteppedModel()
+    service = InferenceService(model, max_batch_size=8, max_wait_ms=50)
+    try:
+        futures = [service.submit(f"question {index}") for index in range(3)]
+        for _ in range(2):
+            model.steps.release()
+        assert [future.result(5) for future in futures] == [f"question {index} " for index in range(3)]
+        assert model.batches == [["question 0", "question 1", "question 2"]]
+    finally:
+        service.close()
+
+
+def test_chunks_are_streamed_as_they_are_generated():
+    model = SteppedModel()
+    service = InferenceService(model, max_wait_ms=1)
+    try:
+        first = service.stream("one two three", timeout=5)
+        model.steps.release()
+        assert next(first) == "one "
+        # A second reader of the prompt in flight joins it and gets the chunks it missed.
+        second = service.stream("one  two three", timeout=5)
+        assert next(second) == "one "
+        model.steps.release()
+        model.steps.release()
+        assert list(first) == ["two ", "three "]
+        assert list(second) == ["two ", "three "]
+        assert model.batches == [["one two three"]]
+    finally:
+        service.close()
+
+
+def test_stream_times_out():
+    model = SteppedModel()
+    service = InferenceService(model, max_wait_ms=1)
+    try:
+        started = time.monotonic()
+        with pytest.raises(TimeoutError):
+            list(service.stream("never answered", timeout=0.05))
+        assert time.monotonic() - started < 1
+    finally:
+        model.steps.release(10)
+        service.close()
+
+
+def test_cache_is_keyed_on_what_the_model_answered():
+    service = InferenceService(StubModel(), max_wait_ms=1)
+    try:
+        assert service.generate("  What is   Cosmos? ", timeout=5) == "You asked: What is Cosmos? "
+        # Only whitespace is normalised: the cached answer is the one to the normalised prompt.
+        assert list(service.stream("What is Cosmos?", timeout=5)) == ["You asked: What is Cosmos? "]
+        assert service.generate("what is cosmos?", timeout=5) == "You asked: what is cosmos? "
+    finally:
+        service.close()
+
+
+def test_short_batch_results_fail_every_future():
+    batcher = MicroBatcher(lambda items: items[:-1], max_batch_size=4, max_wait_ms=50)
+    try:
+        futures = [batcher.submit(index) for index in range(3)]
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result(5)
+    finally:
+        batcher.close()
+
+
+def test_short_model_steps_fail_every_prompt():
+    service = InferenceService(ShortModel(), max_batch_size=4, max_wait_ms=50)
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = [executor.submit(lambda prompt: list(service.stream(prompt, timeout=5)), prompt)
+                       for prompt in ("first", "second")]
+            for result in results:
+                with pytest.raises(RuntimeError):
+                    result.result()
+    finally:
+        service.close()
+
+
+def test_no_model_is_configured_by_default(monkeypatch):
+    monkeypatch.setattr(inference.ai_settings, "INFERENCE_MODEL", None)
+    monkeypatch.setattr(inference, "_service", None)
+
+    with pytest.raises(RuntimeError, match="INFERENCE_MODEL"):
+        inference.get_inference_service()
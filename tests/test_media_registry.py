@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import os
+from types import SimpleNamespace
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import SendPhoto
+from aiogram.types import FSInputFile
+
+from tests.load.fakes import FakeRedisConnector, create_sqlite_database
+from tg_bot.db.crud import MediaFileService
+from tg_bot.media_registry import MediaRegistry
+
+logger = logging.getLogger("test_media_registry")
+
+
+class FakeBot:
+    """Answers send_photo and send_document, issuing a new file_id for every upload."""
+
+    def __init__(self, upload_latency: float = 0.0):
+        self.upload_latency = upload_latency
+        self.uploads = []
+        self.sent_ids = []
+        self.rejected = set()
+
+    async def _send(self, kind, chat_id, media, **kwargs):
+        if isinstance(media, FSInputFile):
+            await asyncio.sleep(self.upload_latency)
+            self.uploads.append(media.path)
+            file_id = f"{kind}-{len(self.uploads)}"
+        elif media in self.rejected:
+            raise TelegramBadRequest(SendPhoto(chat_id=chat_id, photo=media), "Bad Request: wrong file identifier")
+        else:
+            self.sent_ids.append(media)
+            file_id = media
+        sent = SimpleNamespace(file_id=file_id)
+        return SimpleNamespace(chat=SimpleNamespace(id=chat_id), message_id=1, **{kind: [sent] if kind == "photo" else sent})
+
+    async def send_photo(self, chat_id, photo, **kwargs):
+        return await self._send("photo", chat_id, photo, **kwargs)
+
+    async def send_document(self, chat_id, document, **kwargs):
+        return await self._send("document", chat_id, document, **kwargs)
+
+
+async def setup(tmp_path, bot=None):
+    database = await create_sqlite_database(tmp_path / "media.db")
+    media_dir = tmp_path / "media"
+    media_dir.mkdir()
+    (media_dir / "welcome.png").write_bytes(b"png bytes")
+    (media_dir / "terms.pdf").write_bytes(b"pdf bytes")
+    connector = FakeRedisConnector()
+
+    def make_registry():
+        return MediaRegistry(bot or FakeBot(), MediaFileService(database["async_session_maker"]), connector,
+                             logger, media_dir)
+    return database, media_dir, make_registry
+
+
+def test_file_is_uploaded_once_and_then_sent_by_file_id(tmp_path):
+    async def scenario():
+        bot = FakeBot()
+        database, media_dir, make_registry = await setup(tmp_path, bot)
+        registry = make_registry()
+
+        await registry.send(1, "welcome.png")
+        await registry.send(2, "welcome.png")
+        await registry.send(3, media_dir / "terms.pdf")
+        assert bot.uploads == [media_dir / "welcome.png", media_dir / "terms.pdf"]
+        assert bot.sent_ids == ["photo-1"]
+
+        # Another process finds the file_id in Redis.
+        await make_registry().send(4, "welcome.png")
+        assert len(bot.uploads) == 2 and bot.sent_ids == ["photo-1", "photo-1"]
+        await database["engine"].dispose()
+
+    asyncio.run(scenario())
+
+
+def test_file_id_survives_a_redis_flush(tmp_path):
+    async def scenario():
+        bot = FakeBot()
+        database, _, make_registry = await setup(tmp_path, bot)
+        registry = make_registry()
+        await registry.send(1, "welcome.png")
+
+        await (await registry.redis_connector.get_client(0)).flushdb()
+        await make_registry().send(2, "welcome.png")
+        assert len(bot.uploads) == 1 and bot.sent_ids == ["photo-1"]
+        await database["engine"].dispose()
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_first_sends_upload_once(tmp_path):
+    async def scenario():
+        bot = FakeBot(upload_latency=0.05)
+        database, _, make_registry = await setup(tmp_path, bot)
+        registry = make_registry()
+
+        await asyncio.gather(*(registry.send(chat_id, "welcome.png") for chat_id in range(10)))
+        assert len(bot.uploads) == 1
+        assert bot.sent_ids == ["photo-1"] * 9
+        # The upload lock is not kept once every send of the content is done.
+        assert len(registry._upload_locks) == 0
+        await database["engine"].dispose()
+
+    asyncio.run(scenario())
+
+
+def test_changed_file_is_uploaded_again(tmp_path):
+    async def scenario():
+        bot = FakeBot()
+        database, media_dir, make_registry = await setup(tmp_path, bot)
+        registry = make_registry()
+        await registry.send(1, "welcome.png")
+
+        path = media_dir / "welcome.png"
+        path.write_bytes(b"new png bytes")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        await registry.send(2, "welcome.png")
+        await registry.send(3, "welcome.png")
+        assert len(bot.uploads) == 2 and bot.sent_ids == ["photo-2"]
+        await database["engine"].dispose()
+
+    asyncio.run(scenario())
+
+
+def test_rejected_file_id_is_replaced(tmp_path):
+    async def scenario():
+        bot = FakeBot()
+        database, _, make_registry = await setup(tmp_path, bot)
+        registry = make_registry()
+        await registry.send(1, "welcome.png")
+
+        bot.rejected.add("photo-1")
+        await registry.send(2, "welcome.png")
+        await make_registry().send(3, "welcome.png")
+        assert len(bot.uploads) == 2 and bot.sent_ids == ["photo-2"]
+        await database["engine"].dispose()
+
+    asyncio.run(scenario())
+
+
+def test_warm_up_uploads_only_unknown_files(tmp_path):
+    class DeletingBot(FakeBot):
+        async def delete_message(self, chat_id, message_id):
+            return True
+
+    async def scenario():
+        bot = DeletingBot()
+        database, _, make_registry = await setup(tmp_path, bot)
+        registry = make_registry()
+        await registry.send(1, "welcome.png")
+
+        assert await registry.warm_up(chat_id=1) == (1, 1)
+        assert await make_registry().warm_up(chat_id=1) == (0, 2)
+        await database["engine"].dispose()
+
+    asyncio.run(scenario())
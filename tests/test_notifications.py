@@ -0,0 +1,117 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select, update
+
+from tests.load.fakes import create_sqlite_database
+from tg_bot.db.crud import NotificationService, UsersService
+from tg_bot.db.models import Notification
+from tg_bot.locals.extractor_translations import translator
+from tg_bot.notification_dispatcher import NotificationDispatcher
+from tg_bot.sender import BLOCKED, SENT
+
+logger = logging.getLogger("test_notifications")
+
+
+class FakeSender:
+    def __init__(self, blocked=()):
+        self.blocked = set(blocked)
+        self.messages = []
+
+    async def send_many(self, messages):
+        messages = list(messages)
+        self.messages.extend(messages)
+        return [BLOCKED if tg_id in self.blocked else SENT for tg_id, _ in messages]
+
+
+async def setup(tmp_path):
+    database = await create_sqlite_database(tmp_path / "notifications.db")
+    session_maker = database["async_session_maker"]
+    await UsersService(session_maker).add_new_users([
+        {"tg_id": 1, "lang": "ru"}, {"tg_id": 2, "lang": "en"}, {"tg_id": 3, "lang": "de"},
+    ])
+    now = datetime.now()
+    async with session_maker() as session:
+        await session.execute(insert(Notification), [
+            {"tg_id": 1, "notification_date": now - timedelta(minutes=2), "notification_type": "start"},
+            {"tg_id": 2, "notification_date": now - timedelta(minutes=1), "notification_type": "start"},
+            {"tg_id": 3, "notification_date": now + timedelta(hours=1), "notification_type": "start"},
+        ])
+        await session.commit()
+    return database
+
+
+async def statuses(session_maker):
+    async with session_maker() as session:
+        result = await session.execute(select(Notification.tg_id, Notification.status, Notification.sent_at))
+        return {tg_id: (status, sent_at is not None) for tg_id, status, sent_at in result}
+
+
+def test_due_notifications_are_sent_in_the_users_language(tmp_path):
+    async def scenario():
+        database = await setup(tmp_path)
+        sender = FakeSender(blocked={2})
+        dispatcher = NotificationDispatcher(NotificationService(database["async_session_maker"]), sender, logger)
+
+        assert await dispatcher.run_once() == 2
+        assert sender.messages == [(1, translator.get("start", "ru")), (2, translator.get("start", "en"))]
+        assert await statuses(database["async_session_maker"]) == {
+            1: (SENT, True), 2: (BLOCKED, False), 3: ("pending", False),
+        }
+        # Nothing else is due.
+        assert await dispatcher.run_once() == 0
+        await database["engine"].dispose()
+
+    asyncio.run(scenario())
+
+
+def test_notifications_claimed_by_a_crashed_worker_are_claimed_again(tmp_path):
+    async def scenario():
+        database = await setup(tmp_path)
+        session_maker = database["async_session_maker"]
+        service = NotificationService(session_maker)
+
+        claimed = await service.claim_due(batch_size=10, lease=300)
+        assert sorted(tg_id for _, tg_id, _, _ in claimed) == [1, 2]
+        # Claimed rows are not handed out again while their lease runs.
+        assert await service.claim_due(batch_size=10, lease=300) == []
+
+        async with session_maker() as session:
+            await session.execute(
+                update(Notification).where(Notification.tg_id == 1)
+                .values(claimed_at=datetime.now() - timedelta(minutes=10))
+            )
+            await session.commit()
+        assert [tg_id for _, tg_id, _, _ in await service.claim_due(batch_size=10, lease=300)] == [1]
+        await database["engine"].dispose()
+
+    asyncio.run(scenario())
+
+
+def test_dispatcher_keeps_polling_after_a_failed_batch(tmp_path):
+    class FlakySender(FakeSender):
+        async def send_many(self, messages):
+            if not self.messages and not getattr(self, "failed", False):
+                self.failed = True
+                raise RuntimeError("Bot API is down")
+            return await super().send_many(messages)
+
+    async def scenario():
+        database = await setup(tmp_path)
+        sender = FlakySender()
+        dispatcher = NotificationDispatcher(
+            NotificationService(database["async_session_maker"]), sender, logger, poll_interval=0.01, lease=0,
+        )
+        dispatcher.start()
+        for _ in range(200):
+            if len(sender.messages) == 2:
+                break
+            await asyncio.sleep(0.01)
+        await dispatcher.stop()
+
+        assert sorted(tg_id for tg_id, _ in sender.messages) == [1, 2]
+        assert (await statuses(database["async_session_maker"]))[1] == (SENT, True)
+        await database["engine"].dispose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+from tg_bot.passwords import PasswordHasher, hash_password, verify_password
+
+
+def test_hash_round_trip():
+    encoded = hash_password("correct horse battery staple")
+
+    assert encoded.startswith("scrypt$")
+    assert verify_password("correct horse battery staple", encoded)
+    assert not verify_password("correct horse battery stapler", encoded)
+    # Every hash gets its own salt.
+    assert hash_password("correct horse battery staple") != encoded
+
+
+def test_malformed_hashes_are_rejected():
+    assert not verify_password("password", "")
+    assert not verify_password("password", "plain-text-password")
+    assert not verify_password("password", hash_password("password").replace("scrypt$", "bcrypt$", 1))
+
+
+def test_pool_hashes_without_blocking_the_event_loop():
+    async def scenario():
+        hasher = PasswordHasher(workers=2, max_pending=4)
+        try:
+            # Start the workers before measuring.
+            assert await hasher.verify("password", await hasher.hash("password"))
+
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.001)
+
+            ticker = asyncio.create_task(tick())
+            started = time.perf_counter()
+            hashes = await asyncio.gather(*(hasher.hash(f"password {index}") for index in range(8)))
+            elapsed = time.perf_counter() - started
+            ticker.cancel()
+
+            assert len(set(hashes)) == 8
+            assert await hasher.verify("password 3", hashes[3])
+            assert not await hasher.verify("password 3", hashes[4])
+            # The loop kept running while the workers hashed.
+            assert ticks >= elapsed / 0.001 * 0.3
+        finally:
+            hasher.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import threading
+import time
+
+import pytest
+from fakeredis import TcpFakeServer
+
+from infrastructure.redis_connection import CircuitBreaker, RedisConnector
+
+BASE_DELAY = 0.05
+MAX_DELAY = 0.4
+
+
+class RedisStandIn:
+    """fakeredis served over TCP on a fixed port, which can be killed and started again."""
+
+    def __init__(self):
+        self.port = 0
+        self.server = None
+        self.thread = None
+
+    def start(self) -> None:
+        self.server = TcpFakeServer(("127.0.0.1", self.port))
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def kill(self) -> None:
+        # Open connections are closed by their handler threads, as when redis-server exits.
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.server = None
+
+
+@pytest.fixture
+def redis_server():
+    server = RedisStandIn()
+    server.start()
+    yield server
+    if server.server is not None:
+        server.kill()
+
+
+def make_connector(port: int) -> RedisConnector:
+    connector = RedisConnector(logging.getLogger("test_redis_connection"))
+    connector.host, connector.port = "127.0.0.1", port
+    connector.breakers[0] = CircuitBreaker(BASE_DELAY, MAX_DELAY)
+    return connector
+
+
+async def wait_for_probe(breaker: CircuitBreaker) -> None:
+    await asyncio.sleep(max(breaker.open_until - time.monotonic(), 0) + 0.01)
+
+
+def test_breaker_opens_backs_off_and_recovers(redis_server):
+    async def scenario():
+        connector = make_connector(redis_server.port)
+        breaker = connector.breakers[0]
+        client = await connector.get_client(0)
+        assert client is not None and breaker.closed
+        await client.set("key", "before")
+
+        redis_server.kill()
+        await connector.check_health()
+        assert breaker.failures == 1
+        assert BASE_DELAY * 0.5 <= breaker.open_until - time.monotonic() <= BASE_DELAY
+
+        # While the circuit is open callers get no client and no connection is attempted.
+        started = time.perf_counter()
+        assert await connector.get_client(0) is None
+        assert time.perf_counter() - started < 0.05
+        assert breaker.failures == 1
+
+        # Every failed probe doubles the delay, up to the maximum.
+        for failures in range(2, 6):
+            await wait_for_probe(breaker)
+            assert await connector.get_client(0) is None
+            assert breaker.failures == failures
+            delay = min(BASE_DELAY * 2 ** (failures - 1), MAX_DELAY)
+            assert delay * 0.5 - 0.01 <= breaker.open_until - time.monotonic() <= delay
+
+        redis_server.start()
+        await wait_for_probe(breaker)
+        client = await connector.get_client(0)
+        assert client is not None and breaker.closed
+        await client.set("key", "after")
+        assert await client.get("key") == "after"
+        await connector.close_conn()
+
+    asyncio.run(scenario())
+
+
+def test_health_checks_detect_outage_and_recovery(redis_server):
+    async def wait_until(condition, timeout: float = 2.0) -> None:
+        deadline = time.monotonic() + timeout
+        while not condition():
+            assert time.monotonic() < deadline
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        connector = make_connector(redis_server.port)
+        breaker = connector.breakers[0]
+        assert await connector.get_client(0) is not None
+        connector.start_health_checks(interval=0.02)
+
+        redis_server.kill()
+        await wait_until(lambda: not breaker.closed)
+        assert await connector.get_client(0) is None
+
+        redis_server.start()
+        await wait_until(lambda: breaker.closed)
+        client = await connector.get_client(0)
+        assert await client.ping()
+        await connector.close_conn()
+        assert connector._health_task is None
+
+    asyncio.run(scenario())
+
+
+def test_backoff_is_capped():
+    breaker = CircuitBreaker(BASE_DELAY, MAX_DELAY)
+    delays = [breaker.record_failure() for _ in range(20)]
+
+    assert all(delay <= MAX_DELAY for delay in delays)
+    assert delays[-1] >= MAX_DELAY * 0.5
+    breaker.record_success()
+    assert breaker.closed and breaker.allows_probe()
@@ -0,0 +1,111 @@
+import asyncio
+from types import SimpleNamespace
+
+from aiogram import Bot
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Message
+
+from tests.load.fakes import FakeSession, message_update
+from tg_bot.handlers import registration
+from tg_bot.handlers.registration import Registration
+from tg_bot.locals.extractor_translations import translator
+from tg_bot.passwords import hash_password, verify_password
+
+TG_ID = 10
+
+
+class RecordingSession(FakeSession):
+    def __init__(self):
+        super().__init__()
+        self.texts = []
+
+    async def make_request(self, bot, method, timeout=None):
+        text = getattr(method, "text", None)
+        if text is not None:
+            self.texts.append(text)
+        return await super().make_request(bot, method, timeout)
+
+
+class InlineHasher:
+    async def hash(self, password):
+        return hash_password(password)
+
+    async def verify(self, password, encoded):
+        return verify_password(password, encoded)
+
+
+class FakeEmailIndex:
+    async def is_taken(self, email):
+        return False
+
+
+class Chat:
+    """One user's chat with the registration router, with the services it needs replaced by fakes."""
+
+    def __init__(self):
+        self.session = RecordingSession()
+        self.bot = Bot(token="42:TEST", session=self.session.session)
+        self.state = FSMContext(MemoryStorage(), StorageKey(bot_id=42, chat_id=TG_ID, user_id=TG_ID))
+        self.update_ids = iter(range(1, 1000))
+
+    async def send(self, text: str):
+        payload = message_update(next(self.update_ids), TG_ID, text)["message"]
+        message = Message.model_validate(payload, context={"bot": self.bot})
+        return await registration.router.propagate_event(
+            "message", message, bot=self.bot, state=self.state, raw_state=await self.state.get_state(), user_lang="en",
+            email_index=FakeEmailIndex(), password_hasher=InlineHasher(),
+            user_service=None, user_profile_cache=None, registration_buffer=None,
+            user_context=SimpleNamespace(profile=None),
+        )
+
+
+def test_commands_are_not_taken_for_registration_input():
+    async def scenario():
+        chat = Chat()
+        for state in (Registration.email, Registration.password, Registration.confirm_password):
+            await chat.state.set_state(state)
+            assert await chat.send("/menu") is UNHANDLED
+            assert await chat.state.get_state() == state.state
+        assert chat.session.texts == []
+
+        await chat.send("/cancel")
+        assert await chat.state.get_state() is None
+        assert chat.session.texts == [translator.get("registration_cancelled", "en")]
+
+    asyncio.run(scenario())
+
+
+def test_email_and_password_are_collected():
+    async def scenario():
+        chat = Chat()
+        await chat.state.set_state(Registration.email)
+        await chat.send("User@Example.com")
+        await chat.send("long enough password")
+
+        assert await chat.state.get_state() == Registration.confirm_password.state
+        data = await chat.state.get_data()
+        assert data["email"] == "user@example.com"
+        assert verify_password("long enough password", data["password_hash"])
+
+    asyncio.run(scenario())
+
+
+def test_lost_registration_data_restarts_the_flow():
+    async def scenario():
+        chat = Chat()
+        await chat.state.set_state(Registration.confirm_password)
+        # The fail-open FSM storage returns no data while Redis is down.
+        assert await chat.send("long enough password") is not UNHANDLED
+
+        assert await chat.state.get_state() == Registration.email.state
+        assert await chat.state.get_data() == {}
+        assert chat.session.texts == [translator.get("registration_restart", "en")]
+
+    asyncio.run(scenario())
+
+
+def test_prompt_mentions_cancel():
+    assert all("/cancel" in translator.get("ask_ai_email", lang) for lang in ("ru", "en", "es"))
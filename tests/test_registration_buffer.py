@@ -0,0 +1,125 @@
+import asyncio
+import logging
+
+from tests.load.fakes import create_sqlite_database
+from tg_bot.db.crud import UsersService
+from tg_bot.db.registration_buffer import UserRegistrationBuffer
+
+logger = logging.getLogger("test_registration_buffer")
+
+
+class FailingUsersService:
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.batches = []
+
+    async def add_new_users(self, users):
+        users = list(users)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("database is down")
+        self.batches.append(users)
+        return {user["tg_id"] for user in users}
+
+
+class RecordingProfileCache:
+    def __init__(self):
+        self.invalidated = []
+
+    async def invalidate(self, tg_id):
+        self.invalidated.append(tg_id)
+
+
+def test_flush_writes_pending_users_in_batches(tmp_path):
+    async def scenario():
+        database = await create_sqlite_database(tmp_path / "users.db")
+        service = UsersService(database["async_session_maker"])
+        buffer = UserRegistrationBuffer(service, logger, max_batch=2)
+
+        buffer.enqueue(1, "one", "ru", "blog")
+        buffer.enqueue(2, "two", "en", "unknown_tag")
+        buffer.enqueue(3, "three", "de")
+        assert buffer.get_pending(2)["lang"] == "en"
+
+        await buffer.flush()
+        assert buffer.get_pending(1) is None and buffer.get_pending(3) is None
+        assert await service.get_profile(1) == ("ru", False, True)
+        assert await service.get_profile(3) == ("de", False, True)
+        # An unknown UTM tag does not fail the batch.
+        assert await service.check_exist_user(2)
+        await database["engine"].dispose()
+
+    asyncio.run(scenario())
+
+
+def test_flush_reactivates_deactivated_users(tmp_path):
+    async def scenario():
+        database = await create_sqlite_database(tmp_path / "users.db")
+        service = UsersService(database["async_session_maker"])
+        buffer = UserRegistrationBuffer(service, logger)
+
+        buffer.enqueue(1, "one", "ru")
+        await buffer.flush()
+        await service.deactivate_users([1])
+        assert await service.get_profile(1) == ("ru", False, False)
+
+        buffer.enqueue(1, "one", "en")
+        await buffer.flush()
+        # Reactivation keeps the stored language.
+        assert await service.get_profile(1) == ("ru", False, True)
+        await database["engine"].dispose()
+
+    asyncio.run(scenario())
+
+
+def test_failed_flush_keeps_users_pending():
+    async def scenario():
+        service = FailingUsersService(failures=1)
+        buffer = UserRegistrationBuffer(service, logger, max_retries=3)
+        buffer.enqueue(1, "one", "ru")
+
+        await buffer.flush()
+        assert buffer.get_pending(1) is not None
+        await buffer.flush()
+        assert buffer.get_pending(1) is None
+        assert [user["tg_id"] for user in service.batches[0]] == [1]
+
+    asyncio.run(scenario())
+
+
+def test_user_is_dropped_and_invalidated_after_max_retries():
+    async def scenario():
+        cache = RecordingProfileCache()
+        buffer = UserRegistrationBuffer(FailingUsersService(failures=10), logger, max_retries=2,
+                                        user_profile_cache=cache)
+        buffer.enqueue(1, "one", "ru")
+
+        await buffer.flush()
+        assert buffer.get_pending(1) is not None and cache.invalidated == []
+        await buffer.flush()
+        assert buffer.get_pending(1) is None
+        assert cache.invalidated == [1]
+
+    asyncio.run(scenario())
+
+
+def test_background_task_flushes_full_batches_and_stop_flushes_the_rest():
+    async def scenario():
+        service = FailingUsersService(failures=0)
+        buffer = UserRegistrationBuffer(service, logger, max_batch=2, flush_interval=60)
+        buffer.start()
+
+        buffer.enqueue(1, "one", "ru")
+        buffer.enqueue(2, "two", "ru")
+        for _ in range(100):
+            if service.batches:
+                break
+            await asyncio.sleep(0.01)
+        assert [len(batch) for batch in service.batches] == [2]
+
+        buffer.enqueue(3, "three", "ru")
+        await buffer.stop()
+        assert [len(batch) for batch in service.batches] == [2, 1]
+        assert buffer.get_pending(3) is None
+
+    asyncio.run(scenario())
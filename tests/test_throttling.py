@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import time
+from types import SimpleNamespace
+
+from aiogram.methods import SendMessage
+
+from infrastructure.rate_limiter import Bucket, TokenBucketLimiter
+from tests.load.fakes import FakeRedisConnector
+from tg_bot.config.settings import ThrottlingSettings
+from tg_bot.middleware.send_limiter import OutboundRateLimiter
+from tg_bot.middleware.throttling_middleware import ThrottlingMiddleware
+
+logger = logging.getLogger("test_throttling")
+
+
+def make_settings(**overrides) -> ThrottlingSettings:
+    values = dict(
+        THROTTLE_USER_RATE=1.0,
+        THROTTLE_USER_BURST=3,
+        THROTTLE_GLOBAL_RATE=1000.0,
+        THROTTLE_GLOBAL_BURST=1000,
+        THROTTLE_COMMAND_RATES={"ask_ai": 0.1},
+        THROTTLE_COMMAND_BURST=1,
+        THROTTLE_LOCAL_BLOCK_MAX=10.0,
+    )
+    values.update(overrides)
+    return ThrottlingSettings(**values)
+
+
+def message_event(text: str):
+    return SimpleNamespace(message=SimpleNamespace(text=text))
+
+
+class CountingLimiter(TokenBucketLimiter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = 0
+
+    async def acquire(self, buckets, cost=1):
+        self.calls += 1
+        return await super().acquire(buckets, cost)
+
+
+async def handler(event, data):
+    return "handled"
+
+
+def test_bucket_allows_burst_then_refuses():
+    async def scenario():
+        limiter = TokenBucketLimiter(FakeRedisConnector(), logger)
+        bucket = Bucket("bucket", rate=1.0, capacity=3)
+        results = [await limiter.acquire([bucket]) for _ in range(4)]
+
+        assert results[:3] == [(0.0, None)] * 3
+        retry_after, refused = results[3]
+        assert refused == bucket
+        assert 0 < retry_after <= 1.0
+
+    asyncio.run(scenario())
+
+
+def test_refusal_takes_no_tokens_and_names_the_slowest_bucket():
+    async def scenario():
+        connector = FakeRedisConnector()
+        limiter = TokenBucketLimiter(connector, logger)
+        roomy = Bucket("roomy", rate=100.0, capacity=10)
+        tight = Bucket("tight", rate=0.5, capacity=1)
+
+        assert await limiter.acquire([roomy, tight]) == (0.0, None)
+        retry_after, refused = await limiter.acquire([roomy, tight])
+        assert refused == tight
+        assert 1.0 < retry_after <= 2.0
+
+        client = await connector.get_client(0)
+        # Only the accepted request was charged to the roomy bucket.
+        assert float(await client.hget("roomy", "tokens")) >= 9
+
+    asyncio.run(scenario())
+
+
+def test_limiter_fails_open_without_redis():
+    class DownConnector:
+        async def get_client(self, db):
+            return None
+
+    async def scenario():
+        limiter = TokenBucketLimiter(DownConnector(), logger)
+        bucket = Bucket("bucket", rate=1.0, capacity=1)
+        assert [await limiter.acquire([bucket]) for _ in range(5)] == [(0.0, None)] * 5
+
+    asyncio.run(scenario())
+
+
+def test_limiter_fails_open_on_redis_error():
+    async def scenario():
+        connector = FakeRedisConnector()
+        limiter = TokenBucketLimiter(connector, logger)
+        bucket = Bucket("bucket", rate=1.0, capacity=1)
+        assert await limiter.acquire([bucket]) == (0.0, None)
+
+        connector._server.connected = False
+        assert await limiter.acquire([bucket]) == (0.0, None)
+
+    asyncio.run(scenario())
+
+
+def test_middleware_blocks_flooding_user_locally():
+    async def scenario():
+        limiter = CountingLimiter(FakeRedisConnector(), logger)
+        middleware = ThrottlingMiddleware(limiter, make_settings(), logger)
+        flooder = {"event_from_user": SimpleNamespace(id=1)}
+        other = {"event_from_user": SimpleNamespace(id=2)}
+
+        results = [await middleware(handler, message_event("hi"), flooder) for _ in range(10)]
+        assert results == ["handled"] * 3 + [None] * 7
+        # After the first refusal the user is dropped without asking Redis.
+        assert limiter.calls == 4
+
+        assert await middleware(handler, message_event("hi"), other) == "handled"
+
+    asyncio.run(scenario())
+
+
+def test_middleware_answers_dropped_callback_queries():
+    async def scenario():
+        limiter = TokenBucketLimiter(FakeRedisConnector(), logger)
+        middleware = ThrottlingMiddleware(limiter, make_settings(THROTTLE_USER_BURST=1), logger)
+        data = {"event_from_user": SimpleNamespace(id=1)}
+        answered = []
+
+        async def answer():
+            answered.append(True)
+
+        event = SimpleNamespace(callback_query=SimpleNamespace(id="1", answer=answer))
+        assert await middleware(handler, event, data) == "handled"
+        assert answered == []
+        # Refused by Redis, then by the local block.
+        assert await middleware(handler, event, data) is None
+        assert await middleware(handler, event, data) is None
+        assert answered == [True, True]
+
+    asyncio.run(scenario())
+
+
+def test_middleware_charges_expensive_commands():
+    async def scenario():
+        limiter = TokenBucketLimiter(FakeRedisConnector(), logger)
+        middleware = ThrottlingMiddleware(limiter, make_settings(), logger)
+        data = {"event_from_user": SimpleNamespace(id=1)}
+
+        assert await middleware(handler, message_event("/ask_ai@cosmos_bot what?"), data) == "handled"
+        assert await middleware(handler, message_event("/ask_ai again"), data) is None
+
+    asyncio.run(scenario())
+
+
+def test_global_refusal_does_not_block_the_user():
+    async def scenario():
+        limiter = CountingLimiter(FakeRedisConnector(), logger)
+        settings = make_settings(THROTTLE_GLOBAL_RATE=0.1, THROTTLE_GLOBAL_BURST=1)
+        middleware = ThrottlingMiddleware(limiter, settings, logger)
+
+        assert await middleware(handler, message_event("hi"), {"event_from_user": SimpleNamespace(id=1)}) == "handled"
+        data = {"event_from_user": SimpleNamespace(id=2)}
+        assert await middleware(handler, message_event("hi"), data) is None
+        assert await middleware(handler, message_event("hi"), data) is None
+        # Both refused updates of the second user were checked in Redis.
+        assert limiter.calls == 3
+
+    asyncio.run(scenario())
+
+
+def test_updates_without_user_pass_through():
+    async def scenario():
+        limiter = CountingLimiter(FakeRedisConnector(), logger)
+        middleware = ThrottlingMiddleware(limiter, make_settings(), logger)
+        assert await middleware(handler, message_event("hi"), {}) == "handled"
+        assert limiter.calls == 0
+
+    asyncio.run(scenario())
+
+
+def test_send_limiter_takes_the_global_slot_once_the_chat_slot_is_due():
+    async def scenario():
+        limiter = OutboundRateLimiter(global_rate=5, chat_rate=2)
+        started = time.monotonic()
+        sent = {}
+
+        async def make_request(bot, method):
+            sent.setdefault(method.chat_id, []).append(time.monotonic() - started)
+
+        await asyncio.gather(*(
+            limiter(make_request, None, SendMessage(chat_id=chat_id, text="hi")) for chat_id in [1, 1, 2, 3, 4, 5]
+        ))
+        # The second message to chat 1 waits for its chat without holding one of the 5 global slots of the burst.
+        assert sent[1][1] >= 0.45
+        assert max(sent[chat_id][0] for chat_id in [1, 2, 3, 4, 5]) < 0.1
+
+    asyncio.run(scenario())
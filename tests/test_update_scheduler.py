@@ -0,0 +1,92 @@
+import asyncio
+import logging
+
+from aiogram.types import Update
+
+from tests.load.fakes import message_update
+from tg_bot.update_scheduler import UpdateScheduler
+from tg_bot.webhook import WebhookHandler
+
+logger = logging.getLogger("test_update_scheduler")
+
+
+class RecordingDispatcher:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.processed = []
+
+    async def feed_update(self, bot, update):
+        await asyncio.sleep(self.delay)
+        self.processed.append(update.update_id)
+
+
+class FlakyBot:
+    """Fails getUpdates with unexpected errors before answering with the updates, then waits forever."""
+
+    def __init__(self, failures, updates):
+        self.failures = list(failures)
+        self.updates = updates
+        self.offsets = []
+
+    async def get_updates(self, offset=None, **kwargs):
+        self.offsets.append(offset)
+        if self.failures:
+            raise self.failures.pop(0)
+        if self.updates:
+            updates, self.updates = self.updates, []
+            return updates
+        await asyncio.Event().wait()
+
+
+def make_update(update_id: int, tg_id: int) -> Update:
+    return Update.model_validate(message_update(update_id, tg_id, "hello"))
+
+
+def test_poll_survives_unexpected_errors():
+    async def scenario():
+        bot = FlakyBot([ValueError("malformed update"), RuntimeError("boom")], [make_update(1, 10), make_update(2, 11)])
+        dp = RecordingDispatcher()
+        scheduler = UpdateScheduler(dp, bot, logger, workers=2)
+        scheduler.start()
+
+        poller = asyncio.create_task(scheduler.poll(max_backoff=0.01))
+        while len(dp.processed) < 2:
+            assert not poller.done()
+            await asyncio.sleep(0.01)
+        poller.cancel()
+        await scheduler.stop()
+
+        assert sorted(dp.processed) == [1, 2]
+        assert bot.offsets == [None, None, None, 3]
+
+    asyncio.run(scenario())
+
+
+def test_updates_of_a_chat_are_processed_in_order():
+    async def scenario():
+        dp = RecordingDispatcher(delay=0.001)
+        scheduler = UpdateScheduler(dp, None, logger, workers=8)
+        scheduler.start()
+        for update_id in range(1, 41):
+            await scheduler.submit(make_update(update_id, 10 + update_id % 2))
+        await scheduler.stop()
+
+        assert [update_id for update_id in dp.processed if update_id % 2] == list(range(1, 41, 2))
+        assert [update_id for update_id in dp.processed if not update_id % 2] == list(range(2, 41, 2))
+
+    asyncio.run(scenario())
+
+
+def test_webhook_shutdown_is_bounded():
+    async def scenario():
+        dp = RecordingDispatcher(delay=10)
+        scheduler = UpdateScheduler(dp, None, logger, workers=1)
+        scheduler.start()
+        await scheduler.submit(make_update(1, 10))
+
+        handler = WebhookHandler(scheduler, logger, shutdown_timeout=0.05)
+        await asyncio.wait_for(handler.shutdown(), 1)
+        assert scheduler.pending == 1
+        await scheduler.stop(timeout=0)
+
+    asyncio.run(scenario())
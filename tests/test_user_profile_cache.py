@@ -0,0 +1,76 @@
+import asyncio
+import logging
+import time
+
+from infrastructure.user_profile_cache import UserProfile, UserProfileCache
+from tests.load.fakes import FakeRedisConnector
+from tests.test_redis_connection import make_connector, redis_server  # noqa: F401
+
+logger = logging.getLogger("test_user_profile_cache")
+
+PROFILE = UserProfile(lang="ru", status="base_user")
+
+
+class StaticUsersService:
+    async def get_profile(self, tg_id):
+        return "ru", False, True
+
+
+def make_cache(connector: FakeRedisConnector) -> UserProfileCache:
+    return UserProfileCache(connector, StaticUsersService(), logger, listener_retry_delay=0.02)
+
+
+async def wait_until(condition, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_invalidation_reaches_other_processes():
+    async def scenario():
+        connector = FakeRedisConnector()
+        writer, reader = make_cache(connector), make_cache(connector)
+        reader.start()
+        await asyncio.sleep(0.05)
+
+        reader.remember(1, PROFILE)
+        reader.remember(2, None)
+        reader.remember(3, PROFILE)
+        await writer.invalidate_many([1, 2])
+        await wait_until(lambda: not reader.lookup_local(1)[0])
+        assert not reader.lookup_local(2)[0]
+        assert reader.lookup_local(3) == (True, PROFILE)
+
+        # A process skips its own invalidations, which it already applied.
+        reader.remember(1, PROFILE)
+        await reader.invalidate(3)
+        await writer.invalidate(4)
+        await asyncio.sleep(0.05)
+        assert reader.lookup_local(1) == (True, PROFILE)
+
+        await reader.stop()
+        await connector.close_conn()
+
+    asyncio.run(scenario())
+
+
+def test_listener_clears_local_tier_after_outage(redis_server):
+    async def scenario():
+        connector = make_connector(redis_server.port)
+        cache = make_cache(connector)
+        cache.start()
+        await asyncio.sleep(0.05)
+        cache.remember(1, PROFILE)
+
+        # Invalidations published during an outage are lost, so the local tier is dropped on resubscription.
+        redis_server.kill()
+        await asyncio.sleep(0.05)
+        assert cache.lookup_local(1) == (True, PROFILE)
+        redis_server.start()
+        await wait_until(lambda: not cache.lookup_local(1)[0])
+
+        await cache.stop()
+        await connector.close_conn()
+
+    asyncio.run(scenario())
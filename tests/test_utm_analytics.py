@@ -0,0 +1,175 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from tests.load.fakes import FakeRedisConnector, create_sqlite_database
+from tg_bot.db.crud import UTMStatsService
+from tg_bot.db.models import Users
+from tg_bot.utm_analytics import REGISTRATIONS, STARTS, UTMAnalytics
+
+logger = logging.getLogger("test_utm_analytics")
+
+
+class FlakyUTMStatsService(UTMStatsService):
+    def __init__(self, async_session_maker, failures: int):
+        super().__init__(async_session_maker)
+        self.failures = failures
+
+    async def add_counts(self, batches):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("database is down")
+        return await super().add_counts(batches)
+
+
+class LostAfterCommitUTMStatsService(UTMStatsService):
+    """Commits the counts, then loses the connection before the flush can delete its hashes."""
+
+    def __init__(self, async_session_maker):
+        super().__init__(async_session_maker)
+        self.lost = False
+
+    async def add_counts(self, batches):
+        updated = await super().add_counts(batches)
+        if not self.lost:
+            self.lost = True
+            raise ConnectionError("connection lost after commit")
+        return updated
+
+
+async def record_starts(analytics: UTMAnalytics, connector, starts):
+    client = await connector.get_client(0)
+    async with client.pipeline(transaction=False) as pipe:
+        for utm, registered in starts:
+            analytics.queue_start(pipe, utm, registered)
+        await pipe.execute()
+
+
+def totals(stats):
+    return {row["utm"]: (row[STARTS], row[REGISTRATIONS]) for row in stats}
+
+
+def test_flush_moves_counters_to_the_rollups(tmp_path):
+    async def scenario():
+        database = await create_sqlite_database(tmp_path / "utm.db")
+        connector = FakeRedisConnector()
+        analytics = UTMAnalytics(UTMStatsService(database["async_session_maker"]), connector, logger)
+
+        await record_starts(analytics, connector, [("blog", True), ("blog", False), ("ads_vk", True), ("unknown", True)])
+        assert await analytics.stats() == []
+        assert await analytics.flush() == 2
+
+        stats = await analytics.stats(days=1)
+        assert totals(stats) == {"blog": (2, 1), "ads_vk": (1, 1)}
+        assert next(row for row in stats if row["utm"] == "blog")["conversion"] == 0.5
+
+        # Flushed counters are not counted again; new ones are added to the same rollup.
+        await record_starts(analytics, connector, [("blog", True)])
+        await analytics.flush()
+        assert await analytics.flush() == 0
+        assert totals(await analytics.stats())["blog"] == (3, 2)
+        await database["engine"].dispose()
+
+    asyncio.run(scenario())
+
+
+def test_counters_survive_a_failed_flush(tmp_path):
+    async def scenario():
+        database = await create_sqlite_database(tmp_path / "utm.db")
+        connector = FakeRedisConnector()
+        service = FlakyUTMStatsService(database["async_session_maker"], failures=1)
+        analytics = UTMAnalytics(service, connector, logger)
+
+        await record_starts(analytics, connector, [("blog", True)])
+        with pytest.raises(ConnectionError):
+            await analytics.flush()
+        await record_starts(analytics, connector, [("blog", False)])
+
+        await analytics.flush()
+        assert totals(await analytics.stats()) == {"blog": (2, 1)}
+        await database["engine"].dispose()
+
+    asyncio.run(scenario())
+
+
+def test_flush_committed_before_a_crash_is_not_counted_twice(tmp_path):
+    async def scenario():
+        database = await create_sqlite_database(tmp_path / "utm.db")
+        connector = FakeRedisConnector()
+        analytics = UTMAnalytics(LostAfterCommitUTMStatsService(database["async_session_maker"]), connector, logger)
+
+        await record_starts(analytics, connector, [("blog", True), ("ads_vk", False)])
+        with pytest.raises(ConnectionError):
+            await analytics.flush()
+        await record_starts(analytics, connector, [("blog", False)])
+
+        assert await analytics.flush() == 1
+        assert totals(await analytics.stats()) == {"blog": (2, 1), "ads_vk": (1, 0)}
+        client = await connector.get_client(0)
+        assert await client.keys("utm:*") == []
+        await database["engine"].dispose()
+
+    asyncio.run(scenario())
+
+
+def test_flush_covers_past_registered_days(tmp_path):
+    async def scenario():
+        database = await create_sqlite_database(tmp_path / "utm.db")
+        connector = FakeRedisConnector()
+        analytics = UTMAnalytics(UTMStatsService(database["async_session_maker"]), connector, logger)
+        yesterday = (datetime.now() - timedelta(days=1)).date().isoformat()
+        client = await connector.get_client(0)
+        await client.hincrby(UTMAnalytics.LIVE_KEY.format(day=yesterday), f"blog:{STARTS}", 3)
+        await client.sadd(UTMAnalytics.DAYS_KEY, yesterday)
+        await record_starts(analytics, connector, [("blog", True)])
+
+        assert await analytics.flush() == 2
+        assert totals(await analytics.stats()) == {"blog": (4, 1)}
+        assert totals(await analytics.stats(days=1)) == {"blog": (1, 1)}
+        assert await client.smembers(UTMAnalytics.DAYS_KEY) == set()
+        await database["engine"].dispose()
+
+    asyncio.run(scenario())
+
+
+def test_only_one_process_flushes_at_a_time(tmp_path):
+    async def scenario():
+        database = await create_sqlite_database(tmp_path / "utm.db")
+        connector = FakeRedisConnector()
+        analytics = UTMAnalytics(UTMStatsService(database["async_session_maker"]), connector, logger)
+        await record_starts(analytics, connector, [("blog", True)])
+
+        client = await connector.get_client(0)
+        await client.set(UTMAnalytics.LOCK_KEY, "another process")
+        assert await analytics.flush() == 0
+        await client.delete(UTMAnalytics.LOCK_KEY)
+        assert await analytics.flush() == 1
+        await database["engine"].dispose()
+
+    asyncio.run(scenario())
+
+
+def test_backfill_overwrites_past_registrations(tmp_path):
+    async def scenario():
+        database = await create_sqlite_database(tmp_path / "utm.db")
+        session_maker = database["async_session_maker"]
+        yesterday = datetime.now() - timedelta(days=1)
+        async with session_maker() as session:
+            await session.execute(insert(Users), [
+                {"tg_id": 1, "lang": "ru", "utm": "blog", "created_at": yesterday},
+                {"tg_id": 2, "lang": "ru", "utm": "blog", "created_at": yesterday},
+                {"tg_id": 3, "lang": "ru", "utm": "blog", "created_at": datetime.now()},
+            ])
+            await session.commit()
+        analytics = UTMAnalytics(UTMStatsService(session_maker), FakeRedisConnector(), logger)
+
+        assert await analytics.backfill(chunk_size=1) == 2
+        assert await analytics.backfill() == 2
+        assert totals(await analytics.stats()) == {"blog": (0, 2)}
+        assert await analytics.stats(days=1) == []
+        await database["engine"].dispose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import time
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Message
+from aiohttp.test_utils import TestClient, TestServer
+
+from tests.load.fakes import FakeSession, message_update
+from tg_bot.update_scheduler import UpdateScheduler
+from tg_bot.webhook import SECRET_TOKEN_HEADER, WebhookHandler, create_webhook_app
+
+logger = logging.getLogger("test_webhook")
+SECRET = "webhook-secret"
+PATH = "/webhook"
+
+
+class TelegramStandIn:
+    """Webhook app behind a local HTTP server, posted to the way Telegram does."""
+
+    def __init__(self, hold_handlers: bool = False):
+        self.handled = []
+        # Handlers wait for this event, so a test can hold updates in processing.
+        self.release = asyncio.Event()
+        if not hold_handlers:
+            self.release.set()
+        self.session = FakeSession()
+        self.bot = Bot(token="42:TEST", session=self.session.session)
+        dp = Dispatcher()
+
+        @dp.message()
+        async def echo(message: Message) -> None:
+            await self.release.wait()
+            self.handled.append(message.text)
+            await message.answer(message.text)
+
+        self.scheduler = UpdateScheduler(dp, self.bot, logger, workers=4)
+        self.app = create_webhook_app(WebhookHandler(self.scheduler, logger, SECRET, shutdown_timeout=1), PATH)
+        self.client = TestClient(TestServer(self.app))
+
+    async def __aenter__(self):
+        self.scheduler.start()
+        await self.client.start_server()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.release.set()
+        await self.client.close()
+        await self.scheduler.stop(timeout=1)
+
+    async def post(self, payload, secret=SECRET):
+        headers = {SECRET_TOKEN_HEADER: secret} if secret is not None else {}
+        return await self.client.post(PATH, json=payload, headers=headers)
+
+
+def test_updates_without_the_secret_token_are_rejected():
+    async def scenario():
+        async with TelegramStandIn() as telegram:
+            assert (await telegram.post(message_update(1, 10, "hi"), secret=None)).status == 401
+            assert (await telegram.post(message_update(2, 10, "hi"), secret="wrong")).status == 401
+            assert (await telegram.post(message_update(3, 10, "hi"))).status == 200
+            await telegram.scheduler.join()
+            assert telegram.handled == ["hi"]
+
+    asyncio.run(scenario())
+
+
+def test_malformed_updates_are_rejected():
+    async def scenario():
+        async with TelegramStandIn() as telegram:
+            response = await telegram.client.post(PATH, data="not json", headers={SECRET_TOKEN_HEADER: SECRET})
+            assert response.status == 400
+            assert (await telegram.post({"update_id": "not a number"})).status == 400
+            assert telegram.scheduler.pending == 0
+
+    asyncio.run(scenario())
+
+
+def test_updates_are_acknowledged_before_they_are_processed():
+    async def scenario():
+        async with TelegramStandIn(hold_handlers=True) as telegram:
+            started = time.perf_counter()
+            responses = [await telegram.post(message_update(update_id, 10, f"message {update_id}"))
+                         for update_id in range(1, 6)]
+            assert [response.status for response in responses] == [200] * 5
+            assert time.perf_counter() - started < 1
+            assert telegram.handled == [] and telegram.scheduler.pending == 5
+
+            telegram.release.set()
+            await asyncio.wait_for(telegram.scheduler.join(), 5)
+            # The updates of one chat are dispatched in the order Telegram sent them.
+            assert telegram.handled == [f"message {update_id}" for update_id in range(1, 6)]
+            assert telegram.session.requests == 5
+
+    asyncio.run(scenario())
@@ -0,0 +1,167 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from typing import AsyncIterator, Set, Tuple
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message
+from redis.exceptions import RedisError
+
+from api.celery_app.tasks import STREAM_KEY, generate_answer
+from tg_bot.locals.extractor_translations import translator
+
+
+class AIServiceUnavailable(Exception):
+    """The question cannot be submitted because Redis or the Celery broker is unavailable."""
+
+
+class AIClient:
+    """
+    Bot-side client of the /ask_ai Celery pipeline.
+
+    Questions are enqueued on the worker and the partial answers it streams
+    to Redis are relayed to the chat by editing the bot's reply. Relaying
+    runs in background tasks, so handlers return to the dispatcher as soon
+    as the task is enqueued.
+    """
+    DEDUP_KEY = "ai:dedup:{digest}"
+
+    def __init__(self, redis_connector, settings, logger):
+        """
+        Initialize the AIClient instance.
+
+        :param redis_connector: Connector used to obtain Redis clients.
+        :param settings: AISettings with the timeouts of the pipeline.
+        :param logger: A logger instance for logging messages.
+        """
+        self.redis_connector = redis_connector
+        self.settings = settings
+        self.logger = logger
+        self._relays: Set[asyncio.Task] = set()
+
+    async def submit(self, tg_id: int, prompt: str, high_priority: bool = False) -> Tuple[str, bool]:
+        """
+        Enqueue the generation task unless the same user asked the same question recently.
+
+        :param tg_id: The Telegram ID of the user.
+        :param prompt: The user's question.
+        :param high_priority: Route the task to the high priority queue.
+        :return: The task ID and whether an existing task was reused.
+        :raises AIServiceUnavailable: If Redis or the Celery broker cannot take the task.
+        """
+        task_id = str(uuid.uuid4())
+        normalized = " ".join(prompt.lower().split())
+        digest = hashlib.sha1(f"{tg_id}:{normalized}".encode()).hexdigest()
+        dedup_key = self.DEDUP_KEY.format(digest=digest)
+        # The answer is relayed through Redis, so without it the question cannot be answered.
+        redis_client = await self.redis_connector.get_client(db=self.settings.AI_STREAM_DB)
+        if redis_client is None:
+            self.logger.error(f"Redis (DB={self.settings.AI_STREAM_DB}) is unavailable, question of user {tg_id} not submitted")
+            raise AIServiceUnavailable("Redis is unavailable")
+        try:
+            if not await redis_client.set(dedup_key, task_id, nx=True, ex=self.settings.AI_DEDUP_TTL):
+                existing = await redis_client.get(dedup_key)
+                if existing:
+                    return existing, True
+        except RedisError as e:
+            self.logger.error(f"Redis error while submitting the question of user {tg_id}: {e}")
+            raise AIServiceUnavailable(str(e)) from e
+
+        try:
+            await asyncio.to_thread(
+                generate_answer.apply_async,
+                args=[prompt],
+                task_id=task_id,
+                queue="ai_high" if high_priority else "ai_default",
+                expires=self.settings.AI_RESULT_TIMEOUT,
+            )
+        except Exception as e:
+            # The task does not exist, so identical questions must not be pointed at it.
+            try:
+                await redis_client.delete(dedup_key)
+            except RedisError as redis_error:
+                self.logger.error(f"Redis error while releasing the dedup key of task {task_id}: {redis_error}")
+            self.logger.error(f"Failed to enqueue AI task {task_id}: {e}")
+            raise AIServiceUnavailable(str(e)) from e
+        return task_id, False
+
+    async def stream(self, task_id: str) -> AsyncIterator[str]:
+        """
+        Yield the chunks published by the task until it is done.
+
+        :raises asyncio.TimeoutError: If the answer is not complete within AI_RESULT_TIMEOUT.
+        :raises RuntimeError: If the task reported an error.
+        """
+        stream_key = STREAM_KEY.format(task_id=task_id)
+        deadline = time.monotonic() + self.settings.AI_RESULT_TIMEOUT
+        last_id = "0"
+        while True:
+            if time.monotonic() >= deadline:
+                raise asyncio.TimeoutError(f"AI task {task_id} timed out")
+            redis_client = await self.redis_connector.get_client(db=self.settings.AI_STREAM_DB)
+            if redis_client is None:
+                await asyncio.sleep(self.settings.AI_STREAM_BLOCK_MS / 1000)
+                continue
+            response = await redis_client.xread({stream_key: last_id}, block=self.settings.AI_STREAM_BLOCK_MS)
+            for _, entries in response:
+                for entry_id, fields in entries:
+                    last_id = entry_id
+                    if "chunk" in fields:
+                        yield fields["chunk"]
+                    elif "error" in fields:
+                        raise RuntimeError(fields["error"])
+                    elif "done" in fields:
+                        return
+
+    def relay(self, task_id: str, reply: Message, lang: str) -> None:
+        """
+        Relay the answer of the task to the chat in a background task.
+
+        :param task_id: ID of the generation task.
+        :param reply: The bot message that is edited as chunks arrive.
+        :param lang: The user's language code.
+        """
+        task = asyncio.create_task(self._relay(task_id, reply, lang))
+        self._relays.add(task)
+        task.add_done_callback(self._relays.discard)
+
+    async def _relay(self, task_id: str, reply: Message, lang: str) -> None:
+        text = ""
+        shown = ""
+        last_edit = time.monotonic()
+        try:
+            async for chunk in self.stream(task_id):
+                text += chunk
+                if time.monotonic() - last_edit >= self.settings.AI_EDIT_INTERVAL:
+                    shown = await self._edit(reply, text, shown)
+                    last_edit = time.monotonic()
+            await self._edit(reply, text, shown)
+        except asyncio.TimeoutError:
+            self.logger.warning(f"AI task {task_id} timed out")
+            await asyncio.to_thread(generate_answer.app.control.revoke, task_id)
+            await self._edit(reply, translator.get("ai_timeout", lang), shown)
+        except (RuntimeError, RedisError) as e:
+            self.logger.error(f"AI task {task_id} failed: {e}")
+            await self._edit(reply, translator.get("ai_error", lang), shown)
+
+    async def _edit(self, reply: Message, text: str, shown: str) -> str:
+        """
+        Edit the reply unless the text is unchanged; returns the text now shown.
+        """
+        text = text.strip()
+        if not text or text == shown:
+            return shown
+        try:
+            await reply.edit_text(text)
+        except TelegramBadRequest as e:
+            self.logger.warning(f"Failed to edit AI reply: {e}")
+            return shown
+        return text
+
+    async def close(self) -> None:
+        """
+        Wait for the relays still in progress.
+        """
+        if self._relays:
+            await asyncio.gather(*self._relays, return_exceptions=True)
@@ -1,13 +1,282 @@
-from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
-from tg_bot.config.settings import bot_logger, env_vars
+from functools import cached_property
 
-from tg_bot.db.crud import UsersService
-from infrastructure.redis_connection import RedisConnector
-from tg_bot.db.session import async_session_maker
+from tg_bot.config import settings
 
-bot = Bot(token=env_vars['TG_BOT_API_TOKEN'])
-dp = Dispatcher(storage=MemoryStorage())
 
-user_service = UsersService(async_session_maker)
-redis_connector = RedisConnector(bot_logger)
\ No newline at end of file
+class BotContainer:
+    """
+    Application container of the bot.
+
+    Every component is built on first access and then reused, and the
+    modules it needs are imported at that moment, so importing this module
+    (from tests, scripts or the CLI) neither reads the settings nor opens
+    connections or log files.
+    """
+
+    def __init__(self, **overrides):
+        """
+        :param overrides: Prebuilt components by property name, e.g. a fake
+            ``bot_session`` or ``redis_connector`` for tests and benchmarks.
+        """
+        self.__dict__.update(overrides)
+
+    @cached_property
+    def logger(self):
+        return settings.bot_logger
+
+    @cached_property
+    def redis_client_class(self):
+        if not settings.metrics_settings.METRICS_ENABLED:
+            return None
+        from tg_bot.metrics import InstrumentedRedis
+        return InstrumentedRedis
+
+    @cached_property
+    def bot_session(self):
+        """
+        HTTP session of the bot, sending the registry keyboards as prebuilt JSON.
+        """
+        from tg_bot.keyboards import PrebuiltMarkupSession
+        return PrebuiltMarkupSession(self.keyboards)
+
+    @cached_property
+    def keyboards(self):
+        from tg_bot.keyboards import KeyboardRegistry
+        from tg_bot.locals.extractor_translations import translator
+        return KeyboardRegistry(translator)
+
+    @cached_property
+    def bot(self):
+        from aiogram import Bot
+        from tg_bot.middleware.send_limiter import OutboundRateLimiter
+
+        throttling_settings = settings.throttling_settings
+        bot = Bot(token=settings.env_vars['TG_BOT_API_TOKEN'], session=self.bot_session)
+        bot.session.middleware(OutboundRateLimiter(throttling_settings.SEND_GLOBAL_RATE, throttling_settings.SEND_CHAT_RATE))
+        if settings.metrics_settings.METRICS_ENABLED:
+            from tg_bot.middleware.metrics_middleware import TelegramMetricsMiddleware
+            bot.session.middleware(TelegramMetricsMiddleware())
+        return bot
+
+    @cached_property
+    def fsm_redis_connector(self):
+        from infrastructure.redis_connection import RedisConnector
+        return RedisConnector(self.logger, decode_responses=False, client_class=self.redis_client_class)
+
+    @cached_property
+    def redis_connector(self):
+        from infrastructure.redis_connection import RedisConnector
+        return RedisConnector(self.logger, client_class=self.redis_client_class)
+
+    @cached_property
+    def database(self):
+        from tg_bot.db.session import get_database
+        return get_database()
+
+    @cached_property
+    def user_service(self):
+        from tg_bot.db.crud import UsersService
+
+        database = self.database
+        user_service = UsersService(
+            database["async_session_maker"],
+            database["read_session_maker"],
+            database["pool_metrics"],
+            database["read_pool_metrics"],
+        )
+        if settings.metrics_settings.METRICS_ENABLED:
+            from tg_bot.metrics import InstrumentedService
+            user_service = InstrumentedService(user_service, "users")
+        return user_service
+
+    @cached_property
+    def notification_service(self):
+        from tg_bot.db.crud import NotificationService
+
+        notification_service = NotificationService(self.database["async_session_maker"])
+        if settings.metrics_settings.METRICS_ENABLED:
+            from tg_bot.metrics import InstrumentedService
+            notification_service = InstrumentedService(notification_service, "notifications")
+        return notification_service
+
+    @cached_property
+    def utm_stats_service(self):
+        from tg_bot.db.crud import UTMStatsService
+
+        utm_stats_service = UTMStatsService(self.database["async_session_maker"])
+        if settings.metrics_settings.METRICS_ENABLED:
+            from tg_bot.metrics import InstrumentedService
+            utm_stats_service = InstrumentedService(utm_stats_service, "utm_stats")
+        return utm_stats_service
+
+    @cached_property
+    def media_file_service(self):
+        from tg_bot.db.crud import MediaFileService
+
+        media_file_service = MediaFileService(self.database["async_session_maker"])
+        if settings.metrics_settings.METRICS_ENABLED:
+            from tg_bot.metrics import InstrumentedService
+            media_file_service = InstrumentedService(media_file_service, "media_files")
+        return media_file_service
+
+    @cached_property
+    def user_profile_cache(self):
+        from infrastructure.user_profile_cache import UserProfileCache
+        return UserProfileCache(self.redis_connector, self.user_service, self.logger, admin_id=settings.env_vars['ADMIN_ID'])
+
+    @cached_property
+    def registration_buffer(self):
+        from tg_bot.db.registration_buffer import UserRegistrationBuffer
+
+        bot_settings = settings.bot_settings
+        return UserRegistrationBuffer(
+            self.user_service,
+            self.logger,
+            max_batch=bot_settings.REGISTRATION_BATCH_SIZE,
+            flush_interval=bot_settings.REGISTRATION_FLUSH_INTERVAL,
+            user_profile_cache=self.user_profile_cache,
+        )
+
+    @cached_property
+    def email_index(self):
+        from infrastructure.email_index import EmailIndex
+        return EmailIndex(self.redis_connector, self.user_service, self.logger)
+
+    @cached_property
+    def password_hasher(self):
+        from tg_bot.passwords import PasswordHasher
+
+        bot_settings = settings.bot_settings
+        return PasswordHasher(bot_settings.PASSWORD_HASH_WORKERS, bot_settings.PASSWORD_HASH_MAX_PENDING)
+
+    @cached_property
+    def utm_analytics(self):
+        from tg_bot.utm_analytics import UTMAnalytics
+        return UTMAnalytics(
+            self.utm_stats_service,
+            self.redis_connector,
+            self.logger,
+            flush_interval=settings.bot_settings.UTM_FLUSH_INTERVAL,
+        )
+
+    @cached_property
+    def cache_lookup_recorder(self):
+        """
+        Callback counting the cache hits and misses, or None when metrics are disabled.
+        """
+        if not settings.metrics_settings.METRICS_ENABLED:
+            return None
+        from tg_bot.metrics import record_cache_lookup
+        return record_cache_lookup
+
+    @cached_property
+    def media_registry(self):
+        from tg_bot.media_registry import MediaRegistry
+        return MediaRegistry(
+            self.bot,
+            self.media_file_service,
+            self.redis_connector,
+            self.logger,
+            settings.bot_settings.MEDIA_DIR,
+            record_cache_lookup=self.cache_lookup_recorder,
+        )
+
+    @cached_property
+    def rate_limiter(self):
+        from infrastructure.rate_limiter import TokenBucketLimiter
+        return TokenBucketLimiter(self.redis_connector, self.logger)
+
+    @cached_property
+    def ai_client(self):
+        from tg_bot.ai_client import AIClient
+        return AIClient(self.redis_connector, settings.ai_settings, self.logger)
+
+    @cached_property
+    def sender(self):
+        from tg_bot.sender import BulkSender
+        return BulkSender(self.bot, self.logger, concurrency=settings.throttling_settings.SEND_CONCURRENCY)
+
+    @cached_property
+    def notification_dispatcher(self):
+        from tg_bot.notification_dispatcher import NotificationDispatcher
+
+        notification_settings = settings.notification_settings
+        return NotificationDispatcher(
+            self.notification_service,
+            self.sender,
+            self.logger,
+            batch_size=notification_settings.NOTIFICATION_BATCH_SIZE,
+            poll_interval=notification_settings.NOTIFICATION_POLL_INTERVAL,
+            lease=notification_settings.NOTIFICATION_LEASE,
+        )
+
+    @cached_property
+    def broadcaster(self):
+        from tg_bot.broadcast import Broadcaster
+        return Broadcaster(
+            self.database["async_session_maker"],
+            self.user_service,
+            self.sender,
+            self.redis_connector,
+            self.logger,
+            chunk_size=settings.throttling_settings.BROADCAST_CHUNK_SIZE,
+            lease=settings.throttling_settings.BROADCAST_LEASE,
+            user_profile_cache=self.user_profile_cache,
+        )
+
+    @cached_property
+    def dp(self):
+        """
+        The dispatcher with its storage, middlewares, routers and injected services.
+        """
+        from aiogram import Dispatcher
+        from tg_bot.fsm_storage import RedisFSMStorage
+        from tg_bot.handlers import admin, commands, registration
+        from tg_bot.middleware.logging_context_middleware import LoggingContextMiddleware
+        from tg_bot.middleware.throttling_middleware import ThrottlingMiddleware
+        from tg_bot.middleware.user_context_middleware import UserContextMiddleware
+
+        redis_settings = settings.redis_settings
+        metrics_settings = settings.metrics_settings
+        dp = Dispatcher(storage=RedisFSMStorage(self.fsm_redis_connector, self.logger, redis_settings.REDIS_FSM_DB, redis_settings.REDIS_FSM_TTL))
+        dp.update.outer_middleware(LoggingContextMiddleware())
+        if metrics_settings.METRICS_ENABLED:
+            from tg_bot.middleware.metrics_middleware import HandlerMetricsMiddleware, UpdateMetricsMiddleware
+            dp.update.outer_middleware(UpdateMetricsMiddleware(self.logger, metrics_settings.METRICS_TRACE_SAMPLE_RATE))
+            dp.message.middleware(HandlerMetricsMiddleware())
+            dp.callback_query.middleware(HandlerMetricsMiddleware())
+        dp.update.outer_middleware(ThrottlingMiddleware(self.rate_limiter, settings.throttling_settings, self.logger))
+        dp.update.outer_middleware(UserContextMiddleware(
+            self.user_profile_cache, self.registration_buffer, self.logger, utm_analytics=self.utm_analytics,
+            record_cache_lookup=self.cache_lookup_recorder,
+        ))
+        dp.include_router(admin.router)
+        dp.include_router(registration.router)
+        dp.include_router(commands.router)
+        dp["ai_client"] = self.ai_client
+        dp["broadcaster"] = self.broadcaster
+        dp["utm_analytics"] = self.utm_analytics
+        dp["media_registry"] = self.media_registry
+        dp["user_service"] = self.user_service
+        dp["user_profile_cache"] = self.user_profile_cache
+        dp["email_index"] = self.email_index
+        dp["password_hasher"] = self.password_hasher
+        dp["registration_buffer"] = self.registration_buffer
+        dp["keyboards"] = self.keyboards
+        return dp
+
+    @cached_property
+    def update_scheduler(self):
+        from tg_bot.update_scheduler import UpdateScheduler
+
+        bot_settings = settings.bot_settings
+        return UpdateScheduler(
+            self.dp,
+            self.bot,
+            self.logger,
+            workers=bot_settings.UPDATE_WORKERS,
+            max_pending=bot_settings.UPDATE_MAX_PENDING,
+        )
+
+
+container = BotContainer()
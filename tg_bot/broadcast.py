@@ -0,0 +1,268 @@
+import asyncio
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from redis.exceptions import RedisError
+from sqlalchemy import select
+
+from tg_bot.db.models import Users
+from tg_bot.sender import BLOCKED, FAILED, SENT
+
+# The scripts below only touch the broadcast while ARGV[1] still holds its
+# lease (KEYS[1]), so a replica whose lease expired and was taken over can
+# neither renew it nor overwrite the progress of the new holder.
+
+# Adds the counters of a chunk and renews the lease. KEYS: lease, state.
+# ARGV: owner, lease seconds, last tg_id, update time, then (counter, increment) pairs.
+CHECKPOINT_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+for i = 5, #ARGV, 2 do
+    redis.call('HINCRBY', KEYS[2], ARGV[i], ARGV[i + 1])
+end
+redis.call('HSET', KEYS[2], 'last_tg_id', ARGV[3], 'updated_at', ARGV[4])
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return 1
+"""
+
+# Records the final status and frees the broadcast slot. KEYS: lease, state, current, last.
+# ARGV: owner, status, update time, broadcast ID.
+FINISH_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[2], 'status', ARGV[2], 'updated_at', ARGV[3])
+redis.call('SET', KEYS[4], ARGV[4])
+redis.call('DEL', KEYS[3], KEYS[1])
+return 1
+"""
+
+# Gives the lease up. KEYS: lease. ARGV: owner.
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+return redis.call('DEL', KEYS[1])
+"""
+
+
+class LeaseLost(Exception):
+    """The lease of a broadcast expired and another replica may have taken the broadcast over."""
+
+
+class Broadcaster:
+    """
+    Sends one message to every active user.
+
+    Users are streamed in tg_id order through a server-side cursor, so
+    memory use does not depend on the size of the table. After every chunk
+    the progress (last tg_id, counters) is checkpointed in Redis, which lets
+    an interrupted broadcast resume where it stopped, and users who blocked
+    the bot are deactivated with one UPDATE per chunk.
+
+    The replica running a broadcast holds a lease renewed at every
+    checkpoint, so only one replica resumes it after a restart; the lease of
+    a crashed replica expires after ``lease`` seconds. Checkpoints and the
+    final status are written only while the lease is still held, and a
+    replica that lost it stops sending.
+    """
+    STATE_KEY = "broadcast:{broadcast_id}"
+    CURRENT_KEY = "broadcast:current"
+    LEASE_KEY = "broadcast:{broadcast_id}:lease"
+
+    def __init__(self, session_maker, user_service, sender, redis_connector, logger,
+                 chunk_size: int = 500, redis_db: int = 0, lease: int = 120, user_profile_cache=None):
+        """
+        Initialize the Broadcaster instance.
+
+        :param session_maker: Session factory used to stream the users.
+        :param user_service: Service used to deactivate blocked users.
+        :param sender: BulkSender delivering the messages.
+        :param redis_connector: Connector used to obtain Redis clients.
+        :param logger: A logger instance for logging messages.
+        :param chunk_size: Number of users sent to and checkpointed at once.
+        :param redis_db: Redis database index holding the broadcast state.
+        :param lease: Lifetime of the lease of the running replica, in seconds; it must exceed the time to send a chunk.
+        :param user_profile_cache: Cache whose profiles of deactivated users are dropped, if any.
+        """
+        self.session_maker = session_maker
+        self.user_service = user_service
+        self.sender = sender
+        self.redis_connector = redis_connector
+        self.logger = logger
+        self.chunk_size = chunk_size
+        self.redis_db = redis_db
+        self.lease = lease
+        self.user_profile_cache = user_profile_cache
+        self._owner = uuid.uuid4().hex
+        self._task: Optional[asyncio.Task] = None
+        self._scripts: Dict[str, Any] = {}
+
+    async def _client(self):
+        client = await self.redis_connector.get_client(db=self.redis_db)
+        if client is None:
+            raise ConnectionError("Redis is unavailable, broadcasts cannot be checkpointed")
+        return client
+
+    async def _call(self, script: str, keys, args) -> int:
+        """
+        Run a lease-checked script; returns 0 if this replica does not hold the lease.
+        """
+        client = await self._client()
+        if script not in self._scripts:
+            self._scripts[script] = client.register_script(script)
+        return int(await self._scripts[script](keys=keys, args=[self._owner, *args], client=client))
+
+    async def start(self, text: str) -> Optional[str]:
+        """
+        Start a broadcast of the text.
+
+        :return: The broadcast ID, or None if another broadcast is running.
+        """
+        client = await self._client()
+        broadcast_id = uuid.uuid4().hex[:12]
+        if not await client.set(self.CURRENT_KEY, broadcast_id, nx=True):
+            return None
+        now = time.time()
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.hset(self.STATE_KEY.format(broadcast_id=broadcast_id), mapping={
+                "text": text, "status": "running", "last_tg_id": 0,
+                SENT: 0, BLOCKED: 0, FAILED: 0, "started_at": now, "updated_at": now,
+            })
+            pipe.set(self.LEASE_KEY.format(broadcast_id=broadcast_id), self._owner, ex=self.lease)
+            await pipe.execute()
+        self._spawn(broadcast_id, text, 0)
+        return broadcast_id
+
+    async def resume(self) -> None:
+        """
+        Resume the running broadcast after a restart, if there is one and no other replica holds its lease.
+        """
+        client = await self._client()
+        broadcast_id = await client.get(self.CURRENT_KEY)
+        if broadcast_id is None:
+            return
+        state = await client.hgetall(self.STATE_KEY.format(broadcast_id=broadcast_id))
+        if state.get("status") != "running":
+            await client.delete(self.CURRENT_KEY)
+            return
+        if not await client.set(self.LEASE_KEY.format(broadcast_id=broadcast_id), self._owner, nx=True, ex=self.lease):
+            self.logger.info(f"Broadcast {broadcast_id} is running on another replica")
+            return
+        self.logger.info(f"Resuming broadcast {broadcast_id} after tg_id {state['last_tg_id']}")
+        self._spawn(broadcast_id, state["text"], int(state["last_tg_id"]))
+
+    async def status(self) -> Optional[Dict[str, Any]]:
+        """
+        Return the progress of the current or most recent broadcast, with its throughput.
+        """
+        client = await self._client()
+        broadcast_id = await client.get(self.CURRENT_KEY) or await client.get(f"{self.CURRENT_KEY}:last")
+        if broadcast_id is None:
+            return None
+        state = await client.hgetall(self.STATE_KEY.format(broadcast_id=broadcast_id))
+        if not state:
+            return None
+        processed = int(state[SENT]) + int(state[BLOCKED]) + int(state[FAILED])
+        elapsed = max(float(state["updated_at"]) - float(state["started_at"]), 1e-9)
+        return {
+            "id": broadcast_id,
+            "status": state["status"],
+            SENT: int(state[SENT]),
+            BLOCKED: int(state[BLOCKED]),
+            FAILED: int(state[FAILED]),
+            "rate": processed / elapsed,
+        }
+
+    def _spawn(self, broadcast_id: str, text: str, after_tg_id: int) -> None:
+        self._task = asyncio.create_task(self._run(broadcast_id, text, after_tg_id))
+
+    async def _run(self, broadcast_id: str, text: str, after_tg_id: int) -> None:
+        state_key = self.STATE_KEY.format(broadcast_id=broadcast_id)
+        lease_key = self.LEASE_KEY.format(broadcast_id=broadcast_id)
+        status = "failed"
+        try:
+            async with self.session_maker() as session:
+                users = await session.stream_scalars(
+                    select(Users.tg_id)
+                    .where(Users.active.is_(True), Users.tg_id > after_tg_id)
+                    .order_by(Users.tg_id)
+                    .execution_options(yield_per=self.chunk_size)
+                )
+                async for chunk in users.partitions(self.chunk_size):
+                    results = await self.sender.send_many((tg_id, text) for tg_id in chunk)
+                    blocked = [tg_id for tg_id, result in zip(chunk, results) if result == BLOCKED]
+                    if blocked:
+                        await self.user_service.deactivate_users(blocked)
+                        await self._invalidate_profiles(blocked)
+                    await self._checkpoint(state_key, lease_key, chunk[-1], results)
+            status = "finished"
+        except LeaseLost:
+            self.logger.warning(f"Broadcast {broadcast_id} lost its lease, leaving it to the replica holding it")
+            status = None
+        except asyncio.CancelledError:
+            # Interrupted by stop(): the checkpoint is kept and the lease released, so the broadcast resumes.
+            status = None
+            await self._release(lease_key)
+            raise
+        except Exception as e:
+            self.logger.exception(f"Broadcast {broadcast_id} failed: {e}")
+        finally:
+            if status is not None:
+                await self._finish(broadcast_id, state_key, lease_key, status)
+
+    async def _invalidate_profiles(self, tg_ids) -> None:
+        if self.user_profile_cache is None:
+            return
+        try:
+            await self.user_profile_cache.invalidate_many(tg_ids)
+        except RedisError as e:
+            self.logger.error(f"Failed to drop the cached profiles of {len(tg_ids)} deactivated users: {e}")
+
+    async def _finish(self, broadcast_id: str, state_key: str, lease_key: str, status: str) -> None:
+        """
+        Record the final status and clear the current broadcast, so a new one can be started.
+        """
+        try:
+            finished = await self._call(
+                FINISH_SCRIPT,
+                [lease_key, state_key, self.CURRENT_KEY, f"{self.CURRENT_KEY}:last"],
+                [status, time.time(), broadcast_id],
+            )
+        except Exception as e:
+            self.logger.error(f"Failed to record the end of broadcast {broadcast_id}: {e}")
+            return
+        if not finished:
+            self.logger.warning(f"Broadcast {broadcast_id} lost its lease, its end is left to the replica holding it")
+            return
+        self.logger.info(f"Broadcast {broadcast_id} {status}")
+
+    async def _release(self, lease_key: str) -> None:
+        try:
+            await self._call(RELEASE_SCRIPT, [lease_key], [])
+        except Exception as e:
+            self.logger.warning(f"Failed to release {lease_key}, it expires in {self.lease}s: {e}")
+
+    async def _checkpoint(self, state_key: str, lease_key: str, last_tg_id: int, results) -> None:
+        """
+        Record the progress of a chunk and renew the lease in one Redis round trip.
+
+        :raises LeaseLost: If the lease expired and the progress was not recorded.
+        """
+        counters = [value for result in (SENT, BLOCKED, FAILED) for value in (result, results.count(result))]
+        if not await self._call(CHECKPOINT_SCRIPT, [lease_key, state_key], [self.lease, last_tg_id, time.time(), *counters]):
+            raise LeaseLost(lease_key)
+
+    async def stop(self) -> None:
+        """
+        Interrupt the broadcast task; its checkpoint is kept so it resumes on the next start.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
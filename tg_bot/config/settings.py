@@ -1,12 +1,16 @@
+import functools
 import logging
 import os
 from pathlib import Path
-from typing import Dict
+from typing import Any, Dict, Literal, Optional, Union
 
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from infrastructure.lazy_module import LazyInstances
+from infrastructure.structured_logging import create_queue_logger
+
 
 def find_project_root(target_folder: str = "tg_bot") -> Path:
     """
@@ -29,8 +33,13 @@ def find_project_root(target_folder: str = "tg_bot") -> Path:
 BASE_DIR = find_project_root("tg_bot")
 TRANSLATIONS_FILE = BASE_DIR / "locals" / "translations.json"
 
-# Load environment variables
-load_dotenv(BASE_DIR / "config" / ".env")
+
+@functools.cache
+def load_dotenv_once() -> None:
+    """
+    Load the environment variables of config/.env, on the first call only.
+    """
+    load_dotenv(BASE_DIR / "config" / ".env")
 
 
 class CommonSettings(BaseSettings):
@@ -39,6 +48,10 @@ class CommonSettings(BaseSettings):
     """
     model_config = SettingsConfigDict(env_file=BASE_DIR / ".env", env_file_encoding="utf-8")
 
+    def __init__(self, **values: Any):
+        load_dotenv_once()
+        super().__init__(**values)
+
 
 class DBConfig(BaseModel):
     """
@@ -49,6 +62,14 @@ class DBConfig(BaseModel):
     user: str
     password: str
     db_name: str
+    echo: bool = False
+    pool_size: int = 10
+    max_overflow: int = 10
+    pool_timeout: float = 30
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    statement_cache_size: int = 1024
+    prepared_statement_cache_size: int = 500
 
     def get_asyncpg_url(self) -> str:
         """
@@ -56,6 +77,23 @@ class DBConfig(BaseModel):
         """
         return f"postgresql+asyncpg://{self.user}:{self.password}@{self.host}:{self.port}/{self.db_name}"
 
+    def get_engine_kwargs(self) -> Dict[str, Any]:
+        """
+        Build the keyword arguments for create_async_engine from the pool and cache settings.
+        """
+        return {
+            "echo": self.echo,
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+            "pool_recycle": self.pool_recycle,
+            "pool_pre_ping": self.pool_pre_ping,
+            "connect_args": {
+                "statement_cache_size": self.statement_cache_size,
+                "prepared_statement_cache_size": self.prepared_statement_cache_size,
+            },
+        }
+
 
 class DatabaseSettings(CommonSettings):
     """
@@ -63,6 +101,28 @@ class DatabaseSettings(CommonSettings):
     """
     DB_CONFIGS: Dict[str, DBConfig] = Field(default_factory=dict)
 
+    @classmethod
+    @functools.cache
+    def instance(cls) -> "DatabaseSettings":
+        """
+        Return the settings, read from the environment once per class.
+        """
+        return cls()
+
+    @classmethod
+    def get_db_config(cls, key: str) -> DBConfig:
+        """
+        Retrieve a specific database configuration.
+        
+        :param key: The database key.
+        :return: Database configuration.
+        :raises ValueError: If the configuration for the given key is missing.
+        """
+        db_config = cls.instance().DB_CONFIGS.get(key)
+        if not db_config:
+            raise ValueError(f"Database configuration for key '{key}' is missing.")
+        return db_config
+
     @classmethod
     def get_db_url(cls, key: str) -> str:
         """
@@ -72,11 +132,14 @@ class DatabaseSettings(CommonSettings):
         :return: Connection string.
         :raises ValueError: If the configuration for the given key is missing.
         """
-        settings = cls()
-        db_config = settings.DB_CONFIGS.get(key)
-        if not db_config:
-            raise ValueError(f"Database configuration for key '{key}' is missing.")
-        return db_config.get_asyncpg_url()
+        return cls.get_db_config(key).get_asyncpg_url()
+
+    @classmethod
+    def has_db_config(cls, key: str) -> bool:
+        """
+        Check whether a database configuration exists for the given key.
+        """
+        return key in cls.instance().DB_CONFIGS
 
 
 class RedisSettings(CommonSettings):
@@ -86,9 +149,103 @@ class RedisSettings(CommonSettings):
     REDIS_HOST: str
     REDIS_PORT: int
     REDIS_TIMEOUT: int
+    REDIS_FSM_DB: int = 1
+    REDIS_FSM_TTL: int = 86400
+    REDIS_CELERY_DB: int = 2
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_HEALTH_CHECK_INTERVAL: float = 5.0
+    REDIS_BACKOFF_BASE: float = 0.5
+    REDIS_BACKOFF_MAX: float = 30.0
 
 
-redis_settings = RedisSettings()
+class BotSettings(CommonSettings):
+    """
+    Bot runtime settings: update delivery and scheduling, registration batching and password
+    hashing, UTM analytics, media files and translation reloads.
+    """
+    BOT_MODE: Literal["polling", "webhook"] = "polling"
+    BOT_DROP_PENDING_UPDATES: bool = False
+    WEBHOOK_BASE_URL: Optional[str] = None
+    WEBHOOK_PATH: str = "/webhook"
+    WEBHOOK_SECRET: Optional[str] = None
+    WEBHOOK_HOST: str = "0.0.0.0"
+    WEBHOOK_PORT: int = 8080
+    WEBHOOK_MAX_CONCURRENCY: int = 100
+    UPDATE_WORKERS: int = 50
+    UPDATE_MAX_PENDING: int = 1000
+    UPDATE_SHUTDOWN_TIMEOUT: float = 10.0
+    POLLING_TIMEOUT: int = 30
+    REGISTRATION_BATCH_SIZE: int = 500
+    REGISTRATION_FLUSH_INTERVAL: float = 1.0
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    EMAIL_INDEX_CHUNK_SIZE: int = 1000
+    UTM_FLUSH_INTERVAL: float = 60.0
+    UTM_BACKFILL_CHUNK_SIZE: int = 1000
+    MEDIA_DIR: Path = BASE_DIR / "media"
+    MEDIA_WARMUP_CHAT_ID: Optional[int] = None
+    TRANSLATIONS_RELOAD_INTERVAL: float = 5.0
+
+
+class ThrottlingSettings(CommonSettings):
+    """
+    Rate limits for incoming updates and outgoing Telegram requests.
+    """
+    THROTTLE_USER_RATE: float = 1.0
+    THROTTLE_USER_BURST: int = 5
+    THROTTLE_GLOBAL_RATE: float = 300.0
+    THROTTLE_GLOBAL_BURST: int = 600
+    THROTTLE_COMMAND_RATES: Dict[str, float] = Field(default_factory=lambda: {"ask_ai": 0.1, "start": 0.2})
+    THROTTLE_COMMAND_BURST: int = 2
+    THROTTLE_LOCAL_BLOCK_MAX: float = 10.0
+    SEND_GLOBAL_RATE: float = 30.0
+    SEND_CHAT_RATE: float = 1.0
+    SEND_CONCURRENCY: int = 20
+    BROADCAST_CHUNK_SIZE: int = 500
+    BROADCAST_LEASE: int = 120
+
+
+class AISettings(CommonSettings):
+    """
+    Settings of the /ask_ai pipeline running on the Celery worker.
+
+    INFERENCE_MODEL is the ``package.module:factory`` import path of the model
+    the worker answers with; /ask_ai replies with an error until it is set.
+    """
+    AI_RESULT_TIMEOUT: float = 60.0
+    AI_INFERENCE_TIMEOUT: float = 50.0
+    AI_DEDUP_TTL: int = 60
+    AI_STREAM_DB: int = 0
+    AI_STREAM_TTL: int = 300
+    AI_STREAM_BLOCK_MS: int = 500
+    AI_EDIT_INTERVAL: float = 1.0
+    AI_WORKER_CONCURRENCY: int = 16
+    INFERENCE_MODEL: Optional[str] = None
+    INFERENCE_MAX_BATCH_SIZE: int = 16
+    INFERENCE_MAX_WAIT_MS: float = 10.0
+    INFERENCE_CACHE_SIZE: int = 1024
+
+
+class NotificationSettings(CommonSettings):
+    """
+    Settings of the scheduled notification dispatcher.
+    """
+    NOTIFICATIONS_ENABLED: bool = True
+    NOTIFICATION_BATCH_SIZE: int = 500
+    NOTIFICATION_POLL_INTERVAL: float = 5.0
+    NOTIFICATION_LEASE: float = 300.0
+
+
+class MetricsSettings(CommonSettings):
+    """
+    Settings of the local /metrics endpoint and of per-update tracing.
+    """
+    METRICS_ENABLED: bool = True
+    METRICS_HOST: str = "127.0.0.1"
+    METRICS_PORT: int = 9100
+    METRICS_LOOP_LAG_INTERVAL: float = 0.5
+    METRICS_TRACE_SAMPLE_RATE: float = 0.0
+
 
 def load_env_vars() -> Dict[str, str]:
     """
@@ -97,6 +254,7 @@ def load_env_vars() -> Dict[str, str]:
     :return: Dictionary of environment variables.
     :raises ValueError: If any required variable is missing.
     """
+    load_dotenv_once()
     env_vars = {
         "TG_BOT_API_TOKEN": os.getenv("TG_BOT_API_TOKEN"),
         "LOG_LEVEL": os.getenv("LOG_LEVEL"),
@@ -110,28 +268,47 @@ def load_env_vars() -> Dict[str, str]:
     return env_vars
 
 
-env_vars = load_env_vars()
+class LoggingSettings(CommonSettings):
+    """
+    Log output settings: format, rotation and sampling of DEBUG records.
+    """
+    LOG_FORMAT: Literal["text", "json"] = "text"
+    LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    LOG_BACKUP_COUNT: int = 5
+    LOG_DEBUG_SAMPLE_RATE: float = 1.0
+
 
-def setup_logger(name: str, log_file: str) -> logging.Logger:
+def setup_logger(name: str, log_file: Union[str, Path]) -> logging.Logger:
     """
-    Configure and return a logger with file output.
+    Configure and return a logger writing to a rotating file through a background queue listener.
     
     :param name: Logger name.
-    :param log_file: Path to the log file.
+    :param log_file: Path to the log file, absolute or relative to the tg_bot directory.
     :return: Configured logger instance.
     """
-    logger = logging.getLogger(name)
-    logger.setLevel(env_vars["LOG_LEVEL"].upper())
-    
-    if not logger.handlers:
-        file_handler = logging.FileHandler(BASE_DIR / log_file, encoding="utf-8")
-        formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-        file_handler.setFormatter(formatter)
-        
-        logger.addHandler(file_handler)
-    
-    return logger
+    log_settings = lazy("logging_settings")
+    return create_queue_logger(
+        name,
+        BASE_DIR / log_file,
+        lazy("env_vars")["LOG_LEVEL"],
+        json_format=log_settings.LOG_FORMAT == "json",
+        max_bytes=log_settings.LOG_MAX_BYTES,
+        backup_count=log_settings.LOG_BACKUP_COUNT,
+        debug_sample_rate=log_settings.LOG_DEBUG_SAMPLE_RATE,
+    )
 
 
-bot_logger = setup_logger("bot_logger", "logs/bot_logs.log")
-#fapi_logger = setup_logger("fast_api", "api/logs/api_logs.log")
+# Module-level instances are built on first access, so importing this module
+# does not read the environment, validate settings or open log files.
+_lazy_instances = LazyInstances(globals(), {
+    "redis_settings": RedisSettings,
+    "bot_settings": BotSettings,
+    "throttling_settings": ThrottlingSettings,
+    "ai_settings": AISettings,
+    "notification_settings": NotificationSettings,
+    "metrics_settings": MetricsSettings,
+    "logging_settings": LoggingSettings,
+    "env_vars": load_env_vars,
+    "bot_logger": lambda: setup_logger("bot_logger", "logs/bot_logs.log"),
+})
+lazy = __getattr__ = _lazy_instances.get
@@ -1,33 +1,353 @@
-from typing import Optional
+import time
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import and_, case, delete, func, or_, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from tg_bot.db.models import Users
-from tg_bot.db.session import async_session_maker
+from tg_bot.db.models import MediaFile, Notification, Users, UTMDailyStats, UTMFlush, UTMInfo
 
 class UsersService:
-    def __init__(self, async_session_maker):
+    def __init__(self, async_session_maker, read_session_maker=None, pool_metrics=None, read_pool_metrics=None):
         self.session_maker = async_session_maker
+        self.read_session_maker = read_session_maker or async_session_maker
+        self.pool_metrics = pool_metrics
+        self.read_pool_metrics = read_pool_metrics or pool_metrics
+
+    @asynccontextmanager
+    async def _read_session(self) -> AsyncIterator[AsyncSession]:
+        """Opens a session on the read replica, recording the connection wait time"""
+        async with self.read_session_maker() as session:
+            if self.read_pool_metrics is not None:
+                started = time.perf_counter()
+                await session.connection()
+                self.read_pool_metrics.observe_wait(time.perf_counter() - started)
+            yield session
+
+    async def add_new_user(self, tg_id: int, tg_name: Optional[str], lang: str, utm: Optional[str] = None) -> bool:
+        """Inserts the user or reactivates it; an unknown UTM tag is stored as NULL. Returns True if inserted or reactivated"""
+        created = await self.add_new_users([{"tg_id": tg_id, "tg_name": tg_name, "lang": lang, "utm": utm}])
+        return tg_id in created
+
+    async def add_new_users(self, users: Iterable[Dict]) -> Set[int]:
+        """
+        Inserts a batch of users with a single INSERT ... ON CONFLICT DO UPDATE.
 
-    async def add_new_user(self, tg_id: int, tg_name: Optional[str], lang: str, utm: Optional[str] = None) -> None:
+        Existing users who were deactivated (they had blocked the bot) are reactivated; their other
+        columns are kept. UTM tags missing from utm_info are replaced with NULL so one bad tag does
+        not fail the batch. Returns the tg_ids that were inserted or reactivated.
+        """
+        rows = list({user["tg_id"]: user for user in users}.values())
+        if not rows:
+            return set()
         async with self.session_maker() as session:
-            new_user = Users(tg_id=tg_id, tg_name=tg_name, lang=lang, utm=utm)
-            session.add(new_user)
-            try:
-                await session.commit()
-            except IntegrityError:
-                await session.rollback()
-                raise
+            utms = {row["utm"] for row in rows if row.get("utm")}
+            known_utms = set()
+            if utms:
+                result = await session.execute(select(UTMInfo.utm).where(UTMInfo.utm.in_(utms)))
+                known_utms = set(result.scalars())
+            values = [
+                {
+                    "tg_id": row["tg_id"],
+                    "tg_name": row.get("tg_name"),
+                    "lang": row["lang"],
+                    "utm": row.get("utm") if row.get("utm") in known_utms else None,
+                }
+                for row in rows
+            ]
+            result = await session.execute(
+                insert(Users)
+                .values(values)
+                .on_conflict_do_update(
+                    index_elements=[Users.tg_id],
+                    set_={"active": True},
+                    # Active users are left untouched rather than rewritten with the same value.
+                    where=Users.active.is_(False),
+                )
+                .returning(Users.tg_id)
+            )
+            created = set(result.scalars())
+            await session.commit()
+            return created
 
 
     async def check_exist_user(self, tg_id: int) -> bool:
-        async with self.session_maker() as session:
-            result = await session.execute(select(Users).where(Users.tg_id == tg_id))
+        async with self._read_session() as session:
+            result = await session.execute(select(Users.id).where(Users.tg_id == tg_id))
             return result.scalar_one_or_none() is not None
 
     async def get_user_language(self, tg_id: int) -> str:
-        async with self.session_maker() as session:
+        async with self._read_session() as session:
             result = await session.execute(select(Users.lang).where(Users.tg_id == tg_id))
             user_lang = result.scalar_one_or_none()
             if user_lang is None:
                 raise ValueError(f"User with tg_id {tg_id} not found")
             return user_lang
+
+    async def get_profile(self, tg_id: int) -> Optional[Tuple[str, bool, bool]]:
+        """Returns the (lang, has_credentials, active) triple of the user, or None if the user is not registered"""
+        async with self._read_session() as session:
+            result = await session.execute(
+                select(Users.lang, Users.email.is_not(None), Users.active).where(Users.tg_id == tg_id)
+            )
+            row = result.one_or_none()
+            return (row[0], bool(row[1]), bool(row[2])) if row is not None else None
+
+    async def email_exists(self, email: str) -> bool:
+        """Checks the unique index of users.email; reads the primary so a just registered email is seen"""
+        async with self.session_maker() as session:
+            result = await session.execute(select(Users.id).where(Users.email == email))
+            return result.scalar_one_or_none() is not None
+
+    async def stream_emails(self, chunk_size: int) -> AsyncIterator[List[str]]:
+        """Yields the registered emails in chunks of chunk_size, read through a server-side cursor"""
+        async with self._read_session() as session:
+            result = await session.stream_scalars(
+                select(Users.email).where(Users.email.is_not(None)).execution_options(yield_per=chunk_size)
+            )
+            async for chunk in result.partitions(chunk_size):
+                yield list(chunk)
+
+    async def set_credentials(self, tg_id: int, email: str, password_hash: str) -> bool:
+        """
+        Stores the email and password hash of the user.
+
+        Returns False if the email belongs to another user or the user is not in the database yet.
+        """
+        async with self.session_maker() as session:
+            try:
+                result = await session.execute(
+                    update(Users).where(Users.tg_id == tg_id).values(email=email, password_hash=password_hash)
+                    .execution_options(synchronize_session=False)
+                )
+                await session.commit()
+            except IntegrityError:
+                await session.rollback()
+                return False
+            return result.rowcount > 0
+
+    async def set_language(self, tg_id: int, lang: str) -> bool:
+        """Changes the language of the user. Returns False if the user is not in the database yet"""
+        async with self.session_maker() as session:
+            result = await session.execute(
+                update(Users).where(Users.tg_id == tg_id).values(lang=lang)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+            return result.rowcount > 0
+
+    async def deactivate_users(self, tg_ids: Iterable[int]) -> None:
+        """Marks the users as inactive with a single UPDATE"""
+        tg_ids = list(tg_ids)
+        if not tg_ids:
+            return
+        async with self.session_maker() as session:
+            await session.execute(
+                update(Users).where(Users.tg_id.in_(tg_ids)).values(active=False)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+
+class NotificationService:
+    def __init__(self, async_session_maker):
+        self.session_maker = async_session_maker
+
+    async def claim_due(self, batch_size: int, lease: float) -> List[Tuple[int, int, str, str]]:
+        """
+        Claims up to batch_size due notifications for this worker.
+
+        Rows are locked with FOR UPDATE SKIP LOCKED and switched to 'processing' in the same
+        statement, so concurrent workers never claim the same notification. Rows left in
+        'processing' for longer than lease seconds (a crashed worker) are claimed again.
+        Returns (id, tg_id, notification_type, lang) tuples.
+        """
+        now = datetime.now()
+        due = (
+            select(Notification.id)
+            .where(
+                Notification.notification_date <= now,
+                or_(
+                    Notification.status == "pending",
+                    and_(Notification.status == "processing",
+                         Notification.claimed_at < now - timedelta(seconds=lease)),
+                ),
+            )
+            .order_by(Notification.notification_date)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        async with self.session_maker() as session:
+            result = await session.execute(
+                update(Notification)
+                .where(Notification.id.in_(due))
+                .values(status="processing", claimed_at=now)
+                .returning(Notification.id, Notification.tg_id, Notification.notification_type)
+            )
+            claimed = result.all()
+            langs = {}
+            if claimed:
+                result = await session.execute(
+                    select(Users.tg_id, Users.lang).where(Users.tg_id.in_({row.tg_id for row in claimed}))
+                )
+                langs = dict(result.all())
+            await session.commit()
+        return [(row.id, row.tg_id, row.notification_type, langs.get(row.tg_id, "en")) for row in claimed]
+
+    async def mark(self, statuses: Dict[int, str]) -> None:
+        """Sets the final status of a batch of notifications with a single UPDATE"""
+        if not statuses:
+            return
+        values = {"status": case(statuses, value=Notification.id)}
+        sent_ids = [notification_id for notification_id, status in statuses.items() if status == "sent"]
+        if sent_ids:
+            values["sent_at"] = case((Notification.id.in_(sent_ids), datetime.now()), else_=Notification.sent_at)
+        async with self.session_maker() as session:
+            await session.execute(
+                update(Notification)
+                .where(Notification.id.in_(statuses))
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+
+class UTMStatsService:
+    # Flushes are retried within minutes; their tokens are only needed for as long.
+    FLUSH_TOKEN_TTL = timedelta(days=7)
+
+    def __init__(self, async_session_maker):
+        self.session_maker = async_session_maker
+
+    async def _upsert(self, session: AsyncSession, values: List[Dict], set_) -> None:
+        statement = insert(UTMDailyStats).values(values)
+        await session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[UTMDailyStats.utm, UTMDailyStats.day],
+                set_=set_(statement.excluded),
+            )
+        )
+
+    async def _known_utms(self, session: AsyncSession, utms: Set[str]) -> Set[str]:
+        result = await session.execute(select(UTMInfo.utm).where(UTMInfo.utm.in_(utms)))
+        return set(result.scalars())
+
+    async def add_counts(self, batches: Dict[str, Dict[Tuple[str, date], Tuple[int, int]]]) -> int:
+        """
+        Adds the (starts, registrations) increments of each flush token to the daily rollups.
+
+        The tokens are recorded in utm_flushes in the same transaction as the upsert, and the
+        increments of tokens recorded before are skipped, so a flush retried after its commit
+        does not count twice. Increments of tags missing from utm_info are dropped. Tokens older
+        than FLUSH_TOKEN_TTL are pruned. Returns the number of rollup rows written.
+        """
+        if not batches:
+            return 0
+        async with self.session_maker() as session:
+            result = await session.execute(select(UTMFlush.token).where(UTMFlush.token.in_(batches)))
+            applied = set(result.scalars())
+            tokens = [token for token in batches if token not in applied]
+            if not tokens:
+                return 0
+            counts: Dict[Tuple[str, date], List[int]] = {}
+            for token in tokens:
+                for key, (starts, registrations) in batches[token].items():
+                    row = counts.setdefault(key, [0, 0])
+                    row[0] += starts
+                    row[1] += registrations
+            known_utms = await self._known_utms(session, {utm for utm, _ in counts}) if counts else set()
+            values = [
+                {"utm": utm, "day": day, "starts": starts, "registrations": registrations}
+                for (utm, day), (starts, registrations) in counts.items()
+                if utm in known_utms
+            ]
+            if values:
+                await self._upsert(session, values, lambda excluded: {
+                    "starts": UTMDailyStats.starts + excluded.starts,
+                    "registrations": UTMDailyStats.registrations + excluded.registrations,
+                })
+            now = datetime.now()
+            await session.execute(
+                insert(UTMFlush).values([{"token": token, "flushed_at": now} for token in tokens])
+            )
+            await session.execute(delete(UTMFlush).where(UTMFlush.flushed_at < now - self.FLUSH_TOKEN_TTL))
+            await session.commit()
+            return len(values)
+
+    async def set_registrations(self, counts: Dict[Tuple[str, date], int]) -> None:
+        """Overwrites the registrations of the given daily rollups, keeping their starts"""
+        if not counts:
+            return
+        async with self.session_maker() as session:
+            values = [
+                {"utm": utm, "day": day, "starts": 0, "registrations": registrations}
+                for (utm, day), registrations in counts.items()
+            ]
+            await self._upsert(session, values, lambda excluded: {"registrations": excluded.registrations})
+            await session.commit()
+
+    async def stream_registrations(self, before: datetime, chunk_size: int) -> AsyncIterator[List[Tuple[str, datetime]]]:
+        """
+        Yields the (utm, created_at) pairs of users registered with a UTM tag before the given moment.
+
+        Rows come from a server-side cursor in chunks of chunk_size, so memory use does not depend on
+        the size of the table.
+        """
+        async with self.session_maker() as session:
+            result = await session.stream(
+                select(Users.utm, Users.created_at)
+                .where(Users.utm.is_not(None), Users.created_at < before)
+                .execution_options(yield_per=chunk_size)
+            )
+            async for chunk in result.partitions(chunk_size):
+                yield [tuple(row) for row in chunk]
+
+    async def totals(self, since: Optional[date] = None) -> List[Tuple[str, int, int]]:
+        """
+        Sums the daily rollups per UTM tag, optionally from the given day on.
+
+        Returns (utm, starts, registrations) tuples ordered by registrations, the highest first.
+        """
+        registrations = func.sum(UTMDailyStats.registrations)
+        query = select(UTMDailyStats.utm, func.sum(UTMDailyStats.starts), registrations).group_by(UTMDailyStats.utm)
+        if since is not None:
+            query = query.where(UTMDailyStats.day >= since)
+        async with self.session_maker() as session:
+            result = await session.execute(query.order_by(registrations.desc()))
+            return [(utm, int(starts), int(registered)) for utm, starts, registered in result]
+
+
+class MediaFileService:
+    def __init__(self, async_session_maker):
+        self.session_maker = async_session_maker
+
+    async def get_file_id(self, digest: str, kind: str) -> Optional[str]:
+        async with self.session_maker() as session:
+            result = await session.execute(
+                select(MediaFile.file_id).where(MediaFile.digest == digest, MediaFile.kind == kind)
+            )
+            return result.scalar_one_or_none()
+
+    async def save_file_id(self, digest: str, kind: str, file_id: str, path: str) -> None:
+        """Records the file_id of uploaded content, replacing the previous one of the same content and kind"""
+        statement = insert(MediaFile).values(digest=digest, kind=kind, file_id=file_id, path=path)
+        async with self.session_maker() as session:
+            await session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[MediaFile.digest, MediaFile.kind],
+                    set_={"file_id": file_id, "path": path, "updated_at": datetime.now()},
+                )
+            )
+            await session.commit()
+
+    async def delete_file_ids(self, digest: str, kind: Optional[str] = None) -> None:
+        """Forgets the file_ids of the content, of one kind or of all kinds"""
+        query = delete(MediaFile).where(MediaFile.digest == digest)
+        if kind is not None:
+            query = query.where(MediaFile.kind == kind)
+        async with self.session_maker() as session:
+            await session.execute(query)
+            await session.commit()
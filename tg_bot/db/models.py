@@ -1,8 +1,8 @@
 from typing import Optional, Annotated
 
-from sqlalchemy import Column, Integer, BigInteger, String, Boolean, TIMESTAMP, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, TIMESTAMP, Date, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
-from datetime import datetime
+from datetime import date, datetime
 from tg_bot.db.session import Base
 
 
@@ -20,6 +20,8 @@ class Users(Base):
     lang: Mapped[str] = mapped_column(nullable=False)
     active: Mapped[bool] = mapped_column(nullable=False, default=True)
     utm: Mapped[Optional[str]] = mapped_column(ForeignKey("utm_info.utm"), nullable=True)
+    email: Mapped[Optional[str]] = mapped_column(String(254), unique=True, index=True, nullable=True)
+    password_hash: Mapped[Optional[str]] = mapped_column(nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP, nullable=False, default=datetime.now
     )
@@ -27,12 +29,18 @@ class Users(Base):
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_notification_date", "notification_date"),
+    )
 
     id: Mapped[intpk]
     tg_id: Mapped[Optional[int]] = mapped_column(BigInteger, ForeignKey("users.tg_id"), nullable=False)
     notification_date: Mapped[datetime] = mapped_column(TIMESTAMP, nullable=False)
     notification_type: Mapped[Optional[str]] = mapped_column(nullable=False)
     job_id: Mapped[str | None] = mapped_column(nullable=True)
+    status: Mapped[str] = mapped_column(nullable=False, default="pending", server_default="pending")
+    claimed_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP, nullable=True)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP, nullable=True)
 
 
 class UTMInfo(Base):
@@ -41,4 +49,40 @@ class UTMInfo(Base):
     id: Mapped[intpk]
     utm: Mapped[str] = mapped_column(nullable=False, unique=True)
     source: Mapped[str] = mapped_column(nullable=False)
-    info: Mapped[Optional[str]] = mapped_column(nullable=True)
\ No newline at end of file
+    info: Mapped[Optional[str]] = mapped_column(nullable=True)
+
+
+class UTMDailyStats(Base):
+    __tablename__ = "utm_daily_stats"
+    __table_args__ = (
+        UniqueConstraint("utm", "day", name="uq_utm_daily_stats_utm_day"),
+    )
+
+    id: Mapped[intpk]
+    utm: Mapped[str] = mapped_column(ForeignKey("utm_info.utm"), nullable=False)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    starts: Mapped[int] = mapped_column(nullable=False, default=0, server_default="0")
+    registrations: Mapped[int] = mapped_column(nullable=False, default=0, server_default="0")
+
+
+class UTMFlush(Base):
+    __tablename__ = "utm_flushes"
+
+    token: Mapped[str] = mapped_column(String(32), primary_key=True)
+    flushed_at: Mapped[datetime] = mapped_column(TIMESTAMP, nullable=False, default=datetime.now, index=True)
+
+
+class MediaFile(Base):
+    __tablename__ = "media_files"
+    __table_args__ = (
+        UniqueConstraint("digest", "kind", name="uq_media_files_digest_kind"),
+    )
+
+    id: Mapped[intpk]
+    digest: Mapped[str] = mapped_column(String(64), nullable=False)
+    kind: Mapped[str] = mapped_column(nullable=False)
+    file_id: Mapped[str] = mapped_column(nullable=False)
+    path: Mapped[str] = mapped_column(nullable=False, index=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP, nullable=False, default=datetime.now, onupdate=datetime.now
+    )
@@ -0,0 +1,91 @@
+import threading
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class PoolMetrics:
+    """
+    Connection pool counters for one async engine.
+
+    Checkouts and checkins are tracked with pool events; the time spent
+    waiting for a connection is reported by the callers through
+    :meth:`observe_wait`, since the pool has no "before checkout" event.
+    """
+
+    def __init__(self, engine: AsyncEngine, name: str):
+        """
+        Attach the metrics to the engine's pool.
+
+        :param engine: The engine whose pool is observed.
+        :param name: Label of the engine in the reported metrics.
+        """
+        self.name = name
+        self.pool = engine.sync_engine.pool
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.saturated_checkouts = 0
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._wait_listeners: List[Callable[[float], None]] = []
+        event.listen(engine.sync_engine, "checkout", self._on_checkout)
+        event.listen(engine.sync_engine, "checkin", self._on_checkin)
+
+    @property
+    def capacity(self) -> int:
+        """
+        Maximum number of connections the pool hands out at once.
+        """
+        size = getattr(self.pool, "size", None)
+        if size is None:
+            return 0
+        return size() + max(getattr(self.pool, "_max_overflow", 0), 0)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            if self.in_use >= self.capacity > 0:
+                self.saturated_checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.in_use = max(self.in_use - 1, 0)
+
+    def add_wait_listener(self, listener: Callable[[float], None]) -> None:
+        """
+        Register a callable receiving every observed wait time, in seconds.
+        """
+        self._wait_listeners.append(listener)
+
+    def observe_wait(self, seconds: float) -> None:
+        """
+        Record the time a caller waited to obtain a connection.
+        """
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+        for listener in self._wait_listeners:
+            listener(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return the current counters as a dictionary.
+        """
+        with self._lock:
+            return {
+                "engine": self.name,
+                "capacity": self.capacity,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "checkouts": self.checkouts,
+                "saturated_checkouts": self.saturated_checkouts,
+                "wait_avg": self.wait_total / self.wait_count if self.wait_count else 0.0,
+                "wait_max": self.wait_max,
+            }
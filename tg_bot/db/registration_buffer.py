@@ -0,0 +1,127 @@
+import asyncio
+from typing import Dict, Optional
+
+
+class UserRegistrationBuffer:
+    """
+    Write-behind buffer for new users.
+
+    Registrations are collected in memory and written with one bulk upsert
+    when ``max_batch`` users are pending or ``flush_interval`` seconds have
+    passed. Callers are expected to record the user in the profile cache at
+    enqueue time, so the user is served as registered before the flush.
+    A user stays pending until the insert is committed, so lookups made
+    during a flush still find them here rather than in the database.
+    """
+
+    def __init__(self, user_service, logger, max_batch: int = 500, flush_interval: float = 1.0,
+                 max_retries: int = 3, user_profile_cache=None):
+        """
+        Initialize the UserRegistrationBuffer instance.
+
+        :param user_service: Service used to write the users to the database.
+        :param logger: A logger instance for logging messages.
+        :param max_batch: Number of pending users that triggers an immediate flush.
+        :param flush_interval: Maximum time a user stays pending, in seconds.
+        :param max_retries: Number of failed flushes after which a user is dropped.
+        :param user_profile_cache: Profile cache the dropped users are invalidated in.
+        """
+        self.user_service = user_service
+        self.logger = logger
+        self.user_profile_cache = user_profile_cache
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._pending: Dict[int, dict] = {}
+        self._attempts: Dict[int, int] = {}
+        self._batch_ready = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def enqueue(self, tg_id: int, tg_name: Optional[str], lang: str, utm: Optional[str] = None) -> None:
+        """
+        Schedule the user for insertion.
+        """
+        self._pending[tg_id] = {"tg_id": tg_id, "tg_name": tg_name, "lang": lang, "utm": utm}
+        if len(self._pending) >= self.max_batch:
+            self._batch_ready.set()
+
+    def get_pending(self, tg_id: int) -> Optional[dict]:
+        """
+        Return the registration of the user if it has not been written to the database yet.
+        """
+        return self._pending.get(tg_id)
+
+    async def flush(self) -> None:
+        """
+        Write the users pending at the start of the flush with bulk upserts of at most ``max_batch`` rows.
+        """
+        async with self._flush_lock:
+            rows = list(self._pending.items())
+            for start in range(0, len(rows), self.max_batch):
+                batch = dict(rows[start:start + self.max_batch])
+                try:
+                    created = await self.user_service.add_new_users(batch.values())
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.logger.error(f"Failed to flush {len(batch)} new users: {e}")
+                    await self._record_failure(batch)
+                    return
+                for tg_id, row in batch.items():
+                    self._attempts.pop(tg_id, None)
+                    # A user enqueued again during the insert stays pending with the newer row.
+                    if self._pending.get(tg_id) is row:
+                        del self._pending[tg_id]
+                self.logger.info(f"Flushed {len(batch)} new users ({len(created)} inserted or reactivated)")
+
+    async def _record_failure(self, batch: Dict[int, dict]) -> None:
+        """
+        Count a failed flush of the batch, dropping users that exhausted their retries.
+
+        The cached profile of a dropped user is invalidated, so the user is
+        served as unregistered and registered again by their next /start.
+        """
+        for tg_id, row in batch.items():
+            attempts = self._attempts.get(tg_id, 0) + 1
+            if attempts < self.max_retries:
+                self._attempts[tg_id] = attempts
+                continue
+            self._attempts.pop(tg_id, None)
+            if self._pending.get(tg_id) is row:
+                del self._pending[tg_id]
+            self.logger.error(f"Dropping registration of user {tg_id} after {attempts} failed flushes")
+            if self.user_profile_cache is not None:
+                try:
+                    await self.user_profile_cache.invalidate(tg_id)
+                except Exception as e:
+                    self.logger.error(f"Failed to invalidate the profile of dropped user {tg_id}: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        """
+        Start the background flushing task.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop the background task and flush the remaining users.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
@@ -1,21 +1,54 @@
-import asyncio
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from tg_bot.config.settings import DatabaseSettings
+import functools
+from typing import Any, Dict
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker, AsyncSession
+from tg_bot.config.settings import DatabaseSettings, DBConfig
+from tg_bot.db.pool_metrics import PoolMetrics
 from sqlalchemy.orm import DeclarativeBase
 
-# Предположим, что вы хотите получить URL для определённого ключа
-database_url = DatabaseSettings.get_db_url('tg_db')
 
-
-engine = create_async_engine(
-    url=database_url,
-    echo=True
+def create_engine_from_config(db_config: DBConfig) -> AsyncEngine:
+    """
+    Create an async engine with the pool and statement cache settings of the configuration.
+    """
+    return create_async_engine(url=db_config.get_asyncpg_url(), **db_config.get_engine_kwargs())
+
+
+@functools.cache
+def get_database() -> Dict[str, Any]:
+    """
+    Create the engines, session makers and pool metrics on first use.
+
+    Read-only queries go to the replica when one is configured, otherwise to the primary.
+    """
+    engine = create_engine_from_config(DatabaseSettings.get_db_config('tg_db'))
+    pool_metrics = PoolMetrics(engine, 'tg_db')
+    if DatabaseSettings.has_db_config('tg_db_replica'):
+        read_engine = create_engine_from_config(DatabaseSettings.get_db_config('tg_db_replica'))
+        read_pool_metrics = PoolMetrics(read_engine, 'tg_db_replica')
+    else:
+        read_engine = engine
+        read_pool_metrics = pool_metrics
+    return {
+        "engine": engine,
+        "async_session_maker": async_sessionmaker(engine, expire_on_commit = False),
+        "pool_metrics": pool_metrics,
+        "read_engine": read_engine,
+        "read_session_maker": async_sessionmaker(read_engine, expire_on_commit = False),
+        "read_pool_metrics": read_pool_metrics,
+    }
+
+
+DATABASE_ATTRIBUTES = (
+    "engine", "async_session_maker", "pool_metrics", "read_engine", "read_session_maker", "read_pool_metrics",
 )
-async_session_maker = async_sessionmaker(engine, expire_on_commit = False)
-
 
-class Base(DeclarativeBase):
-    pass
 
+def __getattr__(name: str) -> Any:
+    # The engines, session makers and pool metrics are built on first access.
+    if name not in DATABASE_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return get_database()[name]
 
 
+class Base(DeclarativeBase):
+    pass
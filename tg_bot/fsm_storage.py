@@ -0,0 +1,103 @@
+from typing import Any, Dict, Mapping, Optional
+
+import msgpack
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from redis.exceptions import RedisError
+
+
+class RedisFSMStorage(BaseStorage):
+    """
+    FSM storage kept in Redis so that several bot replicas share chat state.
+
+    The state and the data of a chat live in one hash with the fields
+    ``state`` and ``data``; the data is serialized with msgpack. Every write
+    refreshes the TTL of the hash, so abandoned conversations expire on
+    their own instead of accumulating.
+
+    Redis being unavailable must not fail updates: aiogram reads the state
+    of every update, including those of chats without any. While Redis is
+    down, reads behave as if the chat had no state and writes are logged and
+    skipped, so conversations restart once Redis is back.
+    """
+    KEY_PREFIX = "fsm"
+
+    def __init__(self, redis_connector, logger, db: int, ttl: Optional[int] = None):
+        """
+        Initialize the RedisFSMStorage instance.
+
+        :param redis_connector: RedisConnector created with decode_responses=False.
+        :param logger: A logger instance for logging messages.
+        :param db: Redis database index dedicated to FSM state.
+        :param ttl: Lifetime of a chat's state and data, in seconds. None keeps them forever.
+        """
+        self.redis_connector = redis_connector
+        self.logger = logger
+        self.db = db
+        self.ttl = ttl
+
+    def build_key(self, key: StorageKey) -> str:
+        """
+        Build the Redis key holding the state and data of a chat.
+        """
+        parts = [self.KEY_PREFIX, str(key.bot_id)]
+        if key.business_connection_id:
+            parts.append(key.business_connection_id)
+        parts.append(str(key.chat_id))
+        if key.thread_id:
+            parts.append(str(key.thread_id))
+        parts.extend((str(key.user_id), key.destiny))
+        return ":".join(parts)
+
+    async def _read(self, key: StorageKey, field: str) -> Optional[bytes]:
+        """
+        Read one field of the chat hash; None when it is absent or Redis is unavailable.
+        """
+        client = await self.redis_connector.get_client(db=self.db)
+        if client is None:
+            return None
+        try:
+            return await client.hget(self.build_key(key), field)
+        except RedisError as e:
+            self.logger.error(f"Redis error while reading FSM {field} of chat {key.chat_id}: {e}")
+            return None
+
+    async def _write(self, key: StorageKey, field: str, value: Optional[bytes]) -> None:
+        """
+        Set or delete one field of the chat hash and refresh its TTL in one round trip.
+        """
+        client = await self.redis_connector.get_client(db=self.db)
+        if client is None:
+            self.logger.warning(f"Redis FSM storage (DB={self.db}) is unavailable, {field} of chat {key.chat_id} not saved")
+            return
+        redis_key = self.build_key(key)
+        try:
+            async with client.pipeline(transaction=True) as pipe:
+                if value is None:
+                    pipe.hdel(redis_key, field)
+                else:
+                    pipe.hset(redis_key, field, value)
+                    if self.ttl:
+                        pipe.expire(redis_key, self.ttl)
+                await pipe.execute()
+        except RedisError as e:
+            self.logger.error(f"Redis error while saving FSM {field} of chat {key.chat_id}: {e}")
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        if isinstance(state, State):
+            state = state.state
+        await self._write(key, "state", state.encode() if state is not None else None)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        state = await self._read(key, "state")
+        return state.decode() if state is not None else None
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        await self._write(key, "data", msgpack.packb(dict(data), use_bin_type=True) if data else None)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        data = await self._read(key, "data")
+        return msgpack.unpackb(data, raw=False) if data is not None else {}
+
+    async def close(self) -> None:
+        await self.redis_connector.close_conn(self.db)
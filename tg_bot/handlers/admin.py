@@ -0,0 +1,62 @@
+from typing import Optional
+
+from aiogram import Router, types
+from aiogram.filters import BaseFilter, Command, CommandObject
+
+from tg_bot.locals.extractor_translations import translator
+
+
+class IsAdmin(BaseFilter):
+    """Passes only updates from the administrator, as resolved by the user context middleware"""
+
+    async def __call__(self, message: types.Message, user_status: Optional[str] = None) -> bool:
+        return user_status == "admin"
+
+
+router = Router()
+router.message.filter(IsAdmin())
+
+
+@router.message(Command('broadcast'))
+async def start_broadcast(message: types.Message, command: CommandObject, broadcaster, **kwargs):
+    lang = kwargs["user_lang"]
+    if not command.args:
+        await message.reply(text=translator.get("broadcast_usage", lang))
+        return
+    broadcast_id = await broadcaster.start(command.args)
+    if broadcast_id is None:
+        await message.reply(text=translator.get("broadcast_running", lang))
+        return
+    await message.reply(text=translator.get("broadcast_started", lang, broadcast_id=broadcast_id))
+
+
+@router.message(Command('broadcast_status'))
+async def broadcast_status(message: types.Message, broadcaster, **kwargs):
+    lang = kwargs["user_lang"]
+    status = await broadcaster.status()
+    if status is None:
+        await message.reply(text=translator.get("broadcast_none", lang))
+        return
+    await message.reply(text=translator.get("broadcast_status", lang, **status))
+
+
+@router.message(Command('utm_stats'))
+async def utm_stats(message: types.Message, command: CommandObject, utm_analytics, **kwargs):
+    lang = kwargs["user_lang"]
+    days = int(command.args) if command.args and command.args.isdigit() else None
+    stats = await utm_analytics.stats(days)
+    if not stats:
+        await message.reply(text=translator.get("utm_stats_empty", lang))
+        return
+    lines = [translator.get("utm_stats_header", lang, days=days or "∞")]
+    for row in stats:
+        conversion = f"{row['conversion']:.1%}" if row["conversion"] is not None else "—"
+        lines.append(translator.get("utm_stats_row", lang, **{**row, "conversion": conversion}))
+    await message.reply(text="\n".join(lines))
+
+
+@router.message(Command('media_warmup'))
+async def media_warmup(message: types.Message, media_registry, **kwargs):
+    lang = kwargs["user_lang"]
+    uploaded, known = await media_registry.warm_up(message.chat.id)
+    await message.reply(text=translator.get("media_warmup_done", lang, uploaded=uploaded, known=known))
@@ -1,4 +1,5 @@
 import asyncio
+from dataclasses import replace
 from typing import Dict
 from aiogram import F, Router, types
 from aiogram.fsm.context import FSMContext
@@ -6,8 +7,11 @@ from aiogram.types import (
     FSInputFile,
     Message
 )
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 
+from tg_bot.ai_client import AIServiceUnavailable
+from tg_bot.handlers.registration import start_registration
+from tg_bot.keyboards import LANGUAGE, MENU
 from tg_bot.locals.extractor_translations import translator
 
 router = Router()
@@ -15,8 +19,6 @@ router = Router()
 
 @router.message(Command('start'))
 async def send_welcome(message: types.Message, **kwargs):
-    for key, value in kwargs.items():
-        print(f"{key=}: {value=}")
     #user_status = kwargs["user_status"]
     lang = kwargs["user_lang"]
     
@@ -29,15 +31,72 @@ async def send_welcome(message: types.Message, **kwargs):
 
 
 @router.message(Command('menu'))
-async def main_menu(message: types.Message, **kwargs):
-    await message.reply(text="Menu")
+async def main_menu(message: types.Message, keyboards, **kwargs):
+    lang = kwargs["user_lang"]
+    await message.reply(text=translator.get("menu", lang), reply_markup=keyboards.get("menu", lang))
 
 
 @router.message(Command('ask_ai'))
-async def main_menu(message: types.Message, **kwargs):
-    await message.reply(text="AI")
+async def ask_ai(message: types.Message, command: CommandObject, state: FSMContext, ai_client, **kwargs):
+    lang = kwargs["user_lang"]
+    profile = kwargs["user_context"].profile
+    if profile is None:
+        await message.reply(text=translator.get("registration_start_required", lang))
+        return
+    if not profile.has_credentials:
+        await start_registration(message, state, lang)
+        return
+    if not command.args:
+        await message.reply(text=translator.get("ask_ai_empty", lang))
+        return
+
+    reply = await message.reply(text=translator.get("ai_thinking", lang))
+    try:
+        task_id, _ = await ai_client.submit(
+            message.from_user.id,
+            command.args,
+            high_priority=kwargs.get("user_status") == "admin",
+        )
+    except AIServiceUnavailable:
+        await reply.edit_text(translator.get("ai_unavailable", lang))
+        return
+    ai_client.relay(task_id, reply, lang)
 
 
 @router.message(Command('change_language'))
-async def main_menu(message: types.Message, **kwargs):
-    await message.reply(text="change_language")
\ No newline at end of file
+async def change_language(message: types.Message, keyboards, **kwargs):
+    lang = kwargs["user_lang"]
+    await message.reply(text=translator.get("choose_language", lang), reply_markup=keyboards.get("languages", lang))
+
+
+@router.callback_query(MENU.filter({"ask_ai"}))
+async def menu_ask_ai(query: types.CallbackQuery, **kwargs):
+    await query.answer()
+    await query.message.answer(text=translator.get("ask_ai_empty", kwargs["user_lang"]))
+
+
+@router.callback_query(MENU.filter({"language"}))
+async def menu_change_language(query: types.CallbackQuery, keyboards, **kwargs):
+    lang = kwargs["user_lang"]
+    await query.answer()
+    await query.message.edit_text(text=translator.get("choose_language", lang), reply_markup=keyboards.get("languages", lang))
+
+
+@router.callback_query(LANGUAGE.filter())
+async def select_language(query: types.CallbackQuery, callback_value: str, keyboards, user_service,
+                          user_profile_cache, registration_buffer, user_context, **kwargs):
+    if callback_value not in keyboards.languages or user_context.profile is None:
+        await query.answer()
+        return
+    tg_id = query.from_user.id
+    if not await user_service.set_language(tg_id, callback_value):
+        # The user may still be waiting in the write-behind buffer.
+        await registration_buffer.flush()
+        if not await user_service.set_language(tg_id, callback_value):
+            await query.answer(text=translator.get("language_change_failed", kwargs["user_lang"]), show_alert=True)
+            return
+    user_context.replace_profile(user_profile_cache, replace(user_context.profile, lang=callback_value))
+    await query.answer(text=translator.get("language_changed", callback_value))
+    await query.message.edit_text(
+        text=translator.get("menu", callback_value), reply_markup=keyboards.get("menu", callback_value)
+    )
@@ -0,0 +1,109 @@
+import re
+from dataclasses import replace
+
+from aiogram import F, Router, types
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.filters import Command, StateFilter
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+
+from tg_bot.locals.extractor_translations import translator
+from tg_bot.passwords import MIN_PASSWORD_LENGTH
+
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+# Commands sent during the registration reach their own handlers instead of being taken for input.
+NOT_COMMAND = ~F.text.startswith("/")
+
+router = Router()
+
+
+class Registration(StatesGroup):
+    email = State()
+    password = State()
+    confirm_password = State()
+
+
+async def start_registration(message: types.Message, state: FSMContext, lang: str):
+    await state.set_state(Registration.email)
+    await message.reply(text=translator.get("ask_ai_email", lang))
+
+
+async def _delete_password_message(message: types.Message):
+    """Passwords must not stay in the chat history"""
+    try:
+        await message.delete()
+    except TelegramBadRequest:
+        pass
+
+
+@router.message(StateFilter(Registration), Command('cancel'))
+async def cancel_registration(message: types.Message, state: FSMContext, **kwargs):
+    await state.clear()
+    await message.reply(text=translator.get("registration_cancelled", kwargs["user_lang"]))
+
+
+@router.message(Registration.email, F.text, NOT_COMMAND)
+async def enter_email(message: types.Message, state: FSMContext, email_index, **kwargs):
+    lang = kwargs["user_lang"]
+    email = message.text.strip().lower()
+    if len(email) > 254 or not EMAIL_PATTERN.match(email):
+        await message.reply(text=translator.get("invalid_email", lang))
+        return
+    if await email_index.is_taken(email):
+        await message.reply(text=translator.get("email_taken", lang))
+        return
+    await state.update_data(email=email)
+    await state.set_state(Registration.password)
+    await message.reply(text=translator.get("set_password", lang))
+
+
+@router.message(Registration.password, F.text, NOT_COMMAND)
+async def enter_password(message: types.Message, state: FSMContext, password_hasher, **kwargs):
+    lang = kwargs["user_lang"]
+    password = message.text
+    await _delete_password_message(message)
+    if len(password) < MIN_PASSWORD_LENGTH:
+        await message.answer(text=translator.get("password_too_short", lang, min_length=MIN_PASSWORD_LENGTH))
+        return
+    # Only the hash is kept in the FSM data; the confirmation is verified against it.
+    await state.update_data(password_hash=await password_hasher.hash(password))
+    await state.set_state(Registration.confirm_password)
+    await message.answer(text=translator.get("confirm_password", lang))
+
+
+@router.message(Registration.confirm_password, F.text, NOT_COMMAND)
+async def confirm_password(message: types.Message, state: FSMContext, password_hasher, email_index,
+                           user_service, user_profile_cache, registration_buffer, user_context, **kwargs):
+    lang = kwargs["user_lang"]
+    password = message.text
+    await _delete_password_message(message)
+    data = await state.get_data()
+    email, password_hash = data.get("email"), data.get("password_hash")
+    if email is None or password_hash is None:
+        # The FSM storage reads as empty while Redis is unavailable, so the data may be gone.
+        await state.set_data({})
+        await state.set_state(Registration.email)
+        await message.answer(text=translator.get("registration_restart", lang))
+        return
+    if not await password_hasher.verify(password, password_hash):
+        await state.set_state(Registration.password)
+        await message.answer(text=translator.get("passwords_mismatch", lang))
+        return
+    tg_id = message.from_user.id
+    saved = await user_service.set_credentials(tg_id, email, password_hash)
+    if not saved and registration_buffer.get_pending(tg_id) is not None:
+        # The user is still waiting in the write-behind buffer.
+        await registration_buffer.flush()
+        saved = await user_service.set_credentials(tg_id, email, password_hash)
+    if not saved:
+        if not await user_service.check_exist_user(tg_id):
+            await state.clear()
+            await message.answer(text=translator.get("registration_start_required", lang))
+            return
+        await state.set_state(Registration.email)
+        await message.answer(text=translator.get("email_taken", lang))
+        return
+    await email_index.add(email)
+    user_context.replace_profile(user_profile_cache, replace(user_context.profile, has_credentials=True))
+    await state.clear()
+    await message.answer(text=translator.get("registration_done", lang))
@@ -0,0 +1,174 @@
+import json
+from typing import Any, Callable, Collection, Dict, Optional, Sequence, Tuple, Union
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.filters import BaseFilter
+from aiogram.methods import TelegramMethod
+from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
+from aiohttp import FormData
+
+CALLBACK_DATA_LIMIT = 64
+
+
+class CallbackPrefix:
+    """
+    Compact callback data: a short prefix and a string value, e.g. ``l:ru``.
+
+    Unlike aiogram's CallbackData factories, nothing is validated or parsed
+    into a model; decoding is a ``startswith`` and a slice.
+    """
+    __slots__ = ("prefix", "_marker")
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self._marker = f"{prefix}:"
+
+    def pack(self, value: str) -> str:
+        data = self._marker + value
+        if len(data.encode()) > CALLBACK_DATA_LIMIT:
+            raise ValueError(f"Callback data {data!r} exceeds {CALLBACK_DATA_LIMIT} bytes")
+        return data
+
+    def unpack(self, data: Optional[str]) -> Optional[str]:
+        """
+        Return the value of callback data carrying this prefix, None for any other data.
+        """
+        if data is None or not data.startswith(self._marker):
+            return None
+        return data[len(self._marker):]
+
+    def filter(self, values: Optional[Collection[str]] = None) -> "CallbackValue":
+        return CallbackValue(self, values)
+
+
+class CallbackValue(BaseFilter):
+    """
+    Matches callback queries of a prefix and passes their value to the handler as ``callback_value``.
+    """
+
+    def __init__(self, prefix: CallbackPrefix, values: Optional[Collection[str]] = None):
+        """
+        :param prefix: Prefix the callback data must carry.
+        :param values: Accepted values; any value is accepted by default.
+        """
+        self.prefix = prefix
+        self.values = frozenset(values) if values is not None else None
+
+    async def __call__(self, query: CallbackQuery) -> Union[bool, Dict[str, Any]]:
+        value = self.prefix.unpack(query.data)
+        if value is None or (self.values is not None and value not in self.values):
+            return False
+        return {"callback_value": value}
+
+
+MENU = CallbackPrefix("m")
+LANGUAGE = CallbackPrefix("l")
+
+
+def build_menu(translator, lang: str, languages: Sequence[str]) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=translator.get("menu_ask_ai", lang), callback_data=MENU.pack("ask_ai"))],
+        [InlineKeyboardButton(text=translator.get("change_language", lang), callback_data=MENU.pack("language"))],
+    ])
+
+
+def build_languages(translator, lang: str, languages: Sequence[str]) -> InlineKeyboardMarkup:
+    # Every language is named in itself; the current one is checked.
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(
+            text=f"{'✓ ' if code == lang else ''}{translator.get('language_name', code)}",
+            callback_data=LANGUAGE.pack(code),
+        )]
+        for code in languages
+    ])
+
+
+KEYBOARDS: Dict[str, Callable[..., InlineKeyboardMarkup]] = {
+    "menu": build_menu,
+    "languages": build_languages,
+}
+
+
+class KeyboardRegistry:
+    """
+    Localized keyboards built once per language.
+
+    Every keyboard of ``builders`` is built for every language of the
+    translator at startup and again after each translation reload, so
+    handlers reuse a ready markup instead of building buttons and looking
+    texts up on every update. The JSON of each markup is serialized along
+    with it and sent as is by :class:`PrebuiltMarkupSession`.
+    """
+
+    def __init__(self, translator, builders: Optional[Dict[str, Callable[..., InlineKeyboardMarkup]]] = None):
+        """
+        Initialize the KeyboardRegistry instance and build the keyboards.
+
+        :param translator: Translator providing the languages and button texts.
+        :param builders: Keyboard builders by name, called with the translator, the language and all languages.
+        """
+        self.translator = translator
+        self.builders = builders if builders is not None else KEYBOARDS
+        self.languages: Tuple[str, ...] = ()
+        self._markups: Dict[Tuple[str, str], InlineKeyboardMarkup] = {}
+        self._serialized: Dict[int, Tuple[InlineKeyboardMarkup, str]] = {}
+        self.rebuild(translator)
+        translator.add_reload_listener(self.rebuild)
+
+    def rebuild(self, translator) -> None:
+        """
+        Build every keyboard for every language, replacing the previous set at once.
+        """
+        languages = tuple(sorted(translator.languages))
+        markups = {}
+        serialized = {}
+        for lang in languages:
+            for name, build in self.builders.items():
+                markup = build(translator, lang, languages)
+                markups[(name, lang)] = markup
+                serialized[id(markup)] = (markup, json.dumps(markup.model_dump(exclude_none=True)))
+        self._markups, self._serialized, self.languages = markups, serialized, languages
+
+    def get(self, name: str, lang: str) -> InlineKeyboardMarkup:
+        """
+        Return the keyboard in the language, or in the default language for an unknown one.
+        """
+        markup = self._markups.get((name, lang))
+        if markup is None:
+            markup = self._markups[(name, self.translator.default_lang)]
+        return markup
+
+    def serialized(self, markup: Any) -> Optional[str]:
+        """
+        Return the JSON of a markup built by the registry, None for any other object.
+        """
+        entry = self._serialized.get(id(markup))
+        # Markups of a previous build are no longer registered and are serialized normally.
+        if entry is None or entry[0] is not markup:
+            return None
+        return entry[1]
+
+
+class PrebuiltMarkupSession(AiohttpSession):
+    """
+    Aiohttp session sending the markups of a :class:`KeyboardRegistry` as their prebuilt JSON.
+
+    Other requests, and requests with any other markup, are encoded by aiogram as usual.
+    """
+
+    def __init__(self, keyboards: KeyboardRegistry, **kwargs):
+        """
+        :param keyboards: Registry whose markups are sent prebuilt.
+        :param kwargs: Arguments of :class:`AiohttpSession`.
+        """
+        super().__init__(**kwargs)
+        self.keyboards = keyboards
+
+    def build_form_data(self, bot: Bot, method: TelegramMethod) -> FormData:
+        serialized = self.keyboards.serialized(getattr(method, "reply_markup", None))
+        if serialized is None:
+            return super().build_form_data(bot, method)
+        form = super().build_form_data(bot, method.model_copy(update={"reply_markup": None}))
+        form.add_field("reply_markup", serialized)
+        return form
@@ -1,24 +1,145 @@
+import asyncio
+import functools
 import json
+import os
+import string
+import sys
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 from tg_bot.config.settings import TRANSLATIONS_FILE
 
 
+class Template:
+    """A translation with placeholders.
+
+    Rendered with ``str.format_map``, which formats in C without copying the
+    arguments; splitting the text into parts at compile time and joining
+    them in Python measured slower (see the translations scenario of the
+    load harness).
+    """
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def render(self, kwargs: Dict) -> str:
+        return self.text.format_map(kwargs)
+
+
+Entry = Union[str, Template]
+
+
 class Translator:
     def __init__(self, translations_file: str, default_lang: str = "en"):
+        self.translations_file = translations_file
         self.default_lang = default_lang
-        self.translations = self.load_translations(translations_file)
+        self._mtime: Optional[float] = None
+        self._reload_listeners: List[Callable[["Translator"], None]] = []
+        self.reload()
 
 
     def load_translations(self, file_path: str):
         with open(file_path, "r", encoding="utf-8") as file:
             return json.load(file)
-             
+
+
+    def compile(self, translations: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, Entry]]:
+        """
+        Build one flat table per language with the fallback to the default language already applied.
+
+        Placeholder-free texts are stored as interned constants, the others as pre-parsed templates.
+        """
+        languages = {lang for texts in translations.values() for lang in texts}
+        languages.add(self.default_lang)
+        tables = {}
+        for lang in languages:
+            table = {}
+            for key, texts in translations.items():
+                text = texts.get(lang)
+                if text is None:
+                    text = texts.get(self.default_lang, key)
+                table[sys.intern(key)] = self._compile_text(text)
+            tables[sys.intern(lang)] = table
+        return tables
+
+    @staticmethod
+    def _compile_text(text: str) -> Entry:
+        if any(field is not None for _, field, _, _ in string.Formatter().parse(text)):
+            return Template(text)
+        return sys.intern(text.format())
+
+
+    def reload(self) -> None:
+        """
+        Load and compile the translations file, then notify the reload listeners.
+        """
+        mtime = os.stat(self.translations_file).st_mtime
+        self.translations = self.load_translations(self.translations_file)
+        self._tables = self.compile(self.translations)
+        self._default_table = self._tables[self.default_lang]
+        self._mtime = mtime
+        for listener in self._reload_listeners:
+            listener(self)
+
+    @property
+    def languages(self) -> Tuple[str, ...]:
+        """
+        Codes of the languages with a translation table, the default one included.
+        """
+        return tuple(self._tables)
+
+    def reload_if_changed(self) -> bool:
+        """
+        Reload the translations if the file was modified since the last load.
+
+        :return: True if the translations were reloaded.
+        """
+        if os.stat(self.translations_file).st_mtime == self._mtime:
+            return False
+        self.reload()
+        return True
+
+    def add_reload_listener(self, listener: Callable[["Translator"], None]) -> None:
+        """
+        Register a callback invoked after every reload.
+        """
+        self._reload_listeners.append(listener)
+
+    async def watch(self, interval: float, logger) -> None:
+        """
+        Poll the translations file and hot-reload it when it changes.
+
+        :param interval: Time between two checks, in seconds.
+        :param logger: A logger instance for logging messages.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if self.reload_if_changed():
+                    logger.info(f"Translations reloaded from {self.translations_file}")
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to reload translations: {e}")
+
 
     def get(self, key: str, lang: str, **kwargs):
-        text = self.translations.get(key, {}).get(lang, None)
-        if text is None:
-            text = self.translations.get(key, {}).get(self.default_lang, key) 
-        return text.format(**kwargs)  
-    
+        entry = self._tables.get(lang, self._default_table).get(key)
+        if entry is None:
+            return key
+        if type(entry) is str:
+            return entry
+        return entry.render(kwargs)
+
+
+@functools.cache
+def get_translator() -> Translator:
+    """
+    Return the shared translator, loading the translations file on first use.
+    """
+    return Translator(TRANSLATIONS_FILE)
+
 
-translator = Translator(TRANSLATIONS_FILE)
\ No newline at end of file
+def __getattr__(name: str):
+    # The module-level ``translator`` is created on first access.
+    if name == "translator":
+        return get_translator()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
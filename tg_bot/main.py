@@ -1,32 +1,103 @@
 import asyncio
 
-from tg_bot.bot import *
-from tg_bot.middleware.new_user_middleware import NewUserMiddleware
-from tg_bot.middleware.language_middleware import LanguageMiddleware
-from tg_bot.handlers.commands import router
-
-from tg_bot.config.settings import bot_logger
+from tg_bot.bot import container
+from tg_bot.config import settings
 
 
 
 async def main():
-    await bot.delete_webhook(drop_pending_updates=True)
-    dp.update.outer_middleware(NewUserMiddleware(redis_connector,user_service))
-    dp.update.outer_middleware(LanguageMiddleware(redis_connector,user_service))
-    dp.include_router(router)
+    from redis.exceptions import RedisError
+
+    from tg_bot.locals.extractor_translations import get_translator
+    from tg_bot.webhook import run_webhook
+
+    bot_logger = container.logger
+    bot_settings = settings.bot_settings
+    metrics_settings = settings.metrics_settings
+    bot = container.bot
+    dp = container.dp
+    scheduler = container.update_scheduler
+    redis_connector = container.redis_connector
 
-    redis_client = redis_connector.get_client(db=0)
+    redis_client = await redis_connector.get_client(db=0)
     if not redis_client:
         bot_logger.error("Не удалось подключиться к Redis. Завершаем работу бота.")
         return
-    
+
+    loop_lag_monitor = None
+    if metrics_settings.METRICS_ENABLED:
+        from tg_bot.metrics import PENDING_UPDATES, EventLoopLagMonitor, start_metrics_server
+
+        database = container.database
+        start_metrics_server(
+            metrics_settings.METRICS_HOST,
+            metrics_settings.METRICS_PORT,
+            [database["pool_metrics"], database["read_pool_metrics"]],
+        )
+        loop_lag_monitor = EventLoopLagMonitor(metrics_settings.METRICS_LOOP_LAG_INTERVAL)
+        loop_lag_monitor.start()
+        PENDING_UPDATES.set_function(lambda: scheduler.pending)
+    redis_connector.start_health_checks()
+    container.fsm_redis_connector.start_health_checks()
+    container.user_profile_cache.start()
+    container.registration_buffer.start()
+    container.utm_analytics.start()
+    if settings.notification_settings.NOTIFICATIONS_ENABLED:
+        container.notification_dispatcher.start()
     try:
-        bot_logger.info("Бот запущен. Нажмите Command+C для остановки.")
-        await dp.start_polling(bot)
-    except KeyboardInterrupt:
+        await container.broadcaster.resume()
+    except (ConnectionError, RedisError) as e:
+        bot_logger.error(f"Не удалось возобновить рассылку: {e}")
+    try:
+        await container.email_index.warm(bot_settings.EMAIL_INDEX_CHUNK_SIZE)
+    except Exception as e:
+        bot_logger.error(f"Не удалось загрузить email-адреса в Redis: {e}")
+    if bot_settings.TRANSLATIONS_RELOAD_INTERVAL > 0:
+        translations_watcher = asyncio.create_task(
+            get_translator().watch(bot_settings.TRANSLATIONS_RELOAD_INTERVAL, bot_logger)
+        )
+    else:
+        translations_watcher = None
+    scheduler.start()
+    try:
+        if bot_settings.BOT_MODE == "webhook":
+            bot_logger.info("Бот запущен в режиме webhook.")
+            await run_webhook(scheduler, bot_settings, bot_logger)
+        else:
+            await bot.delete_webhook(drop_pending_updates=bot_settings.BOT_DROP_PENDING_UPDATES)
+            bot_logger.info("Бот запущен. Нажмите Command+C для остановки.")
+            await scheduler.poll(dp.resolve_used_update_types(), timeout=bot_settings.POLLING_TIMEOUT)
+    except (KeyboardInterrupt, asyncio.CancelledError):
         bot_logger.info("Остановка бота по запросу пользователя...")
     finally:
+        if translations_watcher is not None:
+            translations_watcher.cancel()
+        await scheduler.stop(bot_settings.UPDATE_SHUTDOWN_TIMEOUT)
+        if loop_lag_monitor is not None:
+            await loop_lag_monitor.stop()
+        await container.broadcaster.stop()
+        if settings.notification_settings.NOTIFICATIONS_ENABLED:
+            await container.notification_dispatcher.stop()
+        await container.ai_client.close()
+        container.password_hasher.close()
+        await container.registration_buffer.stop()
+        await container.utm_analytics.stop()
+        await container.user_profile_cache.stop()
         await redis_connector.close_conn()
+        await container.fsm_redis_connector.close_conn()
+        await bot.session.close()
+
+
+def run():
+    """Run the bot, on uvloop when serving webhooks and uvloop is installed."""
+    if settings.bot_settings.BOT_MODE == "webhook":
+        try:
+            import uvloop
+        except ImportError:
+            container.logger.warning("uvloop is not installed, falling back to the default event loop.")
+        else:
+            return uvloop.run(main())
+    asyncio.run(main())
 
 if __name__ == '__main__':
-    asyncio.run(main())
\ No newline at end of file
+    run()
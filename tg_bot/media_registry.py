@@ -0,0 +1,249 @@
+import asyncio
+import hashlib
+import os
+import weakref
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple, Union
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, Message
+from redis.exceptions import RedisError
+
+KIND_BY_EXTENSION = {
+    ".jpg": "photo",
+    ".jpeg": "photo",
+    ".png": "photo",
+    ".webp": "photo",
+    ".gif": "animation",
+    ".mp4": "video",
+    ".mov": "video",
+    ".mp3": "audio",
+    ".m4a": "audio",
+}
+
+
+class MediaRegistry:
+    """
+    Sends local media files by Telegram file_id, uploading each content only once.
+
+    Files are identified by the SHA-256 of their bytes. The file_id returned
+    by the first upload is stored in Redis and in the media_files table and
+    looked up in that order (after an in-process dict) on later sends, so a
+    file is uploaded once per bot, not once per message or per process.
+    A file is rehashed only when its size or mtime changes; the file_ids of
+    its previous content are then forgotten and the new content is uploaded
+    on its next send. A file_id rejected by Telegram is dropped and the file
+    uploaded again.
+    """
+    KEY_TEMPLATE = "media:file_id:{kind}:{digest}"
+
+    def __init__(self, bot: Bot, media_file_service, redis_connector, logger,
+                 media_dir: Union[str, Path], redis_db: int = 0,
+                 record_cache_lookup: Optional[Callable[[str, str, bool], None]] = None):
+        """
+        Initialize the MediaRegistry instance.
+
+        :param bot: Bot the media is sent with; file_ids are only valid for this bot.
+        :param media_file_service: Service persisting the file_ids in the database.
+        :param redis_connector: Connector used to obtain Redis clients.
+        :param logger: A logger instance for logging messages.
+        :param media_dir: Directory relative media paths are resolved against.
+        :param redis_db: Redis database index holding the file_ids.
+        :param record_cache_lookup: Callback counting the hits and misses of each lookup tier, if any.
+        """
+        self.bot = bot
+        self.media_file_service = media_file_service
+        self.redis_connector = redis_connector
+        self.logger = logger
+        self.media_dir = Path(media_dir)
+        self.redis_db = redis_db
+        self.record_cache_lookup = record_cache_lookup or (lambda cache, layer, hit: None)
+        self._file_ids: Dict[Tuple[str, str], str] = {}
+        self._digests: Dict[Path, Tuple[int, int, str]] = {}
+        # Each lock is dropped once no send is uploading or waiting for its content.
+        self._upload_locks: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+
+    def key(self, digest: str, kind: str) -> str:
+        return self.KEY_TEMPLATE.format(kind=kind, digest=digest)
+
+    def resolve(self, path: Union[str, Path]) -> Path:
+        """
+        Return the absolute path of a media file, relative paths being taken from ``media_dir``.
+        """
+        path = Path(path)
+        return path if path.is_absolute() else self.media_dir / path
+
+    @staticmethod
+    def kind_for(path: Path) -> str:
+        """
+        Guess the send method of a file from its extension; unknown extensions are sent as documents.
+        """
+        return KIND_BY_EXTENSION.get(path.suffix.lower(), "document")
+
+    @staticmethod
+    def _hash_file(path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    async def digest(self, path: Path) -> str:
+        """
+        Return the content hash of the file, rehashing it only if its size or mtime changed.
+
+        When the content of a known file changed, the file_ids of the old content are invalidated.
+        """
+        stat = os.stat(path)
+        cached = self._digests.get(path)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+        digest = await asyncio.to_thread(self._hash_file, path)
+        self._digests[path] = (stat.st_mtime_ns, stat.st_size, digest)
+        if cached is not None and cached[2] != digest:
+            self.logger.info(f"Media file {path} changed, forgetting its previous file_ids")
+            await self.invalidate(cached[2])
+        return digest
+
+    async def get_file_id(self, digest: str, kind: str) -> Optional[str]:
+        """
+        Look the file_id of the content up in memory, then Redis, then the database.
+        """
+        file_id = self._file_ids.get((digest, kind))
+        self.record_cache_lookup("media", "local", file_id is not None)
+        if file_id is not None:
+            return file_id
+
+        redis_client = await self.redis_connector.get_client(db=self.redis_db)
+        if redis_client is not None:
+            try:
+                file_id = await redis_client.get(self.key(digest, kind))
+            except RedisError as e:
+                self.logger.error(f"Redis error while looking up a media file_id: {e}")
+            self.record_cache_lookup("media", "redis", file_id is not None)
+            if file_id is not None:
+                self._file_ids[(digest, kind)] = file_id
+                return file_id
+
+        file_id = await self.media_file_service.get_file_id(digest, kind)
+        if file_id is not None:
+            await self._remember(digest, kind, file_id)
+        return file_id
+
+    async def _remember(self, digest: str, kind: str, file_id: str) -> None:
+        self._file_ids[(digest, kind)] = file_id
+        redis_client = await self.redis_connector.get_client(db=self.redis_db)
+        if redis_client is not None:
+            try:
+                await redis_client.set(self.key(digest, kind), file_id)
+            except RedisError as e:
+                self.logger.error(f"Redis error while storing a media file_id: {e}")
+
+    async def invalidate(self, digest: str, kind: Optional[str] = None) -> None:
+        """
+        Forget the file_ids of the content, of one kind or of every kind.
+        """
+        kinds = [kind] if kind is not None else sorted(set(KIND_BY_EXTENSION.values()) | {"document"})
+        for name in kinds:
+            self._file_ids.pop((digest, name), None)
+        redis_client = await self.redis_connector.get_client(db=self.redis_db)
+        if redis_client is not None:
+            try:
+                await redis_client.delete(*(self.key(digest, name) for name in kinds))
+            except RedisError as e:
+                self.logger.error(f"Redis error while invalidating media file_ids: {e}")
+        await self.media_file_service.delete_file_ids(digest, kind)
+
+    async def _send(self, chat_id: int, kind: str, media: Union[str, FSInputFile], **kwargs) -> Message:
+        return await getattr(self.bot, f"send_{kind}")(chat_id, **{kind: media}, **kwargs)
+
+    @staticmethod
+    def _file_id_of(message: Message, kind: str) -> str:
+        media = getattr(message, kind)
+        # Photos come back in several sizes; the largest one is the original.
+        return media[-1].file_id if kind == "photo" else media.file_id
+
+    async def send(self, chat_id: int, path: Union[str, Path], kind: Optional[str] = None, **kwargs) -> Message:
+        """
+        Send a local media file, by file_id when the content was uploaded before.
+
+        :param chat_id: Chat to send the file to.
+        :param path: Path of the file, absolute or relative to ``media_dir``.
+        :param kind: Send method: photo, video, animation, audio or document. Guessed from the extension by default.
+        :param kwargs: Extra arguments of the send method, e.g. caption or reply_markup.
+        :return: The sent message.
+        """
+        path = self.resolve(path)
+        kind = kind or self.kind_for(path)
+        digest = await self.digest(path)
+        file_id = await self.get_file_id(digest, kind)
+        if file_id is not None:
+            try:
+                return await self._send(chat_id, kind, file_id, **kwargs)
+            except TelegramBadRequest as e:
+                if "file identifier" not in e.message.lower() and "file reference" not in e.message.lower():
+                    raise
+                self.logger.warning(f"Telegram rejected the file_id of {path}, uploading it again: {e}")
+                await self.invalidate(digest, kind)
+
+        # Concurrent first sends of the same content wait for a single upload.
+        upload_lock = self._upload_locks.get((digest, kind))
+        if upload_lock is None:
+            upload_lock = self._upload_locks[(digest, kind)] = asyncio.Lock()
+        async with upload_lock:
+            file_id = self._file_ids.get((digest, kind))
+            if file_id is not None:
+                return await self._send(chat_id, kind, file_id, **kwargs)
+            message = await self._send(chat_id, kind, FSInputFile(path), **kwargs)
+            file_id = self._file_id_of(message, kind)
+            await self.media_file_service.save_file_id(digest, kind, file_id, str(path))
+            await self._remember(digest, kind, file_id)
+            self.logger.info(f"Uploaded media file {path} ({kind})")
+            return message
+
+    async def warm_up(self, chat_id: int) -> Tuple[int, int]:
+        """
+        Upload every file of ``media_dir`` whose content has no file_id yet.
+
+        Each file is sent silently to the chat, which Telegram requires to
+        issue a file_id, and the message is deleted right away.
+
+        :param chat_id: Chat used for the uploads, e.g. the administrator's.
+        :return: The numbers of uploaded and already known files.
+        """
+        uploaded = known = 0
+        paths = sorted(path for path in self.media_dir.rglob("*") if path.is_file() and not path.name.startswith("."))
+        for path in paths:
+            kind = self.kind_for(path)
+            if await self.get_file_id(await self.digest(path), kind) is not None:
+                known += 1
+                continue
+            message = await self.send(chat_id, path, kind, disable_notification=True)
+            uploaded += 1
+            try:
+                await self.bot.delete_message(message.chat.id, message.message_id)
+            except TelegramBadRequest as e:
+                self.logger.warning(f"Could not delete the warm-up message of {path}: {e}")
+        self.logger.info(f"Media warm-up done: {uploaded} uploaded, {known} already known")
+        return uploaded, known
+
+
+async def main() -> None:
+    """
+    Pre-upload the media files at deploy time: ``python -m tg_bot.media_registry``.
+    """
+    from tg_bot.bot import container
+    from tg_bot.config import settings
+
+    chat_id = settings.bot_settings.MEDIA_WARMUP_CHAT_ID or int(settings.env_vars['ADMIN_ID'])
+    try:
+        await container.media_registry.warm_up(chat_id)
+    finally:
+        await container.redis_connector.close_conn()
+        await container.bot.session.close()
+        await container.database["engine"].dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
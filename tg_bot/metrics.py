@@ -0,0 +1,212 @@
+import asyncio
+import functools
+import inspect
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+import redis.asyncio as redis
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, REGISTRY
+from redis.asyncio.client import Pipeline
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+UPDATE_LATENCY = Histogram(
+    "bot_update_seconds", "Time to process an update, middlewares included", ["event_type"], buckets=LATENCY_BUCKETS
+)
+HANDLER_LATENCY = Histogram(
+    "bot_handler_seconds", "Time spent in a handler", ["handler", "command"], buckets=LATENCY_BUCKETS
+)
+REDIS_LATENCY = Histogram(
+    "bot_redis_command_seconds", "Latency of Redis commands and pipelines", ["command"], buckets=LATENCY_BUCKETS
+)
+DB_LATENCY = Histogram(
+    "bot_db_call_seconds", "Latency of database service calls", ["service", "operation"], buckets=LATENCY_BUCKETS
+)
+DB_POOL_WAIT = Histogram(
+    "bot_db_pool_wait_seconds", "Time spent waiting for a pooled connection", ["engine"], buckets=LATENCY_BUCKETS
+)
+TELEGRAM_LATENCY = Histogram(
+    "bot_telegram_request_seconds", "Latency of Telegram Bot API requests", ["method"], buckets=LATENCY_BUCKETS
+)
+CACHE_LOOKUPS = Counter(
+    "bot_cache_lookups_total", "Cache lookups by cache layer and result", ["cache", "layer", "result"]
+)
+EVENT_LOOP_LAG = Histogram(
+    "bot_event_loop_lag_seconds", "Delay of a timer callback beyond its scheduled time",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+PENDING_UPDATES = Gauge("bot_pending_updates", "Updates queued or being processed by the update scheduler")
+
+_trace: ContextVar[Optional[List[Tuple[str, str, float]]]] = ContextVar("trace", default=None)
+
+
+def observe(histogram: Histogram, stage: str, name: str, seconds: float, *labels: str) -> None:
+    """
+    Record a timing in the histogram and, if the current update is traced, in its trace.
+
+    :param histogram: Histogram receiving the observation.
+    :param stage: Stage shown in the trace (redis, db, telegram, handler).
+    :param name: Operation shown in the trace.
+    :param seconds: Measured duration.
+    :param labels: Label values of the histogram.
+    """
+    histogram.labels(*labels).observe(seconds)
+    spans = _trace.get()
+    if spans is not None:
+        spans.append((stage, name, seconds))
+
+
+@contextmanager
+def trace(sample_rate: float) -> Iterator[Optional[List[Tuple[str, str, float]]]]:
+    """
+    Collect the spans recorded inside the block for a sampled fraction of calls.
+
+    :param sample_rate: Share of blocks that are traced, between 0 and 1.
+    :return: The list the spans are appended to, or None if the block is not sampled.
+    """
+    if sample_rate <= 0 or random.random() >= sample_rate:
+        yield None
+        return
+    spans: List[Tuple[str, str, float]] = []
+    token = _trace.set(spans)
+    try:
+        yield spans
+    finally:
+        _trace.reset(token)
+
+
+def record_cache_lookup(cache: str, layer: str, hit: bool) -> None:
+    CACHE_LOOKUPS.labels(cache, layer, "hit" if hit else "miss").inc()
+
+
+class InstrumentedPipeline(Pipeline):
+    """Pipeline whose round trips are timed under the ``PIPELINE`` command label."""
+
+    async def execute(self, raise_on_error: bool = True) -> List[Any]:
+        started = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            observe(REDIS_LATENCY, "redis", "PIPELINE", time.perf_counter() - started, "PIPELINE")
+
+
+class InstrumentedRedis(redis.Redis):
+    """Redis client recording the latency of every command and pipeline."""
+
+    async def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            command = str(args[0]).upper()
+            observe(REDIS_LATENCY, "redis", command, time.perf_counter() - started, command)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None) -> Pipeline:
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+class InstrumentedService:
+    """
+    Proxy timing every coroutine method of a database service.
+
+    Attribute access is forwarded to the wrapped service, so the proxy can
+    be passed wherever the service is expected.
+    """
+
+    def __init__(self, service, name: str):
+        """
+        :param service: The wrapped service.
+        :param name: Label of the service in the metrics.
+        """
+        self._service = service
+        self._name = name
+
+    def __getattr__(self, attribute: str):
+        value = getattr(self._service, attribute)
+        if not inspect.iscoroutinefunction(value):
+            return value
+
+        @functools.wraps(value)
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await value(*args, **kwargs)
+            finally:
+                observe(DB_LATENCY, "db", attribute, time.perf_counter() - started, self._name, attribute)
+
+        setattr(self, attribute, timed)
+        return timed
+
+
+class PoolMetricsCollector:
+    """Exports the counters of :class:`~tg_bot.db.pool_metrics.PoolMetrics` instances."""
+
+    def __init__(self, pool_metrics: Iterable):
+        unique = {id(metrics): metrics for metrics in pool_metrics if metrics is not None}
+        self.pool_metrics = list(unique.values())
+        for metrics in self.pool_metrics:
+            metrics.add_wait_listener(
+                lambda seconds, name=metrics.name: DB_POOL_WAIT.labels(name).observe(seconds)
+            )
+
+    def collect(self):
+        capacity = GaugeMetricFamily("bot_db_pool_capacity", "Connections the pool hands out at once", labels=["engine"])
+        in_use = GaugeMetricFamily("bot_db_pool_in_use", "Connections currently checked out", labels=["engine"])
+        peak = GaugeMetricFamily("bot_db_pool_peak_in_use", "Highest number of connections checked out", labels=["engine"])
+        checkouts = CounterMetricFamily("bot_db_pool_checkouts", "Connection checkouts", labels=["engine"])
+        saturated = CounterMetricFamily(
+            "bot_db_pool_saturated_checkouts", "Checkouts that left no connection free", labels=["engine"]
+        )
+        for metrics in self.pool_metrics:
+            snapshot = metrics.snapshot()
+            capacity.add_metric([metrics.name], snapshot["capacity"])
+            in_use.add_metric([metrics.name], snapshot["in_use"])
+            peak.add_metric([metrics.name], snapshot["peak_in_use"])
+            checkouts.add_metric([metrics.name], snapshot["checkouts"])
+            saturated.add_metric([metrics.name], snapshot["saturated_checkouts"])
+        return [capacity, in_use, peak, checkouts, saturated]
+
+
+class EventLoopLagMonitor:
+    """
+    Measures event-loop lag: how late a sleep of ``interval`` seconds wakes up.
+    """
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            EVENT_LOOP_LAG.observe(max(time.perf_counter() - started - self.interval, 0.0))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def start_metrics_server(host: str, port: int, pool_metrics: Iterable = ()) -> None:
+    """
+    Serve /metrics on a local port from a background thread.
+
+    :param host: Interface to bind, normally localhost.
+    :param port: Port of the endpoint.
+    :param pool_metrics: PoolMetrics instances to export.
+    """
+    REGISTRY.register(PoolMetricsCollector(pool_metrics))
+    start_http_server(port, addr=host)
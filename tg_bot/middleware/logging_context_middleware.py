@@ -0,0 +1,28 @@
+from aiogram import BaseMiddleware
+from typing import Dict, Any, Callable, Awaitable
+
+from infrastructure.structured_logging import log_context
+
+
+class LoggingContextMiddleware(BaseMiddleware):
+    """
+    Outer middleware that tags every log record of an update with its update_id and tg_id.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[..., Awaitable[Any]],
+        event: Any,
+        data: Dict[str, Any]
+    ) -> Any:
+        """
+        Runs the rest of the chain inside the logging context of the update.
+
+        :param handler: The next middleware or handler in the chain.
+        :param event: The update being processed.
+        :param data: A dictionary containing event data.
+        :return: The result of the next handler in the chain.
+        """
+        user = data.get('event_from_user')
+        with log_context(getattr(event, 'update_id', None), user.id if user else None):
+            return await handler(event, data)
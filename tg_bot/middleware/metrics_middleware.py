@@ -0,0 +1,90 @@
+import time
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from typing import Dict, Any, Callable, Awaitable
+
+from tg_bot.metrics import HANDLER_LATENCY, TELEGRAM_LATENCY, UPDATE_LATENCY, observe, trace
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """
+    Outer middleware timing whole updates and tracing a sampled share of them.
+
+    A traced update collects the Redis, database, handler and Telegram spans
+    recorded while it is processed and logs them as one line when it ends.
+    """
+
+    def __init__(self, logger, trace_sample_rate: float = 0.0):
+        """
+        Initializes the UpdateMetricsMiddleware.
+
+        :param logger: A logger instance the traces are written to.
+        :param trace_sample_rate: Share of updates that are traced, between 0 and 1.
+        """
+        super().__init__()
+        self.logger = logger
+        self.trace_sample_rate = trace_sample_rate
+
+    async def __call__(
+        self,
+        handler: Callable[..., Awaitable[Any]],
+        event: Any,
+        data: Dict[str, Any]
+    ) -> Any:
+        """
+        Runs the rest of the chain and records its duration.
+
+        :param handler: The next middleware or handler in the chain.
+        :param event: The update being processed.
+        :param data: A dictionary containing event data.
+        :return: The result of the next handler in the chain.
+        """
+        event_type = getattr(event, 'event_type', 'unknown')
+        started = time.perf_counter()
+        with trace(self.trace_sample_rate) as spans:
+            try:
+                return await handler(event, data)
+            finally:
+                elapsed = time.perf_counter() - started
+                UPDATE_LATENCY.labels(event_type).observe(elapsed)
+                if spans is not None:
+                    timeline = ", ".join(f"{stage}:{name}={seconds * 1000:.1f}ms" for stage, name, seconds in spans)
+                    self.logger.info(f"Trace of {event_type} update: total={elapsed * 1000:.1f}ms [{timeline}]")
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Inner middleware recording the latency of each handler, labelled by handler and command.
+
+    The command label comes from the CommandObject injected by the Command
+    filter, so only registered commands become label values.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[..., Awaitable[Any]],
+        event: Any,
+        data: Dict[str, Any]
+    ) -> Any:
+        handler_object = data.get('handler')
+        name = getattr(getattr(handler_object, 'callback', None), '__name__', 'unknown')
+        command = getattr(data.get('command'), 'command', "")
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            observe(HANDLER_LATENCY, "handler", name, time.perf_counter() - started, name, command)
+
+
+class TelegramMetricsMiddleware(BaseRequestMiddleware):
+    """
+    Bot session middleware recording the latency of every Bot API request.
+    """
+
+    async def __call__(self, make_request, bot, method):
+        name = type(method).__name__
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        finally:
+            observe(TELEGRAM_LATENCY, "telegram", name, time.perf_counter() - started, name)
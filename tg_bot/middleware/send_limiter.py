@@ -0,0 +1,79 @@
+import asyncio
+import time
+from typing import Dict
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+
+
+class Pacer:
+    """
+    Spaces out events to at most ``rate`` per second while allowing bursts of ``burst`` events.
+    """
+    __slots__ = ("interval", "burst_window", "next_at")
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.interval = 1 / rate
+        self.burst_window = (burst - 1) * self.interval
+        self.next_at = 0.0
+
+    def reserve(self) -> float:
+        """
+        Reserve a slot and return how long the caller has to wait for it, in seconds.
+        """
+        now = time.monotonic()
+        slot = max(self.next_at, now - self.burst_window)
+        self.next_at = slot + self.interval
+        return max(slot - now, 0.0)
+
+
+class OutboundRateLimiter(BaseRequestMiddleware):
+    """
+    Bot session middleware keeping outgoing chat requests under Telegram's limits.
+
+    Every API method addressed to a chat waits for a slot of the global pacer
+    (~30 messages per second); the ``send*`` methods first wait for the chat's
+    own pacer (~1 message per second), which Telegram applies to new messages
+    only, so edits and deletions are not held back. The global slot is taken
+    only once the chat slot is due, so a message waiting for a busy chat does
+    not hold a global slot other chats could have used. Methods without a
+    chat, such as getUpdates, are not delayed.
+    """
+
+    def __init__(self, global_rate: float = 30, chat_rate: float = 1, chat_burst: int = 1,
+                 max_tracked_chats: int = 10_000):
+        """
+        Initialize the OutboundRateLimiter instance.
+
+        :param global_rate: Maximum number of chat requests per second for the whole bot.
+        :param chat_rate: Maximum number of requests per second to a single chat.
+        :param chat_burst: Number of requests a chat may receive back to back.
+        :param max_tracked_chats: Number of chat pacers kept before idle ones are dropped.
+        """
+        self.global_pacer = Pacer(global_rate, burst=max(int(global_rate), 1))
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_tracked_chats = max_tracked_chats
+        self._chat_pacers: Dict[int | str, Pacer] = {}
+
+    def _chat_pacer(self, chat_id) -> Pacer:
+        pacer = self._chat_pacers.get(chat_id)
+        if pacer is None:
+            if len(self._chat_pacers) >= self.max_tracked_chats:
+                now = time.monotonic()
+                self._chat_pacers = {
+                    key: value for key, value in self._chat_pacers.items() if value.next_at > now
+                }
+            pacer = self._chat_pacers[chat_id] = Pacer(self.chat_rate, self.chat_burst)
+        return pacer
+
+    async def __call__(self, make_request, bot, method):
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is not None:
+            if method.__api_method__.startswith("send"):
+                delay = self._chat_pacer(chat_id).reserve()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            delay = self.global_pacer.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        return await make_request(bot, method)
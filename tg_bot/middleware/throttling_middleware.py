@@ -0,0 +1,101 @@
+from aiogram import BaseMiddleware
+from aiogram.exceptions import TelegramAPIError
+from typing import Dict, Any, Callable, Awaitable, List, Optional
+
+from infrastructure.rate_limiter import Bucket
+from infrastructure.user_profile_cache import LocalTTLCache
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Outer middleware dropping updates from users who exceed their rate limits.
+
+    Every update is charged to a per-user bucket, a global bucket and, for
+    expensive commands, a per-user command bucket, all checked atomically in
+    Redis. A user rejected by their own or a command bucket is remembered
+    locally until the returned retry-after has passed, so a flood from that
+    user is dropped without any Redis call. Updates refused by the global
+    bucket are dropped without blocking their sender: the spike is not theirs.
+    Dropped callback queries are still answered, so the button stops loading.
+    """
+
+    def __init__(self, limiter, settings, logger):
+        """
+        Initializes the ThrottlingMiddleware.
+
+        :param limiter: TokenBucketLimiter checking the buckets.
+        :param settings: ThrottlingSettings with the bucket rates and capacities.
+        :param logger: A logger instance for logging messages.
+        """
+        super().__init__()
+        self.limiter = limiter
+        self.settings = settings
+        self.logger = logger
+        self.global_bucket = Bucket("throttle:global", settings.THROTTLE_GLOBAL_RATE, settings.THROTTLE_GLOBAL_BURST)
+        self._blocked = LocalTTLCache(maxsize=100_000, ttl=settings.THROTTLE_LOCAL_BLOCK_MAX)
+
+    async def __call__(
+        self,
+        handler: Callable[..., Awaitable[Any]],
+        event: Any,
+        data: Dict[str, Any]
+    ) -> Any:
+        """
+        Charges the update to its buckets and drops it if any of them is empty.
+
+        :param handler: The next middleware or handler in the chain.
+        :param event: The event being processed.
+        :param data: A dictionary containing event data.
+        :return: The result of the next handler, or None if the update was dropped.
+        """
+        user = data.get('event_from_user')
+        if user is None:
+            return await handler(event, data)
+
+        if self._blocked.get(user.id) is not None:
+            return await self._drop(event)
+
+        retry_after, refused = await self.limiter.acquire(self._buckets(user.id, event))
+        if retry_after > 0:
+            if refused is not self.global_bucket:
+                self._blocked.set(user.id, True, ttl=min(retry_after, self.settings.THROTTLE_LOCAL_BLOCK_MAX))
+            self.logger.debug(f"Throttled update from user {user.id} by {refused.key}, retry after {retry_after:.2f}s")
+            return await self._drop(event)
+        return await handler(event, data)
+
+    async def _drop(self, event: Any) -> None:
+        """Answers the callback query of a dropped update, which the client would otherwise show as loading"""
+        callback_query = getattr(event, 'callback_query', None)
+        if callback_query is None:
+            return None
+        try:
+            await callback_query.answer()
+        except TelegramAPIError as e:
+            self.logger.debug(f"Failed to answer throttled callback query {callback_query.id}: {e}")
+        return None
+
+    def _buckets(self, tg_id: int, event: Any) -> List[Bucket]:
+        """
+        Lists the buckets the update is charged to.
+        """
+        settings = self.settings
+        buckets = [
+            Bucket(f"throttle:user:{tg_id}", settings.THROTTLE_USER_RATE, settings.THROTTLE_USER_BURST),
+            self.global_bucket,
+        ]
+        command = self._extract_command(event)
+        if command in settings.THROTTLE_COMMAND_RATES:
+            buckets.append(Bucket(
+                f"throttle:cmd:{command}:{tg_id}",
+                settings.THROTTLE_COMMAND_RATES[command],
+                settings.THROTTLE_COMMAND_BURST,
+            ))
+        return buckets
+
+    def _extract_command(self, event: Any) -> Optional[str]:
+        """Extracts the command name, without the bot mention, from a message update"""
+        message = getattr(event, 'message', None)
+        text = message.text if message is not None else None
+        if not text or not text.startswith('/'):
+            return None
+        return text[1:].split(maxsplit=1)[0].split('@', 1)[0] if len(text) > 1 else None
@@ -0,0 +1,198 @@
+from dataclasses import replace
+
+from aiogram import BaseMiddleware
+from redis.exceptions import RedisError
+from typing import Dict, Any, Callable, Awaitable, List, Optional
+
+from infrastructure.user_profile_cache import UserProfile
+
+
+class UserContext:
+    """
+    Everything the handlers need to know about the sender of an update.
+
+    Redis writes produced while the update is processed are collected with
+    :meth:`defer` and sent in a single pipeline once the handler has finished.
+    """
+    __slots__ = ("tg_id", "profile", "_writes")
+
+    def __init__(self, tg_id: int, profile: Optional[UserProfile]):
+        self.tg_id = tg_id
+        self.profile = profile
+        self._writes: List[Callable[[Any], None]] = []
+
+    @property
+    def exists(self) -> bool:
+        return self.profile is not None
+
+    def defer(self, write: Callable[[Any], None]) -> None:
+        """
+        Schedule a write for the post-handler pipeline.
+
+        :param write: Callable queueing commands on the given Redis pipeline.
+        """
+        self._writes.append(write)
+
+    def replace_profile(self, user_profile_cache, profile: UserProfile) -> UserProfile:
+        """
+        Replace the profile of the user after a change committed to the database.
+
+        The new profile is served locally right away and written to Redis with
+        the deferred writes, after any write-back of the old profile loaded by
+        this update, and the other bot processes are told to drop their copy;
+        a delayed invalidation then drops old copies cached meanwhile by
+        concurrent updates.
+
+        :param user_profile_cache: Cache the profile is stored in.
+        :param profile: The changed profile.
+        """
+        self.profile = user_profile_cache.remember(self.tg_id, profile)
+        tg_id = self.tg_id
+        self.defer(lambda pipe: user_profile_cache.queue_store(pipe, tg_id, profile))
+        self.defer(lambda pipe: user_profile_cache.queue_publish(pipe, [tg_id]))
+        user_profile_cache.invalidate_later(tg_id)
+        return profile
+
+
+class UserContextMiddleware(BaseMiddleware):
+    """
+    Outer middleware that builds the user context of an update.
+
+    The profile is served by the in-process cache without any Redis call, or
+    by one Redis read on a local miss. New users coming through /start are
+    registered and inactive ones (they had blocked the bot) reactivated, the
+    UTM counters of a /start with a tag are bumped, and the resulting write-backs are flushed in one pipeline after the handler.
+    Rate limits are enforced earlier, by the throttling middleware.
+    """
+
+    def __init__(self, user_profile_cache, registration_buffer, logger, utm_analytics=None, record_cache_lookup=None):
+        """
+        Initializes the UserContextMiddleware.
+
+        :param user_profile_cache: Read-through cache of user profiles.
+        :param registration_buffer: Write-behind buffer new users are queued to.
+        :param logger: A logger instance for logging messages.
+        :param utm_analytics: UTMAnalytics counting the /start commands carrying a UTM tag, if any.
+        :param record_cache_lookup: Callback counting the hits and misses of each profile cache tier, if any.
+        """
+        super().__init__()
+        self.user_profile_cache = user_profile_cache
+        self.registration_buffer = registration_buffer
+        self.logger = logger
+        self.utm_analytics = utm_analytics
+        self.record_cache_lookup = record_cache_lookup or (lambda cache, layer, hit: None)
+
+    async def __call__(
+        self,
+        handler: Callable[..., Awaitable[Any]],
+        event: Any,
+        data: Dict[str, Any]
+    ) -> Any:
+        """
+        Builds the user context, runs the handler and flushes the deferred writes.
+
+        :param handler: The next middleware or handler in the chain.
+        :param event: The event being processed.
+        :param data: A dictionary containing event data.
+        :return: The result of the next handler in the chain.
+        """
+        user = data.get('event_from_user')
+        if user is None:
+            return await handler(event, data)
+
+        context = await self._load_context(user.id)
+        message = getattr(event, 'message', None)
+        if message is not None and self._is_start_command(message.text):
+            utm = self._extract_utm_from_message(message.text)
+            is_new = context.profile is None
+            if is_new:
+                await self._add_new_user(context, user, utm)
+            elif not context.profile.active:
+                # The user had blocked the bot; the upsert of the registration buffer reactivates them.
+                self.registration_buffer.enqueue(user.id, user.username, context.profile.lang, utm)
+                context.replace_profile(self.user_profile_cache, replace(context.profile, active=True))
+            if utm is not None and self.utm_analytics is not None:
+                context.defer(lambda pipe: self.utm_analytics.queue_start(pipe, utm, is_new))
+
+        data['user_context'] = context
+        data['user_lang'] = context.profile.lang if context.profile else "en"
+        data['user_status'] = context.profile.status if context.profile else None
+        try:
+            return await handler(event, data)
+        finally:
+            await self._flush(context)
+
+    async def _load_context(self, tg_id: int) -> UserContext:
+        """
+        Fetches the profile, from Redis only when the in-process tier misses.
+        """
+        cache = self.user_profile_cache
+        hit, profile = cache.lookup_local(tg_id)
+        self.record_cache_lookup("user_profile", "local", hit)
+        if hit:
+            return UserContext(tg_id, profile)
+
+        write_backs = []
+        redis_client = await cache.redis_connector.get_client(db=cache.redis_db)
+        if redis_client is not None:
+            try:
+                fields = await redis_client.hgetall(cache.key(tg_id))
+            except RedisError as e:
+                self.logger.error(f"Redis error while loading user context (tg_id={tg_id}): {e}")
+            else:
+                hit, profile = cache.parse(tg_id, fields)
+                self.record_cache_lookup("user_profile", "redis", hit)
+
+        if not hit:
+            pending = self.registration_buffer.get_pending(tg_id)
+            if pending is not None:
+                profile = cache.remember(tg_id, UserProfile(lang=pending["lang"], status=cache.resolve_status(tg_id)))
+            else:
+                profile = await cache.load_from_db(tg_id)
+            write_backs.append(lambda pipe: cache.queue_store(pipe, tg_id, profile))
+
+        context = UserContext(tg_id, profile)
+        for write in write_backs:
+            context.defer(write)
+        return context
+
+    async def _add_new_user(self, context: UserContext, user, utm: Optional[str]) -> None:
+        """
+        Queues a new user for insertion and stages the profile write-back.
+
+        The profile is cached right away, so the user is treated as registered
+        before the registration buffer is flushed to the database.
+        """
+        cache = self.user_profile_cache
+        lang = user.language_code or "en"
+        self.registration_buffer.enqueue(context.tg_id, user.username, lang, utm)
+        profile = cache.remember(context.tg_id, UserProfile(lang=lang, status=cache.resolve_status(context.tg_id)))
+        context.profile = profile
+        context.defer(lambda pipe: cache.queue_store(pipe, context.tg_id, profile))
+
+    async def _flush(self, context: UserContext) -> None:
+        """
+        Sends every deferred write of the update in a single pipeline.
+        """
+        if not context._writes:
+            return
+        cache = self.user_profile_cache
+        redis_client = await cache.redis_connector.get_client(db=cache.redis_db)
+        if redis_client is None:
+            return
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for write in context._writes:
+                    write(pipe)
+                await pipe.execute()
+        except RedisError as e:
+            self.logger.error(f"Redis error while flushing user context (tg_id={context.tg_id}): {e}")
+
+    def _is_start_command(self, message_text: Optional[str]) -> bool:
+        """Checks if the message is the /start command"""
+        return message_text is not None and message_text.startswith('/start')
+
+    def _extract_utm_from_message(self, message_text: str) -> Optional[str]:
+        """Extracts the UTM tag from the message"""
+        parts = message_text.split()
+        return parts[1] if len(parts) > 1 else None
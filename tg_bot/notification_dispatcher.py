@@ -0,0 +1,80 @@
+import asyncio
+from typing import Optional
+
+from tg_bot.locals.extractor_translations import translator
+
+
+class NotificationDispatcher:
+    """
+    Delivers due rows of the notifications table.
+
+    Each iteration claims a batch of due notifications (several dispatchers
+    can run side by side thanks to SKIP LOCKED), sends them through the
+    BulkSender and records every outcome with one bulk UPDATE. The
+    notification_type of a row is the translation key of its text.
+    """
+
+    def __init__(self, notification_service, sender, logger, batch_size: int = 500,
+                 poll_interval: float = 5.0, lease: float = 300.0):
+        """
+        Initialize the NotificationDispatcher instance.
+
+        :param notification_service: Service claiming and updating notifications.
+        :param sender: BulkSender used to deliver the messages.
+        :param logger: A logger instance for logging messages.
+        :param batch_size: Maximum number of notifications claimed at once.
+        :param poll_interval: Pause between polls when nothing is due, in seconds.
+        :param lease: Time after which a claimed but unfinished notification is claimed again.
+        """
+        self.notification_service = notification_service
+        self.sender = sender
+        self.logger = logger
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> int:
+        """
+        Claim, send and mark one batch.
+
+        :return: Number of notifications processed.
+        """
+        claimed = await self.notification_service.claim_due(self.batch_size, self.lease)
+        if not claimed:
+            return 0
+        results = await self.sender.send_many(
+            (tg_id, translator.get(notification_type, lang))
+            for _, tg_id, notification_type, lang in claimed
+        )
+        await self.notification_service.mark(
+            {notification_id: status for (notification_id, *_), status in zip(claimed, results)}
+        )
+        self.logger.info(f"Dispatched {len(claimed)} notifications")
+        return len(claimed)
+
+    async def run(self) -> None:
+        """
+        Dispatch notifications until cancelled; full batches are followed immediately by the next one.
+        """
+        while True:
+            try:
+                processed = await self.run_once()
+            except Exception as e:
+                self.logger.exception(f"Notification dispatch failed: {e}")
+                processed = 0
+            if processed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,98 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+KEY_BYTES = 32
+MIN_PASSWORD_LENGTH = 8
+
+
+def _b64(value: bytes) -> str:
+    return base64.b64encode(value).decode()
+
+
+def hash_password(password: str, salt: Optional[bytes] = None) -> str:
+    """
+    Hash the password with scrypt.
+
+    :return: ``scrypt$n$r$p$salt$key``, salt and key being base64-encoded.
+    """
+    salt = salt or os.urandom(SALT_BYTES)
+    key = hashlib.scrypt(password.encode(), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P, dklen=KEY_BYTES)
+    return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(key)}"
+
+
+def verify_password(password: str, encoded: str) -> bool:
+    """
+    Check the password against a hash produced by :func:`hash_password`, in constant time.
+    """
+    try:
+        algorithm, n, r, p, salt, key = encoded.split("$")
+    except ValueError:
+        return False
+    if algorithm != "scrypt":
+        return False
+    key = base64.b64decode(key)
+    candidate = hashlib.scrypt(
+        password.encode(), salt=base64.b64decode(salt), n=int(n), r=int(r), p=int(p), dklen=len(key)
+    )
+    return hmac.compare_digest(candidate, key)
+
+
+class PasswordHasher:
+    """
+    Runs password hashing and verification in a pool of worker processes.
+
+    scrypt is deliberately slow (tens of milliseconds of CPU per call); run on
+    the event loop it would stall the updates of every other chat. The pool
+    has ``workers`` processes and at most ``max_pending`` calls are queued or
+    running; further callers wait, so a registration burst can neither pile
+    up unbounded work nor take more than ``workers`` cores from the bot.
+
+    Workers are started by a forkserver (spawn where it is unavailable)
+    rather than forked from the bot, which by then runs an event loop,
+    threads and open sockets that a forked child would inherit.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 64):
+        """
+        Initialize the PasswordHasher instance.
+
+        :param workers: Number of worker processes.
+        :param max_pending: Maximum number of calls queued or running in the pool.
+        """
+        self.workers = workers
+        self._slots = asyncio.Semaphore(max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context(method))
+        return self._executor
+
+    async def _run(self, function, *args):
+        async with self._slots:
+            return await asyncio.get_running_loop().run_in_executor(self._pool(), function, *args)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, encoded: str) -> bool:
+        return await self._run(verify_password, password, encoded)
+
+    def close(self) -> None:
+        """
+        Shut the worker processes down.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
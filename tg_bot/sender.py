@@ -0,0 +1,82 @@
+import asyncio
+import time
+from typing import Iterable, List, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+
+SENT = "sent"
+BLOCKED = "blocked"
+FAILED = "failed"
+
+
+class BulkSender:
+    """
+    Sends messages to many chats with bounded concurrency.
+
+    Per-chat and global pacing is done by the bot session's
+    OutboundRateLimiter; this class adds the concurrency bound and flood
+    control: when Telegram answers with retry_after, every send of this
+    sender pauses until the interval has passed before the message is retried.
+    """
+
+    def __init__(self, bot: Bot, logger, concurrency: int = 20, max_retries: int = 3):
+        """
+        Initialize the BulkSender instance.
+
+        :param bot: Bot the messages are sent with.
+        :param logger: A logger instance for logging messages.
+        :param concurrency: Maximum number of requests in flight.
+        :param max_retries: Number of retries after flood control or network errors.
+        """
+        self.bot = bot
+        self.logger = logger
+        self.max_retries = max_retries
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._paused_until = 0.0
+
+    async def _wait_for_flood_control(self) -> None:
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def send(self, chat_id: int, text: str, **kwargs) -> str:
+        """
+        Send one message.
+
+        :return: SENT, BLOCKED if the user blocked the bot or the chat is gone, FAILED otherwise.
+        """
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                await self._wait_for_flood_control()
+                try:
+                    await self.bot.send_message(chat_id, text, **kwargs)
+                    return SENT
+                except TelegramRetryAfter as e:
+                    self._paused_until = max(self._paused_until, time.monotonic() + e.retry_after)
+                    self.logger.warning(f"Flood control hit, pausing sends for {e.retry_after}s")
+                except TelegramForbiddenError:
+                    return BLOCKED
+                except TelegramBadRequest as e:
+                    if "chat not found" in e.message.lower():
+                        return BLOCKED
+                    self.logger.error(f"Failed to send message to {chat_id}: {e}")
+                    return FAILED
+                except (TelegramNetworkError, TelegramServerError) as e:
+                    self.logger.warning(f"Send to {chat_id} failed (attempt {attempt + 1}): {e}")
+                    await asyncio.sleep(2 ** attempt)
+            return FAILED
+
+    async def send_many(self, messages: Iterable[Tuple[int, str]]) -> List[str]:
+        """
+        Send (chat_id, text) pairs concurrently.
+
+        :return: The status of every message, in input order.
+        """
+        return await asyncio.gather(*(self.send(chat_id, text) for chat_id, text in messages))
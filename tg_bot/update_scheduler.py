@@ -0,0 +1,168 @@
+import asyncio
+from collections import deque
+from typing import Deque, Dict, Hashable, List, Optional, Sequence
+
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+from aiogram.types import Update
+
+
+class UpdateScheduler:
+    """
+    Processes updates concurrently while keeping the updates of each chat in order.
+
+    Updates are appended to the queue of their chat. A fixed pool of workers
+    takes chats from a ready queue and processes the next update of each, so
+    at most ``workers`` updates run at once and never two of the same chat.
+    A chat that still has pending updates goes back to the end of the ready
+    queue, which keeps busy chats from starving the others.
+
+    :meth:`submit` waits while ``max_pending`` updates are queued or running;
+    the polling loop and the webhook handler both go through it, so a backlog
+    slows down intake instead of growing without bound.
+    """
+
+    def __init__(self, dp: Dispatcher, bot: Bot, logger, workers: int = 50, max_pending: int = 1000):
+        """
+        Initialize the UpdateScheduler instance.
+
+        :param dp: Dispatcher the updates are fed to.
+        :param bot: Bot instance the updates belong to.
+        :param logger: A logger instance for logging messages.
+        :param workers: Maximum number of updates processed concurrently.
+        :param max_pending: Maximum number of updates queued or running before submit waits.
+        """
+        self.dp = dp
+        self.bot = bot
+        self.logger = logger
+        self.workers = workers
+        self.max_pending = max_pending
+        self._chats: Dict[Hashable, Deque[Update]] = {}
+        self._ready: "asyncio.Queue[Hashable]" = asyncio.Queue()
+        self._slots = asyncio.Semaphore(max_pending)
+        self._pending = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def pending(self) -> int:
+        """
+        Number of updates queued or being processed.
+        """
+        return self._pending
+
+    @staticmethod
+    def chat_key(update: Update) -> Hashable:
+        """
+        Return the key whose updates must be processed in order: the chat, else the user.
+
+        Updates with neither (e.g. polls) are keyed by their own ID and are not ordered.
+        """
+        context = UserContextMiddleware.resolve_event_context(update)
+        if context.chat is not None:
+            return ("chat", context.chat.id, context.thread_id)
+        if context.user is not None:
+            return ("user", context.user.id)
+        return ("update", update.update_id)
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def submit(self, update: Update) -> None:
+        """
+        Queue the update, waiting for room if ``max_pending`` updates are in flight.
+        """
+        await self._slots.acquire()
+        self._pending += 1
+        self._idle.clear()
+        key = self.chat_key(update)
+        queue = self._chats.get(key)
+        if queue is None:
+            self._chats[key] = deque([update])
+            self._ready.put_nowait(key)
+        else:
+            queue.append(update)
+
+    async def _work(self) -> None:
+        while True:
+            key = await self._ready.get()
+            queue = self._chats[key]
+            update = queue[0]
+            try:
+                await self.dp.feed_update(self.bot, update)
+            except Exception as e:
+                self.logger.exception(f"Failed to process update {update.update_id}: {e}")
+            finally:
+                queue.popleft()
+                if queue:
+                    self._ready.put_nowait(key)
+                else:
+                    del self._chats[key]
+                self._pending -= 1
+                if not self._pending:
+                    self._idle.set()
+                self._slots.release()
+
+    async def join(self) -> None:
+        """
+        Wait until every submitted update has been processed.
+        """
+        await self._idle.wait()
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Let the queued updates finish, up to ``timeout`` seconds, then stop the workers.
+        """
+        try:
+            await asyncio.wait_for(self.join(), timeout)
+        except asyncio.TimeoutError:
+            self.logger.warning(f"Stopping the update scheduler with {self._pending} updates unprocessed")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def poll(self, allowed_updates: Optional[Sequence[str]] = None, timeout: int = 30,
+                   max_backoff: float = 30.0) -> None:
+        """
+        Long-poll getUpdates and submit the updates until cancelled.
+
+        The next request is only made once every update of the previous batch
+        was accepted by :meth:`submit`, so polling pauses while the scheduler
+        is full. Errors are retried with exponential backoff; unexpected ones
+        (e.g. an update that fails validation) are logged with their traceback.
+
+        :param allowed_updates: Update types to receive; None keeps Telegram's current setting.
+        :param timeout: Long polling timeout, in seconds.
+        :param max_backoff: Upper bound of the retry delay, in seconds.
+        """
+        offset = None
+        backoff = initial_backoff = min(1.0, max_backoff)
+        while True:
+            try:
+                updates = await self.bot.get_updates(
+                    offset=offset,
+                    timeout=timeout,
+                    allowed_updates=allowed_updates,
+                    request_timeout=timeout + 10,
+                )
+            except TelegramRetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+                continue
+            except (TelegramNetworkError, TelegramServerError) as e:
+                self.logger.warning(f"getUpdates failed: {e}; retrying in {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, max_backoff)
+                continue
+            except Exception as e:
+                self.logger.exception(f"Unexpected getUpdates error: {e}; retrying in {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, max_backoff)
+                continue
+            backoff = initial_backoff
+            for update in updates:
+                await self.submit(update)
+                offset = update.update_id + 1
@@ -0,0 +1,227 @@
+import asyncio
+import uuid
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+STARTS = "starts"
+REGISTRATIONS = "registrations"
+
+# Moves the live hash of every registered day away under the flush token and
+# unregisters the day, in one step so that a /start racing the flush either
+# lands in the moved hash or registers its day again. Returns every hash
+# awaiting a flush, including those left by failed flushes.
+# KEYS: day registry, flushing registry, then a (live hash, flushing hash) pair per day.
+# ARGV: the days.
+ROTATE_SCRIPT = """
+for i, day in ipairs(ARGV) do
+    local live = KEYS[i * 2 + 1]
+    if redis.call('EXISTS', live) == 1 then
+        redis.call('RENAME', live, KEYS[i * 2 + 2])
+        redis.call('SADD', KEYS[2], KEYS[i * 2 + 2])
+    end
+    redis.call('SREM', KEYS[1], day)
+end
+return redis.call('SMEMBERS', KEYS[2])
+"""
+
+
+class UTMAnalytics:
+    """
+    Incremental attribution counters of UTM tags.
+
+    Every /start carrying a tag bumps a Redis hash of the current day
+    (``<tag>:starts``, plus ``<tag>:registrations`` for a new user) from the
+    pipeline the user context middleware already sends, and registers the day
+    in a set. A background task periodically moves the hashes to the
+    utm_daily_stats rollup table, so reading the stats sums a few rollup rows
+    instead of scanning users.
+
+    A flush renames the hashes of the registered days away under a token
+    before reading them, so counts that arrive meanwhile go to a fresh hash;
+    the renamed hashes are deleted only after the rollup upsert has
+    committed and are retried on the next flush otherwise. The upsert records
+    the tokens it applied, so a flush that committed but failed to delete its
+    hashes is not counted again. A Redis lock keeps several bot processes
+    from flushing at once.
+    """
+    LIVE_KEY = "utm:stats:{day}"
+    DAYS_KEY = "utm:stats:days"
+    FLUSHING_KEY = "utm:flushing:{day}:{token}"
+    FLUSHING_SET_KEY = "utm:flushing"
+    LOCK_KEY = "utm:flush:lock"
+
+    def __init__(self, utm_stats_service, redis_connector, logger, flush_interval: float = 60.0,
+                 redis_db: int = 0):
+        """
+        Initialize the UTMAnalytics instance.
+
+        :param utm_stats_service: Service reading and writing the rollup table.
+        :param redis_connector: Connector used to obtain Redis clients.
+        :param logger: A logger instance for logging messages.
+        :param flush_interval: Pause between two flushes of the counters, in seconds.
+        :param redis_db: Redis database index holding the counters.
+        """
+        self.utm_stats_service = utm_stats_service
+        self.redis_connector = redis_connector
+        self.logger = logger
+        self.flush_interval = flush_interval
+        self.redis_db = redis_db
+        self._task: Optional[asyncio.Task] = None
+        self._rotate = None
+
+    def queue_start(self, pipe, utm: str, registered: bool) -> None:
+        """
+        Queue the counter increments of a /start with the tag on the given pipeline.
+
+        :param pipe: Redis pipeline of the user context write-backs.
+        :param utm: The UTM tag of the /start.
+        :param registered: Whether the /start registered a new user.
+        """
+        day = date.today().isoformat()
+        key = self.LIVE_KEY.format(day=day)
+        pipe.hincrby(key, f"{utm}:{STARTS}", 1)
+        if registered:
+            pipe.hincrby(key, f"{utm}:{REGISTRATIONS}", 1)
+        pipe.sadd(self.DAYS_KEY, day)
+
+    async def flush(self) -> int:
+        """
+        Move the counters from Redis to the rollup table.
+
+        :return: Number of rollup rows updated.
+        """
+        client = await self.redis_connector.get_client(db=self.redis_db)
+        if client is None:
+            return 0
+        lock_token = uuid.uuid4().hex
+        if not await client.set(self.LOCK_KEY, lock_token, nx=True, ex=max(int(self.flush_interval) * 2, 60)):
+            return 0
+        try:
+            days = sorted(await client.smembers(self.DAYS_KEY))
+            token = uuid.uuid4().hex
+            keys = [self.DAYS_KEY, self.FLUSHING_SET_KEY]
+            for day in days:
+                keys.extend((self.LIVE_KEY.format(day=day), self.FLUSHING_KEY.format(day=day, token=token)))
+            if self._rotate is None:
+                self._rotate = client.register_script(ROTATE_SCRIPT)
+            flushing = sorted(await self._rotate(keys=keys, args=days, client=client))
+            if not flushing:
+                return 0
+            async with client.pipeline(transaction=False) as pipe:
+                for key in flushing:
+                    pipe.hgetall(key)
+                hashes = await pipe.execute()
+            batches: Dict[str, Dict[Tuple[str, date], List[int]]] = {}
+            for key, fields in zip(flushing, hashes):
+                _, _, day, key_token = key.split(":")
+                counts = batches.setdefault(key_token, {})
+                for field, value in fields.items():
+                    utm, counter = field.rsplit(":", 1)
+                    row = counts.setdefault((utm, date.fromisoformat(day)), [0, 0])
+                    row[0 if counter == STARTS else 1] += int(value)
+            updated = await self.utm_stats_service.add_counts({
+                batch_token: {key: tuple(row) for key, row in counts.items()}
+                for batch_token, counts in batches.items()
+            })
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.delete(*flushing)
+                pipe.srem(self.FLUSHING_SET_KEY, *flushing)
+                await pipe.execute()
+            return updated
+        finally:
+            if await client.get(self.LOCK_KEY) == lock_token:
+                await client.delete(self.LOCK_KEY)
+
+    async def stats(self, days: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Return the starts, registrations and conversion of every tag, read from the rollups.
+
+        The conversion is None for tags without recorded starts (e.g. backfilled days).
+        The counters of the last ``flush_interval`` seconds are not included yet.
+
+        :param days: Only count the last ``days`` days, today included; None counts everything.
+        """
+        since = date.today() - timedelta(days=days - 1) if days else None
+        return [
+            {
+                "utm": utm,
+                STARTS: starts,
+                REGISTRATIONS: registrations,
+                "conversion": registrations / starts if starts else None,
+            }
+            for utm, starts, registrations in await self.utm_stats_service.totals(since)
+        ]
+
+    async def backfill(self, chunk_size: int = 1000) -> int:
+        """
+        Rebuild the registrations of the rollups of past days from the users table.
+
+        Users are streamed in chunks and counted per tag and day; the counts
+        overwrite the registrations of the rollups, so the job can be run
+        again safely. Today's rollup is left to the live counters. Starts are
+        not recorded on users and cannot be backfilled.
+
+        :param chunk_size: Number of users read and rollups written at once.
+        :return: Number of users counted.
+        """
+        before = datetime.combine(date.today(), time.min)
+        counts: Counter = Counter()
+        users = 0
+        async for chunk in self.utm_stats_service.stream_registrations(before, chunk_size):
+            counts.update((utm, created_at.date()) for utm, created_at in chunk)
+            users += len(chunk)
+        rollups = list(counts.items())
+        for offset in range(0, len(rollups), chunk_size):
+            await self.utm_stats_service.set_registrations(dict(rollups[offset:offset + chunk_size]))
+        self.logger.info(f"Backfilled {len(rollups)} UTM rollups from {users} users")
+        return users
+
+    async def run(self) -> None:
+        """
+        Flush the counters every ``flush_interval`` seconds until cancelled.
+        """
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                self.logger.error(f"Failed to flush UTM counters: {e}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """
+        Stop the background task and flush the remaining counters.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            self.logger.error(f"Failed to flush UTM counters: {e}")
+
+
+async def main() -> None:
+    """
+    Backfill the UTM rollups from the users table: ``python -m tg_bot.utm_analytics``.
+    """
+    from tg_bot.bot import container
+    from tg_bot.config import settings
+
+    try:
+        await container.utm_analytics.backfill(settings.bot_settings.UTM_BACKFILL_CHUNK_SIZE)
+    finally:
+        await container.redis_connector.close_conn()
+        await container.database["engine"].dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
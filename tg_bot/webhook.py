@@ -0,0 +1,117 @@
+import asyncio
+import hmac
+from typing import Optional
+
+from aiogram.types import Update
+from aiohttp import web
+
+from tg_bot.update_scheduler import UpdateScheduler
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookHandler:
+    """
+    aiohttp request handler feeding webhook updates into the update scheduler.
+
+    Each request is acknowledged as soon as the update has been queued; the
+    scheduler processes it with per-chat ordering. When the scheduler is
+    full the handler waits for room before answering, which makes Telegram
+    slow down instead of piling up unbounded work.
+    """
+
+    def __init__(self, scheduler: UpdateScheduler, logger, secret_token: Optional[str] = None,
+                 shutdown_timeout: Optional[float] = None):
+        """
+        Initialize the WebhookHandler instance.
+
+        :param scheduler: Scheduler the updates are submitted to.
+        :param logger: A logger instance for logging messages.
+        :param secret_token: Expected value of the secret token header, if any.
+        :param shutdown_timeout: Maximum time to wait for the queued updates on shutdown, in seconds.
+        """
+        self.scheduler = scheduler
+        self.bot = scheduler.bot
+        self.logger = logger
+        self.secret_token = secret_token
+        self.shutdown_timeout = shutdown_timeout
+
+    def verify_secret(self, request: web.Request) -> bool:
+        """
+        Check the secret token header in constant time.
+        """
+        if not self.secret_token:
+            return True
+        received = request.headers.get(SECRET_TOKEN_HEADER, "")
+        return hmac.compare_digest(received.encode(), self.secret_token.encode())
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """
+        Accept an update pushed by Telegram.
+        """
+        if not self.verify_secret(request):
+            return web.Response(status=401)
+        try:
+            payload = await request.json(loads=self.bot.session.json_loads)
+            update = Update.model_validate(payload, context={"bot": self.bot})
+        except Exception as e:
+            self.logger.warning(f"Rejected malformed webhook update: {e}")
+            return web.Response(status=400)
+
+        await self.scheduler.submit(update)
+        return web.Response()
+
+    async def shutdown(self, app: Optional[web.Application] = None) -> None:
+        """
+        Wait for the updates still being processed, up to ``shutdown_timeout`` seconds.
+        """
+        try:
+            await asyncio.wait_for(self.scheduler.join(), self.shutdown_timeout)
+        except asyncio.TimeoutError:
+            self.logger.warning(f"Webhook shut down with {self.scheduler.pending} updates still pending")
+
+
+def create_webhook_app(handler: WebhookHandler, path: str) -> web.Application:
+    """
+    Build the aiohttp application serving the webhook endpoint.
+
+    :param handler: Handler processing the incoming updates.
+    :param path: URL path Telegram posts updates to.
+    :return: Configured aiohttp application.
+    """
+    app = web.Application()
+    app.router.add_post(path, handler.handle)
+    app.on_shutdown.append(handler.shutdown)
+    return app
+
+
+async def run_webhook(scheduler: UpdateScheduler, settings, logger) -> None:
+    """
+    Register the webhook with Telegram and serve updates until cancelled.
+
+    :param scheduler: Scheduler processing the updates.
+    :param settings: BotSettings instance with the webhook configuration.
+    :param logger: A logger instance for logging messages.
+    """
+    if not settings.WEBHOOK_BASE_URL:
+        raise ValueError("WEBHOOK_BASE_URL must be set to run the bot in webhook mode.")
+
+    handler = WebhookHandler(scheduler, logger, settings.WEBHOOK_SECRET, settings.UPDATE_SHUTDOWN_TIMEOUT)
+    app = create_webhook_app(handler, settings.WEBHOOK_PATH)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, settings.WEBHOOK_HOST, settings.WEBHOOK_PORT)
+    await site.start()
+
+    await scheduler.bot.set_webhook(
+        url=settings.WEBHOOK_BASE_URL.rstrip("/") + settings.WEBHOOK_PATH,
+        secret_token=settings.WEBHOOK_SECRET,
+        allowed_updates=scheduler.dp.resolve_used_update_types(),
+        max_connections=min(settings.WEBHOOK_MAX_CONCURRENCY, 100),
+        drop_pending_updates=settings.BOT_DROP_PENDING_UPDATES,
+    )
+    logger.info(f"Webhook server listening on {settings.WEBHOOK_HOST}:{settings.WEBHOOK_PORT}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()